@@ -0,0 +1,108 @@
+# 批量重新计算projects目录下的所有项目（年度平衡计算 + 负荷优化）
+# 用法: python batch_calculate.py [--changed-only] [--float32-results] [--workers N] [--root 程序目录] [项目ID ...]
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from energy_engine import (
+    ProjectManager, EnergyDataModel, AnnualBalanceCalculator, balance_kpis,
+    model_inputs_hash, optimize_balance_results,
+)
+
+def recalculate_project(app_root_path, project_id, changed_only=False, results_dtype=None):
+    """
+    重新计算单个项目并写回项目数据（在工作进程中执行）
+    优化结果中记录输入哈希，changed_only为True且哈希与已保存结果一致时跳过计算
+    :param results_dtype: 计算结果列文件的数据类型（见ProjectManager）
+    :return: 项目摘要 {'id', 'status', 'kpis', 'total_revenue', 'seconds'}
+    """
+    start = time.perf_counter()
+    project_manager = ProjectManager(app_root_path, results_dtype)
+    summary = {'id': project_id, 'status': '', 'kpis': None, 'total_revenue': None, 'seconds': 0.0}
+
+    data = project_manager.load_project_data(project_id)
+    if data is None:
+        summary['status'] = "无项目数据"
+        return summary
+
+    data_model = EnergyDataModel()
+    data_model.from_dict(data)
+    calculator = AnnualBalanceCalculator(data_model)
+    inputs_hash = model_inputs_hash(data_model, calculator.base_year, include_optimization=True)
+    stored = data.get('optimized_results') or {}
+    if changed_only and stored.get('inputs_hash') == inputs_hash:
+        summary['status'] = "未变化，跳过"
+        summary['total_revenue'] = stored.get('total_revenue')
+        summary['seconds'] = time.perf_counter() - start
+        return summary
+
+    results = calculator.calculate_annual_balance()
+    params = data_model.optimization_params
+    optimized_results = optimize_balance_results(data_model, results, params, params.get('method', 'grid'))
+    optimized_results['inputs_hash'] = inputs_hash
+
+    data_model.set_calculation_results(results, model_inputs_hash(data_model, calculator.base_year))
+    data_model.optimized_results = optimized_results
+    if not project_manager.save_project_data(project_id, data_model.to_dict()):
+        summary['status'] = "保存失败"
+    else:
+        summary['status'] = "已计算"
+    summary['kpis'] = balance_kpis(results, data_model.step_hours)
+    summary['total_revenue'] = optimized_results['total_revenue']
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+def format_summary(project, summary):
+    """
+    格式化单个项目的摘要行
+    """
+    line = f"{project['id']}  {project['name'][:16]:<16}  {summary['status']:<8}"
+    kpis = summary['kpis']
+    if kpis is not None:
+        line += (f"  新能源 {kpis['renewable_energy'] / 1e4:,.1f}万kWh"
+                 f"  弃电率 {kpis['abandon_rate'] * 100:.2f}%"
+                 f"  下网 {kpis['grid_purchase_energy'] / 1e4:,.1f}万kWh")
+    if summary['total_revenue'] is not None:
+        line += f"  总收益 {summary['total_revenue'] / 1e4:,.1f}万元"
+    return line + f"  耗时 {summary['seconds']:.2f}s"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量重新计算项目的年度平衡和负荷优化结果")
+    parser.add_argument('project_ids', nargs='*', help="只计算指定的项目ID，默认计算全部项目")
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="程序目录（其下的projects目录保存各项目）")
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--changed-only', action='store_true', help="跳过输入未变化的项目")
+    parser.add_argument('--float32-results', action='store_true', help="计算结果以float32保存，结果文件减半")
+    args = parser.parse_args(argv)
+
+    projects = ProjectManager(args.root).get_project_list()
+    if args.project_ids:
+        projects = [project for project in projects if project['id'] in args.project_ids]
+    if not projects:
+        print("没有需要计算的项目")
+        return 0
+
+    start = time.perf_counter()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results_dtype = 'float32' if args.float32_results else None
+        futures = {pool.submit(recalculate_project, args.root, project['id'], args.changed_only, results_dtype): project
+                   for project in projects}
+        for future in as_completed(futures):
+            project = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"{project['id']}  {project['name'][:16]:<16}  计算失败: {e}")
+                continue
+            failures += summary['status'] == "保存失败"
+            print(format_summary(project, summary))
+    print(f"共 {len(projects)} 个项目，失败 {failures} 个，总耗时 {time.perf_counter() - start:.2f}s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2879 @@
+# 能源平衡计算引擎：数据模型、出力函数、平衡计算、优化和项目管理
+# 本模块不依赖tkinter和matplotlib，可在脚本或服务中直接使用；图形界面见loadcalculation.py
+import numpy as np
+import csv
+import json
+import os
+import shutil
+import copy
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# 每年小时数
+HOURS_PER_YEAR = 8760
+
+# 可选的时间步长（分钟），60为逐小时
+TIME_STEP_OPTIONS = (60, 15, 5)
+
+def to_hourly_array(values, hours=HOURS_PER_YEAR):
+    """
+    将逐小时序列转换为连续的float64数组，缺省时返回全零数组
+    """
+    if values is None:
+        return np.zeros(hours)
+    return np.array(values, dtype=float)
+
+def results_to_arrays(results):
+    """
+    将结果字典中的逐小时序列转换为数组，标量保持不变
+    """
+    if not results:
+        return results
+    return {key: np.array(value, dtype=float) if isinstance(value, (list, tuple, np.ndarray)) else value
+            for key, value in results.items()}
+
+def json_default(obj):
+    """
+    JSON序列化时将NumPy数组和标量转换为Python原生类型
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def atomic_write_json(path, data):
+    """
+    写入JSON文件：先写入同目录下的临时文件，再整体替换目标文件，
+    写入过程中断时原文件保持不变
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def atomic_save_npy(path, array):
+    """
+    写入.npy文件：与atomic_write_json相同，先写临时文件再整体替换
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.asarray(array))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def atomic_savez(path, **arrays):
+    """
+    写入.npz文件：与atomic_write_json相同，先写临时文件再整体替换
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# 项目目录下保存序列列文件的子目录，以及project_data.json中指向列文件的标记键
+SERIES_DIR = "series"
+SERIES_FILE_KEY = "__npy__"
+# 旧版project_data.json中以列表保存、迁移时转换为列文件的结果字典
+RESULT_DICT_KEYS = ('optimized_results', 'calculation_results')
+# project_data.json中保存各数据分区内容哈希的键，打开项目时直接恢复，无需读取全部数组重新计算
+SECTION_HASHES_KEY = "__section_hashes__"
+
+# 项目目录索引文件（位于projects目录下），缓存各项目的名称、时间和年度指标
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1
+# 项目列表可用的排序字段
+PROJECT_SORT_KEYS = ('name', 'created_time', 'modified_time')
+
+class ProjectManager:
+    """项目管理器"""
+    def __init__(self, app_root_path, results_dtype=None):
+        """
+        :param results_dtype: 计算结果列文件的数据类型，如'float32'可使结果文件减半，默认按原类型保存
+        """
+        self.app_root_path = app_root_path
+        self.results_dtype = results_dtype
+        self.projects_dir = os.path.join(app_root_path, "projects")
+        self.ensure_projects_directory()
+        # 项目目录索引 {项目ID: 记录}，首次使用时从索引文件读取；自动保存线程也会更新，需加锁
+        self.catalog = None
+        self.catalog_lock = threading.RLock()
+        
+    def ensure_projects_directory(self):
+        """确保项目目录存在"""
+        if not os.path.exists(self.projects_dir):
+            os.makedirs(self.projects_dir)
+
+    def get_project_list(self, search=None, sort_by='modified_time', reverse=True):
+        """
+        获取项目列表（来自项目目录索引，不逐个读取项目信息文件）
+        :param search: 只返回名称包含该文字的项目（不区分大小写）
+        :param sort_by: 排序字段，见PROJECT_SORT_KEYS，默认按修改时间从新到旧
+        :return: [{'id', 'name', 'created_time', 'modified_time', 'kpis', 'path'}, ...]
+        """
+        if sort_by not in PROJECT_SORT_KEYS:
+            raise ValueError(f"不支持的排序字段: {sort_by}，可选 {PROJECT_SORT_KEYS}")
+        keyword = search.strip().lower() if search else ''
+        projects = [dict(record, path=os.path.join(self.projects_dir, project_id))
+                    for project_id, record in self._catalog_records().items()
+                    if keyword in record['name'].lower()]
+        for project in projects:
+            del project['dir_mtime']
+        return sorted(projects, key=lambda x: x[sort_by], reverse=reverse)
+        
+    def project_name_exists(self, name, exclude_id=None):
+        """
+        是否已有其他项目使用该名称
+        :param exclude_id: 不参与比较的项目ID（重命名时为该项目自身）
+        """
+        return any(record['name'] == name and project_id != exclude_id
+                   for project_id, record in self._catalog_records().items())
+        
+    def create_project(self, name, description=""):
+        """创建新项目"""
+        # 生成项目ID
+        project_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        project_path = os.path.join(self.projects_dir, project_id)
+        
+        # 创建项目目录
+        os.makedirs(project_path)
+        
+        # 创建项目信息文件
+        project_info = {
+            'name': name,
+            'description': description,
+            'created_time': datetime.now().isoformat(),
+            'modified_time': datetime.now().isoformat()
+        }
+        
+        atomic_write_json(os.path.join(project_path, "project_info.json"), project_info)
+        self._refresh_catalog_record(project_id)
+            
+        return {
+            'id': project_id,
+            'name': name,
+            'created_time': project_info['created_time'],
+            'modified_time': project_info['modified_time'],
+            'path': project_path
+        }
+        
+    def rename_project(self, project_id, name):
+        """
+        修改项目名称
+        :return: 项目信息文件不存在时返回False
+        """
+        info_file = os.path.join(self.projects_dir, project_id, "project_info.json")
+        if not os.path.exists(info_file):
+            return False
+        with open(info_file, 'r', encoding='utf-8') as f:
+            project_info = json.load(f)
+        project_info['name'] = name
+        atomic_write_json(info_file, project_info)
+        self._refresh_catalog_record(project_id)
+        return True
+        
+    def delete_project(self, project_id):
+        """删除项目"""
+        project_path = os.path.join(self.projects_dir, project_id)
+        if os.path.exists(project_path):
+            shutil.rmtree(project_path)
+            with self.catalog_lock:
+                if self.catalog is not None and self.catalog.pop(project_id, None) is not None:
+                    self._save_catalog()
+            return True
+        return False
+        
+    def _catalog_records(self):
+        """
+        返回经过校验的项目目录索引 {项目ID: 记录}
+        只列出projects目录并比较各项目文件夹的修改时间，与索引中记录的一致时直接使用索引，
+        否则（新增、外部修改的项目）重新读取该项目的project_info.json；索引有变化时写回索引文件
+        """
+        with self.catalog_lock:
+            if self.catalog is None:
+                self.catalog = self._load_catalog()
+            records = {}
+            with os.scandir(self.projects_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    dir_mtime = entry.stat().st_mtime_ns
+                    record = self.catalog.get(entry.name)
+                    if record is None or record['dir_mtime'] != dir_mtime:
+                        record = self._read_project_record(entry.name, dir_mtime)
+                    if record is not None:
+                        records[entry.name] = record
+            if records != self.catalog:
+                self.catalog = records
+                self._save_catalog()
+            return records
+            
+    def _refresh_catalog_record(self, project_id):
+        """
+        项目信息或数据写入后更新该项目的索引记录（已读取过索引时）
+        """
+        with self.catalog_lock:
+            if self.catalog is None:
+                return
+            project_path = os.path.join(self.projects_dir, project_id)
+            record = None
+            if os.path.isdir(project_path):
+                record = self._read_project_record(project_id, os.stat(project_path).st_mtime_ns)
+            if record is not None:
+                self.catalog[project_id] = record
+            elif self.catalog.pop(project_id, None) is None:
+                return
+            self._save_catalog()
+            
+    def _read_project_record(self, project_id, dir_mtime):
+        """
+        由项目信息文件生成索引记录，没有项目信息文件或读取失败时返回None
+        """
+        project_info_path = os.path.join(self.projects_dir, project_id, "project_info.json")
+        if not os.path.exists(project_info_path):
+            return None
+        try:
+            with open(project_info_path, 'r', encoding='utf-8') as f:
+                project_info = json.load(f)
+        except Exception as e:
+            print(f"读取项目信息失败: {e}")
+            return None
+        return {
+            'id': project_id,
+            'name': project_info.get('name', project_id),
+            'created_time': project_info.get('created_time', ''),
+            'modified_time': project_info.get('modified_time', ''),
+            'kpis': project_info.get('kpis'),
+            'dir_mtime': dir_mtime
+        }
+        
+    def _load_catalog(self):
+        """
+        读取索引文件，不存在、损坏或版本不符时返回空索引（随后按各项目信息文件重建）
+        """
+        try:
+            with open(os.path.join(self.projects_dir, CATALOG_FILE), 'r', encoding='utf-8') as f:
+                catalog = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if catalog.get('version') != CATALOG_VERSION:
+            return {}
+        return catalog.get('projects', {})
+        
+    def _save_catalog(self):
+        try:
+            atomic_write_json(os.path.join(self.projects_dir, CATALOG_FILE),
+                              {'version': CATALOG_VERSION, 'projects': self.catalog})
+        except Exception as e:
+            print(f"保存项目索引失败: {e}")
+        
+    def load_project_data(self, project_id, mmap_mode=None):
+        """
+        加载项目数据
+        逐时段序列和结果序列保存在series目录下的.npy列文件中，project_data.json只保存其余数据；
+        旧版项目（序列以列表写在JSON中）首次打开时自动迁移为列文件格式
+        :param mmap_mode: 列文件的内存映射模式（如'r'），默认直接读入内存；
+                          计算结果列始终以写时复制方式映射（'c'），用到时才从磁盘读取
+        """
+        project_path = os.path.join(self.projects_dir, project_id)
+        data_file = os.path.join(project_path, "project_data.json")
+        
+        if os.path.exists(data_file):
+            try:
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if self._migrate_legacy_series(data):
+                    try:
+                        self._write_project_data(project_path, data)
+                    except Exception as e:
+                        print(f"迁移项目数据失败: {e}")
+                    return data
+                return self._resolve_series_files(project_path, data, mmap_mode)
+            except Exception as e:
+                print(f"加载项目数据失败: {e}")
+        return None
+        
+    def save_project_data(self, project_id, data, sections=None, section_hashes=None):
+        """
+        保存项目数据
+        :param sections: 自上次保存以来修改过的数据分区（见EnergyDataModel.SAVE_SECTIONS），
+                         只重写这些分区的列文件；为None时全部重写，为空时不写入
+        :param section_hashes: data各分区的内容哈希（EnergyDataModel.section_hashes），随数据一起保存；
+                               为None时在此计算
+        """
+        project_path = os.path.join(self.projects_dir, project_id)
+        data_file = os.path.join(project_path, "project_data.json")
+        if sections is not None and not sections and os.path.exists(data_file):
+            return True
+        
+        # 计算结果按results_dtype压缩保存时，结果分区的哈希按实际写入的内容计算，
+        # 未修改时沿用项目文件中已保存的哈希，保证重新打开后与加载的内容一致
+        results_dirty = sections is None or 'results' in sections
+        compact = bool(self.results_dtype and data.get('calculation_results'))
+        if compact and results_dirty:
+            data = dict(data, calculation_results={
+                key: value.astype(self.results_dtype) if isinstance(value, np.ndarray) and value.dtype.kind == 'f' else value
+                for key, value in data['calculation_results'].items()})
+        if section_hashes is None:
+            section_hashes = EnergyDataModel.section_hashes(data)
+        elif compact:
+            section_hashes = dict(section_hashes)
+            if results_dirty:
+                section_hashes['results'] = EnergyDataModel.section_hashes(
+                    {'calculation_results': data['calculation_results']})['results']
+            else:
+                stored = self._stored_section_hashes(data_file)
+                if stored and 'results' in stored:
+                    section_hashes['results'] = stored['results']
+        data = dict(data, **{SECTION_HASHES_KEY: section_hashes})
+        
+        # 保存项目数据
+        try:
+            self._write_project_data(project_path, data, sections)
+        except Exception as e:
+            print(f"保存项目数据失败: {e}")
+            return False
+        
+        # 项目数据提交后再更新项目修改时间（计算结果有修改时一并更新年度指标，供项目列表直接显示）和项目索引，
+        # 保存失败或中断时项目信息不会指向未保存的数据
+        info_file = os.path.join(project_path, "project_info.json")
+        if os.path.exists(info_file):
+            try:
+                with open(info_file, 'r', encoding='utf-8') as f:
+                    project_info = json.load(f)
+                project_info['modified_time'] = datetime.now().isoformat()
+                if results_dirty:
+                    project_info['kpis'] = project_kpis(data)
+                atomic_write_json(info_file, project_info)
+            except Exception as e:
+                print(f"更新项目信息失败: {e}")
+        self._refresh_catalog_record(project_id)
+        return True
+            
+    def _write_project_data(self, project_path, data, sections=None):
+        """
+        写入项目数据：顶层及结果字典中的NumPy数组写入series目录下的.npy列文件，
+        其余数据写入project_data.json（数组位置保存指向列文件的标记）
+        修改过的列写入带本次保存编号的新文件，未修改分区的列沿用现有文件；
+        替换project_data.json是唯一的提交点，之前中断时原JSON及其引用的列文件都保持不变，
+        提交后再删除不再引用的列文件
+        """
+        series_path = os.path.join(project_path, SERIES_DIR)
+        os.makedirs(series_path, exist_ok=True)
+        data_file = os.path.join(project_path, "project_data.json")
+        
+        clean_keys = set()
+        if sections is not None:
+            dirty_keys = {key for section in sections for key in EnergyDataModel.SAVE_SECTIONS.get(section, ())}
+            clean_keys = {key for keys in EnergyDataModel.SAVE_SECTIONS.values() for key in keys} - dirty_keys
+        existing = self._series_references(data_file) if clean_keys else {}
+        generation = f"{datetime.now():%Y%m%d%H%M%S%f}"
+        referenced = set()
+        
+        def store(key, name, value):
+            if not isinstance(value, np.ndarray):
+                return value
+            reference = existing.get(name) if key in clean_keys else None
+            if reference is None or not os.path.exists(os.path.join(project_path, reference)):
+                reference = f"{SERIES_DIR}/{name}.{generation}.npy"
+                atomic_save_npy(os.path.join(project_path, reference), value)
+            referenced.add(os.path.basename(reference))
+            return {SERIES_FILE_KEY: reference}
+        
+        metadata = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                value = {sub_key: store(key, f"{key}.{sub_key}", sub_value) for sub_key, sub_value in value.items()}
+            metadata[key] = store(key, key, value)
+        atomic_write_json(data_file, metadata)
+        
+        for file_name in os.listdir(series_path):
+            if file_name.endswith('.npy') and file_name not in referenced:
+                try:
+                    os.remove(os.path.join(series_path, file_name))
+                except OSError:
+                    # 仍被内存映射的列文件（Windows下无法删除）留到下次保存时再删除
+                    pass
+                
+    @staticmethod
+    def _stored_section_hashes(data_file):
+        """
+        读取现有project_data.json中保存的各分区内容哈希，没有时返回None
+        """
+        try:
+            with open(data_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get(SECTION_HASHES_KEY)
+        except (OSError, ValueError):
+            return None
+        
+    @staticmethod
+    def _series_references(data_file):
+        """
+        读取现有project_data.json中各列对应的列文件 {列名: 相对路径}
+        """
+        if not os.path.exists(data_file):
+            return {}
+        try:
+            with open(data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        references = {}
+        for key, value in data.items():
+            if isinstance(value, dict) and SERIES_FILE_KEY not in value:
+                for sub_key, sub_value in value.items():
+                    if isinstance(sub_value, dict) and SERIES_FILE_KEY in sub_value:
+                        references[f"{key}.{sub_key}"] = sub_value[SERIES_FILE_KEY]
+            elif isinstance(value, dict):
+                references[key] = value[SERIES_FILE_KEY]
+        return references
+        
+    @staticmethod
+    def _migrate_legacy_series(data):
+        """
+        将旧版数据中以列表保存的逐时段序列和结果序列转换为数组（原地修改）
+        :return: 是否存在需要迁移的序列
+        """
+        migrated = False
+        for key in EnergyDataModel.HOURLY_SERIES:
+            if isinstance(data.get(key), list):
+                data[key] = np.array(data[key], dtype=float)
+                migrated = True
+        for key in RESULT_DICT_KEYS:
+            results = data.get(key)
+            if isinstance(results, dict):
+                for sub_key, value in results.items():
+                    if isinstance(value, list):
+                        results[sub_key] = np.array(value, dtype=float)
+                        migrated = True
+        return migrated
+        
+    @staticmethod
+    def _resolve_series_files(project_path, data, mmap_mode=None):
+        """
+        将project_data.json中指向列文件的标记替换为数组（原地修改）
+        """
+        def resolve(value, mode=mmap_mode):
+            if isinstance(value, dict) and SERIES_FILE_KEY in value:
+                return np.load(os.path.join(project_path, value[SERIES_FILE_KEY]), mmap_mode=mode)
+            return value
+        
+        for key, value in data.items():
+            if isinstance(value, dict) and SERIES_FILE_KEY not in value:
+                mode = (mmap_mode or 'c') if key == 'calculation_results' else mmap_mode
+                for sub_key, sub_value in value.items():
+                    value[sub_key] = resolve(sub_value, mode)
+            data[key] = resolve(value)
+        return data
+
+    def save_scenario_results(self, project_id, sweep):
+        """
+        将场景扫描指标表保存到项目目录下的scenario_results.csv
+        每行一个场景，依次为场景编号、各场景参数和各项指标
+        :param sweep: run_scenario_sweep的返回值
+        """
+        project_path = os.path.join(self.projects_dir, project_id)
+        parameters = list(dict.fromkeys(key for override in sweep['overrides'] for key in override))
+        kpis = sweep['kpis']
+        try:
+            with open(os.path.join(project_path, "scenario_results.csv"), 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['scenario'] + parameters + list(kpis))
+                for i, override in enumerate(sweep['overrides']):
+                    writer.writerow([i] + [override.get(key, '') for key in parameters] +
+                                    [repr(float(values[i])) for values in kpis.values()])
+            return True
+        except Exception as e:
+            print(f"保存场景扫描结果失败: {e}")
+            return False
+
+    def multi_year_dir(self, project_id):
+        """
+        项目的多年滚动计算结果目录（各年逐时段结果和年度指标表），
+        用作run_multi_year_balance的output_dir
+        """
+        return os.path.join(self.projects_dir, project_id, "multi_year")
+
+    def load_scenario_results(self, project_id):
+        """
+        读取项目的场景扫描指标表，不存在时返回None
+        :return: {'overrides': 场景参数列表, 'kpis': {指标: 数组}}
+        """
+        results_file = os.path.join(self.projects_dir, project_id, "scenario_results.csv")
+        if not os.path.exists(results_file):
+            return None
+        try:
+            with open(results_file, 'r', encoding='utf-8-sig') as f:
+                rows = list(csv.reader(f))
+            header = rows[0]
+            kpi_names = [name for name in header[1:] if name in BALANCE_KPI_NAMES]
+            parameters = [name for name in header[1:] if name not in BALANCE_KPI_NAMES]
+            columns = {name: [row[i] for row in rows[1:]] for i, name in enumerate(header)}
+            overrides = [{name: float(columns[name][i]) for name in parameters if columns[name][i] != ''}
+                         for i in range(len(rows) - 1)]
+            kpis = {name: np.array(columns[name], dtype=float) for name in kpi_names}
+            return {'overrides': overrides, 'kpis': kpis}
+        except Exception as e:
+            print(f"读取场景扫描结果失败: {e}")
+            return None
+
+class EnergyDataModel:
+    # 逐小时输入序列的属性名
+    HOURLY_SERIES = ('electric_load_hourly', 'heat_load_hourly', 'solar_irradiance_hourly',
+                     'wind_speed_hourly', 'grid_purchase_price_hourly')
+    
+    # 保存时的数据分区：各分区单独判断是否修改，只重写修改过的分区
+    SAVE_SECTIONS = {
+        'series': HOURLY_SERIES + ('time_step_minutes', 'data_imported'),
+        'models': ('wind_turbine_models', 'pv_models', 'chp_electric_params'),
+        'schedules': ('maintenance_schedules', 'commissioning_schedules', 'output_limit_schedules'),
+        'parameters': ('internal_electric_rate', 'peak_power_min_summer', 'peak_power_min_winter', 'peak_power_max',
+                       'max_electric_load', 'flexible_load_max', 'flexible_load_min', 'optimization_params'),
+        'results': ('calculation_results',),
+        'optimized_results': ('optimized_results',),
+    }
+
+    def __init__(self):
+        # 时间步长（分钟），时序数据每年共 8760 * 60 / 时间步长 个时段
+        self.time_step_minutes = 60
+        
+        # 时序数据存储 (8760小时，float64数组)
+        self.electric_load_hourly = np.zeros(HOURS_PER_YEAR)  # 电力负荷
+        self.heat_load_hourly = np.zeros(HOURS_PER_YEAR)      # 热力负荷
+        self.internal_electric_rate = 0.0                     # 厂用电率
+        self.solar_irradiance_hourly = np.zeros(HOURS_PER_YEAR)  # 光照强度
+        self.wind_speed_hourly = np.zeros(HOURS_PER_YEAR)     # 风速
+        self.grid_purchase_price_hourly = np.zeros(HOURS_PER_YEAR)  # 下网电价
+        
+        # 数据导入状态跟踪
+        self.data_imported = {
+            'electric': False,
+            'heat': False,
+            'solar': False,
+            'wind': False,
+            'grid_price': False
+        }
+        
+        # 风机型号列表，每个元素是一个字典，包含型号名称、参数、数量和计算方法
+        self.wind_turbine_models = [
+            {
+                'name': '默认型号',
+                'params': {
+                    'cut_in_wind': 3.0,
+                    'rated_wind': 12.0,
+                    'max_rated_wind': 18.0,
+                    'cut_out_wind': 25.0,
+                    'rated_power': 2000.0
+                },
+                'count': 10,
+                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
+            }
+        ]
+        
+        # 光伏型号列表，每个元素是一个字典，包含型号名称、参数、数量和计算方法
+        self.pv_models = [
+            {
+                'name': '默认型号',
+                'method': 'area_efficiency',  # 计算方法：area_efficiency(面积效率法) 或 installed_capacity(装机容量法)
+                'params': {
+                    'panel_efficiency': 0.2,
+                    'panel_area': 1000.0
+                },
+                'count': 10,  # 光伏板数量
+                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
+            }
+        ]
+        
+        self.chp_electric_params = {
+            'electric_heat_ratio': 0.5,
+            'base_electric': 100.0
+        }
+        
+        # 新增调峰机组最小出力参数
+        self.peak_power_min_summer = 0.0  # 夏季最小出力
+        self.peak_power_min_winter = 0.0  # 冬季最小出力
+        self.peak_power_max = 2000.0
+        
+        # 最大电力负荷参数
+        self.max_electric_load = 5000.0
+        
+        # 灵活负荷参数
+        self.flexible_load_max = 0.0  # 最大灵活负荷
+        self.flexible_load_min = 0.0  # 最小灵活负荷
+        
+        # 检修和投产计划数据
+        self.maintenance_schedules = []  # 检修计划列表
+        self.commissioning_schedules = []  # 投产计划列表
+        
+        # 出力限制计划数据
+        self.output_limit_schedules = []  # 出力限制计划列表
+        
+        # 优化参数
+        self.optimization_params = {
+            'basic_load_revenue': 1.0,      # 基础负荷单位收益 (元/kWh)
+            'flexible_load_revenue': 0.8,   # 灵活负荷单位收益 (元/kWh)
+            'thermal_cost': 0.2,            # 火电发电单位成本 (元/kWh)
+            'pv_cost': 0.05,               # 光伏发电单位成本 (元/kWh)
+            'wind_cost': 0.05,             # 风机发电单位成本 (元/kWh)
+            'method': 'grid',              # 优化方法，见OPTIMIZATION_METHODS
+            # 跨时段约束（仅全年线性规划使用，0表示不限制）
+            'daily_flexible_energy_max': 0.0,  # 每日灵活负荷电量上限 (kWh)
+            'daily_flexible_energy_min': 0.0,  # 每日灵活负荷电量下限 (kWh)
+            'flexible_ramp_limit': 0.0,        # 灵活负荷爬坡限制 (kW/h)
+            'peak_ramp_limit': 0.0             # 调峰机组爬坡限制 (kW/h)
+        }
+        
+        # 局部修改跟踪：自上次计算以来待重算的小时区间 [起始小时, 结束小时)，
+        # 以及上次计算（或上次记录的局部修改）之后的输入哈希
+        self.dirty_range = None
+        self.tracked_hash = None
+        
+        # 年度平衡计算结果，及算得该结果的输入哈希（见model_inputs_hash）
+        self.calculation_results = None
+        self.calculation_inputs_hash = None
+        
+        # 上次保存（或加载）时各数据分区的内容哈希，None表示尚未保存
+        self.saved_section_hashes = None
+        
+    @property
+    def steps_per_hour(self):
+        """每小时的时段数"""
+        return 60 // self.time_step_minutes
+        
+    @property
+    def step_hours(self):
+        """每个时段的小时数，功率乘以该值得到时段电量"""
+        return self.time_step_minutes / 60.0
+        
+    @property
+    def steps_per_year(self):
+        """每年的时段数"""
+        return HOURS_PER_YEAR * self.steps_per_hour
+        
+    def set_time_step(self, minutes):
+        """
+        修改时间步长，并将已有的时序数据重采样到新步长：
+        步长变小时每个时段的值重复填充，步长变大时取各时段的平均值
+        """
+        minutes = int(minutes)
+        if minutes not in TIME_STEP_OPTIONS:
+            raise ValueError(f"不支持的时间步长: {minutes}分钟，可选 {TIME_STEP_OPTIONS}")
+        if minutes == self.time_step_minutes:
+            return
+        old_steps_per_hour = self.steps_per_hour
+        self.time_step_minutes = minutes
+        new_steps_per_hour = self.steps_per_hour
+        for name in self.HOURLY_SERIES:
+            values = getattr(self, name)
+            if new_steps_per_hour > old_steps_per_hour:
+                values = np.repeat(values, new_steps_per_hour // old_steps_per_hour)
+            else:
+                group = old_steps_per_hour // new_steps_per_hour
+                values = values[:len(values) // group * group].reshape(-1, group).mean(axis=1)
+            setattr(self, name, values)
+        # 时段划分改变后原有的局部修改区间和计算结果失效
+        self.dirty_range = None
+        self.tracked_hash = None
+        self.set_calculation_results(None)
+        
+    def clear_hourly_series(self):
+        """将所有时序数据清零（按当前时间步长的时段数）"""
+        for name in self.HOURLY_SERIES:
+            setattr(self, name, np.zeros(self.steps_per_year))
+        
+    def set_calculation_results(self, results, inputs_hash=None):
+        """
+        记录年度平衡计算结果，随项目一起保存
+        :param inputs_hash: 算得该结果的输入哈希，默认为当前输入的哈希
+        """
+        self.calculation_results = results
+        self.calculation_inputs_hash = (inputs_hash or model_inputs_hash(self)) if results else None
+        
+    def calculation_results_stale(self):
+        """
+        已记录的计算结果是否已过期（输入在计算之后被修改过，或结果来自未记录输入哈希的旧版本）
+        """
+        if not self.calculation_results:
+            return False
+        return self.calculation_inputs_hash != model_inputs_hash(self)
+        
+    def mark_calculated(self, inputs_hash=None):
+        """
+        记录当前输入已完成计算，清除待重算区间
+        :param inputs_hash: 参与计算的输入哈希，默认为当前输入的哈希
+        """
+        self.tracked_hash = inputs_hash or model_inputs_hash(self)
+        self.dirty_range = None
+        
+    def mark_dirty(self, hour_range, before_hash):
+        """
+        记录一次局部修改影响的小时区间，与已记录的区间合并
+        :param hour_range: (起始小时, 结束小时)，修改不影响任何小时时为None
+        :param before_hash: 修改前的输入哈希；与已记录的哈希不一致说明其间有未记录的修改，
+                            此时放弃局部重算，下次计算整年重算
+        """
+        if self.tracked_hash is None or before_hash != self.tracked_hash:
+            self.tracked_hash = None
+            self.dirty_range = None
+            return
+        if hour_range is not None:
+            if self.dirty_range is not None:
+                hour_range = (min(hour_range[0], self.dirty_range[0]), max(hour_range[1], self.dirty_range[1]))
+            self.dirty_range = hour_range
+        self.tracked_hash = model_inputs_hash(self)
+        
+    def incremental_range(self):
+        """
+        自上次计算以来的修改全部为已记录的局部修改时，返回需要重算的小时区间；否则返回None
+        """
+        if self.tracked_hash is None or self.dirty_range is None:
+            return None
+        if model_inputs_hash(self) != self.tracked_hash:
+            return None
+        return self.dirty_range
+        
+    @classmethod
+    def section_hashes(cls, data):
+        """
+        计算待保存数据各分区的内容哈希
+        :param data: to_dict的返回值（可另含计算结果和优化结果）
+        :return: {分区名: 十六进制哈希}
+        """
+        def update(digest, value):
+            if isinstance(value, np.ndarray):
+                digest.update(f"{value.dtype.str}{value.shape}".encode())
+                digest.update(np.ascontiguousarray(value).tobytes())
+            elif isinstance(value, dict):
+                for key in sorted(value):
+                    digest.update(str(key).encode())
+                    update(digest, value[key])
+            else:
+                digest.update(json.dumps(value, sort_keys=True, ensure_ascii=False, default=json_default).encode('utf-8'))
+        
+        hashes = {}
+        for section, keys in cls.SAVE_SECTIONS.items():
+            digest = hashlib.sha256()
+            for key in keys:
+                digest.update(key.encode())
+                update(digest, data.get(key))
+            hashes[section] = digest.hexdigest()
+        return hashes
+        
+    def dirty_sections(self, hashes):
+        """
+        与上次保存相比内容有变化的分区
+        :param hashes: section_hashes的返回值
+        :return: 分区名集合，尚未保存过时为全部分区
+        """
+        if self.saved_section_hashes is None:
+            return set(hashes)
+        return {section for section, value in hashes.items() if self.saved_section_hashes.get(section) != value}
+        
+    def mark_saved(self, hashes):
+        """
+        记录各分区已保存的内容哈希
+        """
+        self.saved_section_hashes = dict(hashes)
+        
+    def calculate_wind_total_capacity(self):
+        """
+        计算风机总装机容量
+        风机总装机容量 = 每个型号的装机容量相加得到
+        其中每个型号的装机容量 = 额定功率 乘以 风机数量
+        """
+        total_capacity = 0.0
+        for model in self.wind_turbine_models:
+            if model.get('power_curve'):
+                # 采用厂家功率曲线的型号以曲线最大出力作为额定功率
+                rated_power = TabulatedPowerCurve.get(model).rated_power
+            else:
+                rated_power = model['params'].get('rated_power', 0.0)
+            count = model.get('count', 0)
+            total_capacity += rated_power * count
+        return total_capacity
+        
+    def calculate_pv_total_capacity(self):
+        """
+        计算光伏总装机容量
+        光伏总装机容量 = 每个型号的装机容量相加得到
+        其中面积效率法型号的装机容量 = 光伏板面积 * 光伏板效率 * 光伏板数量
+        其中装机容量法型号的装机容量 = 装机容量 * 光伏板数量
+        """
+        total_capacity = 0.0
+        for model in self.pv_models:
+            method = model.get('method', 'area_efficiency')
+            count = model.get('count', 0)
+            
+            if method == 'area_efficiency':
+                # 面积效率法
+                panel_area = model['params'].get('panel_area', 0.0)
+                panel_efficiency = model['params'].get('panel_efficiency', 0.0)
+                capacity = panel_area * panel_efficiency * count
+            elif method == 'installed_capacity':
+                # 装机容量法
+                installed_capacity = model['params'].get('installed_capacity', 0.0)
+                capacity = installed_capacity * count
+            else:
+                # 默认使用面积效率法
+                panel_area = model['params'].get('panel_area', 0.0)
+                panel_efficiency = model['params'].get('panel_efficiency', 0.0)
+                capacity = panel_area * panel_efficiency * count
+                
+            total_capacity += capacity
+        return total_capacity
+        
+
+    def to_dict(self):
+        """将数据模型转换为字典，用于保存（数组在写入JSON时再转换为列表）"""
+        data = {
+            'time_step_minutes': self.time_step_minutes,
+            'electric_load_hourly': self.electric_load_hourly,
+            'heat_load_hourly': self.heat_load_hourly,
+            'internal_electric_rate': self.internal_electric_rate,
+            'solar_irradiance_hourly': self.solar_irradiance_hourly,
+            'wind_speed_hourly': self.wind_speed_hourly,
+            'grid_purchase_price_hourly': self.grid_purchase_price_hourly,  # 下网电价
+            'data_imported': self.data_imported,
+            'wind_turbine_models': self.wind_turbine_models,
+            'pv_models': self.pv_models,
+            'chp_electric_params': self.chp_electric_params,
+            'peak_power_min_summer': self.peak_power_min_summer,
+            'peak_power_min_winter': self.peak_power_min_winter,
+            'peak_power_max': self.peak_power_max,
+            'max_electric_load': self.max_electric_load,
+            'flexible_load_max': self.flexible_load_max,
+            'flexible_load_min': self.flexible_load_min,
+            'maintenance_schedules': self.maintenance_schedules,
+            'commissioning_schedules': self.commissioning_schedules,
+            'output_limit_schedules': self.output_limit_schedules,
+            'optimization_params': self.optimization_params,
+            'optimized_results': getattr(self, 'optimized_results', None)
+        }
+        # 计算结果连同输入哈希一起保存，重新打开项目时无需重算
+        if self.calculation_results:
+            data['calculation_results'] = dict(self.calculation_results, inputs_hash=self.calculation_inputs_hash)
+        return data
+        
+    def from_dict(self, data):
+        """从字典加载数据模型"""
+        # 旧项目没有保存时间步长，均为逐小时数据
+        self.time_step_minutes = int(data.get('time_step_minutes', 60))
+        steps = self.steps_per_year
+        self.electric_load_hourly = to_hourly_array(data.get('electric_load_hourly'), steps)
+        self.heat_load_hourly = to_hourly_array(data.get('heat_load_hourly'), steps)
+        self.internal_electric_rate = data.get('internal_electric_rate', 0.0)
+        self.solar_irradiance_hourly = to_hourly_array(data.get('solar_irradiance_hourly'), steps)
+        self.wind_speed_hourly = to_hourly_array(data.get('wind_speed_hourly'), steps)
+        self.grid_purchase_price_hourly = to_hourly_array(data.get('grid_purchase_price_hourly'), steps)  # 下网电价
+        self.data_imported = data.get('data_imported', {
+            'electric': False,
+            'heat': False,
+            'solar': False,
+            'wind': False,
+            'grid_price': False
+        })
+        self.wind_turbine_models = data.get('wind_turbine_models', [
+            {
+                'name': '默认型号',
+                'params': {
+                    'cut_in_wind': 3.0,
+                    'rated_wind': 12.0,
+                    'max_rated_wind': 18.0,
+                    'cut_out_wind': 25.0,
+                    'rated_power': 2000.0
+                },
+                'count': 10,
+                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
+            }
+        ])
+        self.pv_models = data.get('pv_models', [
+            {
+                'name': '默认型号',
+                'method': 'area_efficiency',
+                'params': {
+                    'panel_efficiency': 0.2,
+                    'panel_area': 1000.0
+                },
+                'count': 10,
+                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
+            }
+        ])
+        self.chp_electric_params = data.get('chp_electric_params', {
+            'electric_heat_ratio': 0.5,
+            'base_electric': 100.0
+        })
+        self.peak_power_min_summer = data.get('peak_power_min_summer', 0.0)  # 夏季最小出力
+        self.peak_power_min_winter = data.get('peak_power_min_winter', 0.0)  # 冬季最小出力
+        self.peak_power_max = data.get('peak_power_max', 2000.0)
+        self.max_electric_load = data.get('max_electric_load', 5000.0)
+        self.flexible_load_max = data.get('flexible_load_max', 0.0)  # 最大灵活负荷
+        self.flexible_load_min = data.get('flexible_load_min', 0.0)  # 最小灵活负荷
+        
+        # 加载检修和投产计划数据
+        self.maintenance_schedules = data.get('maintenance_schedules', [])
+        self.commissioning_schedules = data.get('commissioning_schedules', [])
+        
+        # 加载出力限制计划数据
+        self.output_limit_schedules = data.get('output_limit_schedules', [])
+        
+        # 加载优化参数
+        self.optimization_params = data.get('optimization_params', {
+            'basic_load_revenue': 1.0,
+            'flexible_load_revenue': 0.8,
+            'thermal_cost': 0.2,
+            'pv_cost': 0.05,
+            'wind_cost': 0.05,
+            'method': 'grid'
+        })
+        
+        # 重新加载数据后不再沿用之前的局部修改记录
+        self.dirty_range = None
+        self.tracked_hash = None
+        
+        # 加载优化结果（如果有）
+        if 'optimized_results' in data and data['optimized_results'] is not None:
+            self.optimized_results = results_to_arrays(data['optimized_results'])
+        
+        # 加载计算结果（如果有）：列文件中的数组（可能是内存映射和float32）原样使用，不复制；
+        # 结果与当前输入一致时可在其基础上局部重算
+        calculation_results = data.get('calculation_results') or None
+        inputs_hash = None
+        if calculation_results:
+            calculation_results = dict(calculation_results)
+            inputs_hash = calculation_results.pop('inputs_hash', None)
+            calculation_results = {key: np.asarray(value) if isinstance(value, (list, tuple, np.ndarray)) else value
+                                   for key, value in calculation_results.items()}
+        self.calculation_results = calculation_results
+        self.calculation_inputs_hash = inputs_hash
+        if calculation_results and inputs_hash == model_inputs_hash(self):
+            self.mark_calculated(inputs_hash)
+        
+        # 加载的数据即项目文件中已保存的内容，之后只重写修改过的分区；
+        # 项目文件中保存了各分区哈希时直接使用，不读取（内存映射的）结果数组重新计算
+        stored_hashes = data.get(SECTION_HASHES_KEY)
+        if isinstance(stored_hashes, dict) and set(stored_hashes) == set(self.SAVE_SECTIONS):
+            self.mark_saved(stored_hashes)
+        else:
+            self.mark_saved(self.section_hashes(self.to_dict()))
+        return calculation_results
+
+# 风机出力与风速函数关系
+def wind_power_function(wind_speed, params, correction_factor=1.0):
+    """
+    风机出力计算函数（修改版）
+    1) 在切入风速和设计风速之间采用2次曲线拟合，并在接近设计风速时平滑过渡
+    2) 增加一个最大额定风速，在额定风速和最大额定风速之间为额定功率，
+       在最大额定风速和切出风速之间使用线性函数
+    3) 应用出力修正系数
+    """
+    cut_in_wind = params.get('cut_in_wind', 3.0)           # 切入风速
+    rated_wind = params.get('rated_wind', 12.0)             # 额定风速
+    max_rated_wind = params.get('max_rated_wind', 18.0)     # 最大额定风速
+    cut_out_wind = params.get('cut_out_wind', 25.0)         # 切出风速
+    rated_power = params.get('rated_power', 2000.0)         # 额定功率
+    
+    # 风速低于切入风速或高于切出风速时，出力为0
+    if wind_speed < cut_in_wind or wind_speed > cut_out_wind:
+        return 0.0
+    
+    # 在切入风速和额定风速之间，采用二次曲线拟合
+    elif wind_speed < rated_wind:
+        # 二次曲线拟合，确保在额定风速处平滑过渡
+        # 使用抛物线方程: P = a * (v - v_in)^2
+        # 约束条件: 在额定风速处达到额定功率
+        a = rated_power / ((rated_wind - cut_in_wind) ** 2)
+        return a * (wind_speed - cut_in_wind) ** 2 * correction_factor
+    
+    # 在额定风速和最大额定风速之间，保持额定功率
+    elif wind_speed < max_rated_wind:
+        return rated_power * correction_factor
+    
+    # 在最大额定风速和切出风速之间，使用线性递减函数
+    else:
+        # 线性递减从额定功率到0
+        slope = rated_power / (cut_out_wind - max_rated_wind)
+        return (rated_power - slope * (wind_speed - max_rated_wind)) * correction_factor
+
+def total_wind_power_function(wind_speed, turbine_models):
+    """
+    计算所有风机型号的总出力
+    :param wind_speed: 风速
+    :param turbine_models: 风机型号列表，每个元素包含参数和数量
+    :return: 总出力
+    """
+    total_power = 0.0
+    for model in turbine_models:
+        # 计算单台风机出力，应用修正系数
+        if model.get('power_curve'):
+            single_power = float(TabulatedPowerCurve.get(model)(wind_speed)) * model.get('output_correction_factor', 1.0)
+        else:
+            single_power = wind_power_function(wind_speed, model['params'], model.get('output_correction_factor', 1.0))
+        # 乘以该型号风机数量
+        total_power += single_power * model['count']
+    return total_power
+
+def wind_power_array(wind_speeds, params, correction_factor=1.0):
+    """
+    风机出力计算函数（数组版），与wind_power_function逐点结果一致
+    :param wind_speeds: 风速数组
+    :param params: 风机参数
+    :param correction_factor: 出力修正系数
+    :return: 单台风机出力数组
+    """
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    cut_in_wind = params.get('cut_in_wind', 3.0)
+    rated_wind = params.get('rated_wind', 12.0)
+    max_rated_wind = params.get('max_rated_wind', 18.0)
+    cut_out_wind = params.get('cut_out_wind', 25.0)
+    rated_power = params.get('rated_power', 2000.0)
+
+    power = np.zeros_like(wind_speeds)
+    # 各分段掩码，与标量函数的判断顺序相同
+    stopped = (wind_speeds < cut_in_wind) | (wind_speeds > cut_out_wind)
+    rising = ~stopped & (wind_speeds < rated_wind)
+    rated = ~stopped & ~rising & (wind_speeds < max_rated_wind)
+    falling = ~stopped & ~rising & ~rated
+
+    if rising.any():
+        a = rated_power / ((rated_wind - cut_in_wind) ** 2)
+        power[rising] = a * (wind_speeds[rising] - cut_in_wind) ** 2 * correction_factor
+    power[rated] = rated_power * correction_factor
+    if falling.any():
+        slope = rated_power / (cut_out_wind - max_rated_wind)
+        power[falling] = (rated_power - slope * (wind_speeds[falling] - max_rated_wind)) * correction_factor
+    return power
+
+def _wind_param_column(turbine_models, key, default):
+    """
+    将各风机型号的某一参数整理为 (型号数, 1) 的列向量，便于与风速序列广播
+    """
+    return np.array([[model['params'].get(key, default)] for model in turbine_models], dtype=float)
+
+def wind_power_matrix(wind_speeds, turbine_models):
+    """
+    一次计算所有风机型号的单台出力（已应用修正系数）
+    :param wind_speeds: 风速数组，形状 (N,)
+    :param turbine_models: 风机型号列表，长度 M
+    :return: 单台风机出力矩阵，形状 (M, N)
+    """
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    cut_in_wind = _wind_param_column(turbine_models, 'cut_in_wind', 3.0)
+    rated_wind = _wind_param_column(turbine_models, 'rated_wind', 12.0)
+    max_rated_wind = _wind_param_column(turbine_models, 'max_rated_wind', 18.0)
+    cut_out_wind = _wind_param_column(turbine_models, 'cut_out_wind', 25.0)
+    rated_power = _wind_param_column(turbine_models, 'rated_power', 2000.0)
+    correction_factor = np.array([[model.get('output_correction_factor', 1.0)] for model in turbine_models], dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = rated_power / ((rated_wind - cut_in_wind) ** 2)
+        slope = rated_power / (cut_out_wind - max_rated_wind)
+        power = np.select(
+            [(wind_speeds < cut_in_wind) | (wind_speeds > cut_out_wind),
+             wind_speeds < rated_wind,
+             wind_speeds < max_rated_wind],
+            [0.0,
+             a * (wind_speeds - cut_in_wind) ** 2 * correction_factor,
+             rated_power * correction_factor],
+            (rated_power - slope * (wind_speeds - max_rated_wind)) * correction_factor)
+
+    # 采用厂家功率曲线的型号改用查表插值结果
+    for i, model in enumerate(turbine_models):
+        if model.get('power_curve'):
+            power[i] = TabulatedPowerCurve.get(model)(wind_speeds) * correction_factor[i, 0]
+    return power
+
+# 型号数量达到该值时，总出力改用聚合曲线插值计算
+FLEET_CURVE_MIN_MODELS = 8
+
+def total_wind_power_array(wind_speeds, turbine_models):
+    """
+    计算所有风机型号的总出力（数组版）
+    型号较多时使用预先采样的风电场聚合曲线插值，每小时计算量与型号数量无关
+    :param wind_speeds: 风速数组
+    :param turbine_models: 风机型号列表
+    :return: 总出力数组
+    """
+    if not turbine_models:
+        return np.zeros(np.shape(wind_speeds))
+    if len(turbine_models) >= FLEET_CURVE_MIN_MODELS:
+        return WindFleetCurve.get(turbine_models)(wind_speeds)
+    counts = np.array([[model['count']] for model in turbine_models], dtype=float)
+    return (wind_power_matrix(wind_speeds, turbine_models) * counts).sum(axis=0)
+
+class WindFleetCurve:
+    """
+    风电场聚合功率曲线
+    在细分风速网格（含各型号的切入、额定、最大额定和切出风速）上预先计算全部型号的总出力，
+    之后对任意风速序列只需一次np.interp
+    """
+    _cache = {}
+    _cache_size = 16
+
+    def __init__(self, turbine_models, resolution=0.005):
+        """
+        :param turbine_models: 风机型号列表
+        :param resolution: 风速采样间隔 (m/s)
+        """
+        cut_out = [model['params'].get('cut_out_wind', 25.0) for model in turbine_models]
+        breakpoints = []
+        for model in turbine_models:
+            if model.get('power_curve'):
+                # 功率曲线为分段线性，取表格风速点即可精确还原，末点之后出力为0
+                table = TabulatedPowerCurve.get(model)
+                breakpoints.extend(table.wind_speeds)
+                breakpoints.append(np.nextafter(table.wind_speeds[-1], np.inf))
+                cut_out.append(table.wind_speeds[-1])
+            params = model['params']
+            for key, default in (('cut_in_wind', 3.0), ('rated_wind', 12.0),
+                                 ('max_rated_wind', 18.0), ('cut_out_wind', 25.0)):
+                value = params.get(key, default)
+                # 断点两侧各取一点，保证切出等不连续处的插值精度
+                breakpoints.extend([value, np.nextafter(value, np.inf)])
+        max_speed = max(cut_out, default=25.0) + 1.0
+        self.wind_speeds = np.unique(np.concatenate([np.arange(0.0, max_speed + resolution, resolution), breakpoints]))
+        counts = np.array([[model['count']] for model in turbine_models], dtype=float)
+        self.total_power = (wind_power_matrix(self.wind_speeds, turbine_models) * counts).sum(axis=0)
+
+    @classmethod
+    def get(cls, turbine_models):
+        """
+        获取缓存的聚合曲线，型号参数、数量或修正系数变化时重新构建
+        """
+        key = json.dumps(turbine_models, sort_keys=True, ensure_ascii=False, default=json_default)
+        curve = cls._cache.pop(key, None)
+        if curve is None:
+            curve = cls(turbine_models)
+            if len(cls._cache) >= cls._cache_size:
+                cls._cache.pop(next(iter(cls._cache)))
+        cls._cache[key] = curve
+        return curve
+
+    def __call__(self, wind_speeds):
+        """
+        计算风速序列对应的总出力
+        """
+        return np.interp(wind_speeds, self.wind_speeds, self.total_power, left=0.0, right=0.0)
+
+# 标准空气密度 (kg/m³)
+STANDARD_AIR_DENSITY = 1.225
+
+class TabulatedPowerCurve:
+    """
+    厂家功率曲线（风速-出力对照表）
+    型号中的power_curve格式为
+        {'wind_speeds': [...], 'powers': [...]}
+    或带空气密度分档的
+        {'wind_speeds': [...], 'densities': [...], 'powers': [[...], ...]}
+    后者按型号的air_density在相邻两档之间线性插值，超出范围时取最近一档。
+    表格首点之前和末点之后出力为0，出力修正系数和数量在表外应用
+    """
+    _cache = {}
+    _cache_size = 64
+
+    def __init__(self, power_curve, air_density=STANDARD_AIR_DENSITY):
+        """
+        :param power_curve: 功率曲线字典
+        :param air_density: 场址空气密度 (kg/m³)
+        """
+        wind_speeds = np.asarray(power_curve['wind_speeds'], dtype=float)
+        powers = np.asarray(power_curve['powers'], dtype=float)
+        densities = power_curve.get('densities')
+        if densities:
+            densities = np.asarray(densities, dtype=float)
+            order = np.argsort(densities)
+            densities, powers = densities[order], powers[order]
+            if powers.shape != (len(densities), len(wind_speeds)):
+                raise ValueError("功率曲线各密度档的数据点数必须与风速点数一致")
+            # 对每个风速点在密度方向线性插值
+            upper = int(np.clip(np.searchsorted(densities, air_density), 1, len(densities) - 1)) if len(densities) > 1 else 0
+            lower = max(upper - 1, 0)
+            if upper == lower:
+                powers = powers[0]
+            else:
+                weight = np.clip((air_density - densities[lower]) / (densities[upper] - densities[lower]), 0.0, 1.0)
+                powers = powers[lower] + (powers[upper] - powers[lower]) * weight
+        elif powers.shape != wind_speeds.shape:
+            raise ValueError("功率曲线的出力点数必须与风速点数一致")
+
+        order = np.argsort(wind_speeds, kind='stable')
+        self.wind_speeds = wind_speeds[order]
+        self.powers = np.maximum(powers[order], 0.0)
+        self.rated_power = float(self.powers.max(initial=0.0))
+
+    @classmethod
+    def get(cls, model):
+        """
+        获取型号对应的缓存功率曲线，曲线数据或空气密度变化时重新构建
+        """
+        power_curve = model['power_curve']
+        air_density = model.get('air_density', STANDARD_AIR_DENSITY)
+        key = json.dumps([power_curve, air_density], sort_keys=True, default=json_default)
+        curve = cls._cache.pop(key, None)
+        if curve is None:
+            curve = cls(power_curve, air_density)
+            if len(cls._cache) >= cls._cache_size:
+                cls._cache.pop(next(iter(cls._cache)))
+        cls._cache[key] = curve
+        return curve
+
+    @staticmethod
+    def from_csv(file_path):
+        """
+        从CSV读取功率曲线
+        第一列为风速 (m/s)，其后为出力 (kW)；有多列出力时表头为对应的空气密度
+        """
+        with open(file_path, 'r', encoding='utf-8-sig') as f:
+            rows = [row for row in csv.reader(f) if row and any(cell.strip() for cell in row)]
+        if not rows:
+            raise ValueError("功率曲线文件为空")
+
+        header = None
+        try:
+            [float(cell) for cell in rows[0][:2]]
+        except ValueError:
+            header, rows = rows[0], rows[1:]
+
+        table = np.array([[float(cell) for cell in row] for row in rows], dtype=float)
+        if table.ndim != 2 or table.shape[1] < 2 or len(table) < 2:
+            raise ValueError("功率曲线至少需要两行数据，每行包含风速和出力")
+
+        power_curve = {'wind_speeds': table[:, 0].tolist()}
+        if table.shape[1] == 2:
+            power_curve['powers'] = table[:, 1].tolist()
+        else:
+            if header is None:
+                raise ValueError("多列出力时表头需注明各列对应的空气密度")
+            power_curve['densities'] = [float(cell) for cell in header[1:table.shape[1]]]
+            power_curve['powers'] = table[:, 1:].T.tolist()
+        return power_curve
+
+    def __call__(self, wind_speeds):
+        """
+        计算风速序列对应的单台风机出力（未应用修正系数）
+        """
+        return np.interp(wind_speeds, self.wind_speeds, self.powers, left=0.0, right=0.0)
+
+# 光伏出力与光照强度函数关系
+def pv_power_function(irradiance, model):
+    """
+    光伏出力计算函数（支持两种计算方法）
+    :param irradiance: 光照强度 (W/m²)
+    :param model: 光伏型号参数
+    :return: 光伏出力 (kW)
+    """
+    method = model.get('method', 'area_efficiency')
+    params = model.get('params', {})
+    correction_factor = model.get('output_correction_factor', 1.0)  # 获取出力修正系数，默认为1
+    
+    if method == 'area_efficiency':
+        # 面积效率法
+        panel_efficiency = params.get('panel_efficiency', 0.2)
+        panel_area = params.get('panel_area', 1000.0)
+        return panel_area * irradiance * panel_efficiency / 1000.0 * correction_factor
+    elif method == 'installed_capacity':
+        # 装机容量法
+        installed_capacity = params.get('installed_capacity', 200.0)  # 装机容量 (kW)
+        system_efficiency = params.get('system_efficiency', 0.9)    # 系统效率
+        return irradiance / 1000.0 * installed_capacity * system_efficiency * correction_factor
+    else:
+        # 默认使用面积效率法
+        panel_efficiency = params.get('panel_efficiency', 0.2)
+        panel_area = params.get('panel_area', 1000.0)
+        return panel_area * irradiance * panel_efficiency / 1000.0 * correction_factor
+
+def total_pv_power_function(irradiance, pv_models):
+    """
+    计算所有光伏型号的总出力
+    :param irradiance: 光照强度 (W/m²)
+    :param pv_models: 光伏型号列表，每个元素包含参数和数量
+    :return: 总出力 (kW)
+    """
+    total_power = 0.0
+    for model in pv_models:
+        # 计算单个光伏型号出力
+        single_power = pv_power_function(irradiance, model)
+        # 乘以该型号光伏板数量
+        total_power += single_power * model.get('count', 1)
+    return total_power
+
+def pv_fleet_coefficient(pv_models):
+    """
+    光伏出力与光照强度成正比，所有型号的总出力系数 (kW per W/m²)
+    :param pv_models: 光伏型号列表
+    :return: 总出力 = 光照强度 * 系数
+    """
+    return float(sum(pv_power_function(1.0, model) * model.get('count', 1) for model in pv_models))
+
+def total_pv_power_array(irradiance, pv_models):
+    """
+    计算所有光伏型号的总出力（数组版）
+    各型号出力均与光照强度成正比，先合并为一个聚合系数，再对整个序列做一次乘法
+    :param irradiance: 光照强度数组 (W/m²)
+    :param pv_models: 光伏型号列表
+    :return: 总出力数组 (kW)
+    """
+    return np.asarray(irradiance, dtype=float) * pv_fleet_coefficient(pv_models)
+
+# 热电联产电出力与供热热负荷函数关系
+def chp_electric_power(heat_load, params):
+    """
+    热电联产电出力计算函数
+    """
+    electric_heat_ratio = params.get('electric_heat_ratio', 0.5)
+    base_electric = params.get('base_electric', 100.0)
+    
+    return base_electric + heat_load * electric_heat_ratio
+
+# 小时序列第0小时对应的年份（计划日期、图表和导出均以此为准）
+DEFAULT_BASE_YEAR = 2024
+
+class CalendarIndex:
+    """
+    时段与日期对照表
+    每个基准年份和时间步长只构建一次，预先计算月份、夏季掩码、年内天数、绘图日期数值和时间戳字符串，
+    闰年按8784小时处理；逐小时时每个时段即一个小时
+    """
+    _cache = {}
+
+    def __init__(self, year=DEFAULT_BASE_YEAR, hours=None, step_minutes=60):
+        """
+        :param year: 基准年份，第0个时段为该年1月1日0时
+        :param hours: 时段数，默认为该年全年的时段数（闰年8784小时）
+        :param step_minutes: 时间步长（分钟）
+        """
+        self.year = year
+        self.base_date = datetime(year, 1, 1)
+        self.step_minutes = step_minutes
+        self.steps_per_hour = 60 // step_minutes
+        self.step_hours = step_minutes / 60.0
+        self.year_hours = (datetime(year + 1, 1, 1) - self.base_date).days * 24
+        self.hours = self.year_hours * self.steps_per_hour if hours is None else hours
+
+        step_index = np.arange(self.hours)
+        self.hour_index = step_index // self.steps_per_hour        # 各时段所在的小时
+        self.datetimes = np.datetime64(self.base_date, 'm') + step_index * step_minutes
+        days = self.datetimes.astype('datetime64[D]')
+        self.day_index = self.hour_index // 24                   # 相对基准日期的天数
+        self.hour_of_day = self.hour_index % 24                  # 小时 (0-23)
+        self.month = self.datetimes.astype('datetime64[M]').astype(int) % 12 + 1  # 月份 (1-12)
+        self.day_of_year = (days - days.astype('datetime64[Y]')).astype(int) + 1  # 年内第几天 (1-366)
+        self.summer_mask = (self.month >= 5) & (self.month <= 9)  # 夏季：5-9月
+
+        self._date_nums = None
+        self._timestamps = None
+
+    @classmethod
+    def get(cls, year=DEFAULT_BASE_YEAR, hours=None, step_minutes=60):
+        """
+        获取缓存的对照表，同一基准年份、时段数和时间步长只构建一次
+        """
+        key = (year, hours, step_minutes)
+        calendar = cls._cache.get(key)
+        if calendar is None:
+            calendar = cls(year, hours, step_minutes)
+            cls._cache[key] = calendar
+        return calendar
+
+    @property
+    def date_nums(self):
+        """
+        matplotlib日期数值，用于绘图横轴
+        """
+        if self._date_nums is None:
+            import matplotlib.dates as mdates
+            self._date_nums = mdates.date2num(self.datetimes)
+        return self._date_nums
+
+    @property
+    def timestamps(self):
+        """
+        格式化时间戳字符串 (YYYY-MM-DD HH:MM)，用于导出
+        """
+        if self._timestamps is None:
+            self._timestamps = np.char.replace(np.datetime_as_string(self.datetimes, unit='m'), 'T', ' ')
+        return self._timestamps
+
+    @property
+    def last_date(self):
+        """
+        最后一个时段所在的日期
+        """
+        return self.base_date + timedelta(days=int(self.day_index[-1])) if self.hours else self.base_date
+
+    def hour_of(self, date):
+        """
+        将日期时间转换为时段索引（可能超出范围）
+        """
+        return int((date - self.base_date).total_seconds() // (self.step_minutes * 60))
+
+    def day_of(self, date):
+        """
+        将日期转换为相对基准日期的天数
+        """
+        return (date - self.base_date).days
+
+    def day_slice(self, start_day, end_day):
+        """
+        将包含起止日期的天数区间转换为时段切片（限制在对照表范围内）
+        """
+        steps_per_day = 24 * self.steps_per_hour
+        start = min(max(start_day * steps_per_day, 0), self.hours)
+        end = min(max((end_day + 1) * steps_per_day, start), self.hours)
+        return slice(start, end)
+
+    def hour_at_date_num(self, date_num):
+        """
+        将matplotlib日期数值转换为时段索引（可能超出范围）
+        """
+        import matplotlib.dates as mdates
+        start = mdates.date2num(np.datetime64(self.base_date, 'm'))
+        return int(np.floor((date_num - start) * 24 * self.steps_per_hour + 1e-6))
+
+# 调峰机组出力所处区间
+PEAK_REGIME_MIN = -1   # 钳位在最小出力
+PEAK_REGIME_FREE = 0   # 跟随待定出力
+PEAK_REGIME_MAX = 1    # 钳位在最大出力
+
+def solve_internal_electric_load(corrected_electric_load, chp_output, pv_output, wind_output,
+                                 peak_power_max, peak_power_min, internal_electric_rate):
+    """
+    直接求解厂用电负荷与总负荷的不动点（分段线性闭式解）
+    总负荷 = 修正后电力负荷 + 厂用电率 * (热定电机组出力 + 调峰机组出力)
+    调峰机组出力 = max(min(总负荷 - 热定电机组出力 - 光伏出力 - 风机出力, 最大出力), 最小出力)
+    由于厂用电率小于1，不动点唯一，按三个区间分别求解后选取自洽的一个
+    :return: 包含总负荷、厂用电负荷、调峰机组待定出力、调峰机组出力、火电出力和区间标记的字典
+    """
+    rate = internal_electric_rate
+    if not 0 <= rate < 1:
+        raise ValueError(f"厂用电率必须在0到1之间，当前为{rate}")
+
+    renewable_output = pv_output + wind_output
+    # 钳位在最大/最小出力时的总负荷
+    total_at_max = corrected_electric_load + rate * (chp_output + peak_power_max)
+    total_at_min = corrected_electric_load + rate * (chp_output + peak_power_min)
+    at_min = (total_at_min - chp_output - renewable_output <= peak_power_min) | (peak_power_max <= peak_power_min)
+    at_max = ~at_min & (total_at_max - chp_output - renewable_output >= peak_power_max)
+
+    # 自由区间：总负荷 = (修正后电力负荷 - 厂用电率 * (光伏出力 + 风机出力)) / (1 - 厂用电率)
+    total_free = (corrected_electric_load - rate * renewable_output) / (1 - rate)
+    peak_output = np.where(at_min, peak_power_min,
+                           np.where(at_max, peak_power_max, total_free - chp_output - renewable_output))
+
+    thermal_output = chp_output + peak_output
+    internal_electric_load = thermal_output * rate
+    total_load = corrected_electric_load + internal_electric_load
+    regime = np.where(at_min, PEAK_REGIME_MIN, np.where(at_max, PEAK_REGIME_MAX, PEAK_REGIME_FREE))
+
+    return {
+        'total_load': total_load,
+        'internal_electric_load': internal_electric_load,
+        'peak_pending_output': total_load - chp_output - pv_output - wind_output,
+        'peak_output': peak_output,
+        'thermal_output': thermal_output,
+        'peak_regime': regime,
+    }
+
+def compute_balance(corrected_electric_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min,
+                    internal_electric_rate, flexible_load_min, flexible_load_max):
+    """
+    由修正后负荷、各类机组出力和调峰机组约束计算电力平衡（步骤6-13）
+    所有参数均可广播，输入 (场景数, 小时数) 数组时同时计算多个场景
+    :return: 逐小时结果字典，键与AnnualBalanceCalculator.calculate_annual_balance的结果一致
+    """
+    # 6)-8) 直接求解厂用电负荷、总负荷与调峰机组出力的不动点
+    solution = solve_internal_electric_load(
+        corrected_electric_load, chp_output, pv_output, wind_output,
+        peak_power_max, peak_power_min, internal_electric_rate)
+    internal_electric_load = solution['internal_electric_load']
+    total_load = solution['total_load']
+    peak_pending_output = solution['peak_pending_output']
+    peak_output = solution['peak_output']
+    thermal_output = solution['thermal_output']
+
+    # 9) 风机光伏放弃出力 = max（当前月份对应的调峰机组最小出力 - 调峰机组待定出力，0）
+    wind_pv_abandon = np.maximum(peak_power_min - peak_pending_output, 0.0)
+
+    # 10) 灵活负荷消纳：放弃出力小于最小灵活负荷时不启动，超过最大灵活负荷时只消纳最大灵活负荷
+    flexible_load_consumption = np.where(
+        wind_pv_abandon >= flexible_load_min,
+        np.minimum(wind_pv_abandon, flexible_load_max),
+        0.0)
+
+    # 11) 新的风机光伏放弃出力 = 原风机光伏放弃出力 - 新增的灵活负荷消纳出力
+    corrected_wind_pv_abandon = np.clip(wind_pv_abandon - flexible_load_consumption, 0.0, None)
+
+    renewable_output = pv_output + wind_output
+    wind_pv_actual = renewable_output - corrected_wind_pv_abandon
+    generation = renewable_output + thermal_output - corrected_wind_pv_abandon
+
+    # 12) 弃光风率，避免除零错误
+    abandon_rate = np.divide(corrected_wind_pv_abandon, renewable_output,
+                             out=np.zeros(np.shape(renewable_output)), where=renewable_output > 0)
+
+    # 13) 下网负荷 = 总负荷 + 新增的灵活负荷消纳出力 - 总出力
+    grid_load = total_load + flexible_load_consumption - generation
+
+    results = {
+        'hourly_internal_electric_load': internal_electric_load,  # 厂用电负荷
+        'hourly_total_load': total_load,                          # 总负荷
+        'hourly_chp_output': chp_output,                          # 热定电机组出力
+        'hourly_pv_output': pv_output,                            # 光伏最大出力
+        'hourly_wind_output': wind_output,                        # 风机最大出力
+        'hourly_peak_pending_output': peak_pending_output,        # 调峰机组待定出力
+        'hourly_peak_output': peak_output,                        # 调峰机组出力
+        'hourly_thermal_output': thermal_output,                  # 火电出力
+        'hourly_generation': generation,                          # 总出力
+        # 风机光伏放弃出力保存修正前的值，导出时再扣除灵活负荷消纳量
+        'hourly_wind_pv_abandon': wind_pv_abandon,
+        'hourly_wind_pv_actual': wind_pv_actual,                  # 风机光伏实际出力
+        'hourly_grid_load': grid_load,                            # 下网负荷
+        'hourly_abandon_rate': abandon_rate,                      # 弃光风率
+        'hourly_corrected_electric_load': corrected_electric_load,  # 修正后电力负荷
+        'hourly_flexible_load_consumption': flexible_load_consumption,  # 灵活负荷消纳量
+        'hourly_peak_regime': solution['peak_regime']              # 调峰机组出力区间（1最大/-1最小/0自由）
+    }
+    return results
+
+class ScheduleTimeline:
+    """
+    计划时间轴
+    将检修计划、投产计划和出力限制计划一次性编译为逐时段数组，
+    计算量与时段数加计划条数成正比，不再逐时段遍历全部计划
+    """
+    def __init__(self, data_model, hours=8760, calendar=None):
+        """
+        :param data_model: 能源数据模型
+        :param hours: 时段数
+        :param calendar: 时段与日期对照表，默认使用基准年份和数据模型时间步长的对照表
+        """
+        self.data_model = data_model
+        self.hours = hours
+        self.calendar = calendar or CalendarIndex.get(DEFAULT_BASE_YEAR, hours,
+                                                      getattr(data_model, 'time_step_minutes', 60))
+        self.base_date = self.calendar.base_date
+        self.hour_index = self.calendar.hour_index[:hours]
+        self.summer_mask = self.calendar.summer_mask[:hours]
+
+        self.compile()
+
+    def _parse_day(self, date_str):
+        """
+        将日期字符串解析为相对基准日期的天数偏移
+        :return: 天数偏移，解析失败时返回None
+        """
+        try:
+            return (datetime.strptime(date_str, "%Y-%m-%d") - self.base_date).days
+        except (ValueError, TypeError):
+            return None
+
+    def _day_slice(self, start_day, end_day):
+        """
+        将包含起止日期的天数区间转换为时段切片
+        """
+        day_slice = self.calendar.day_slice(start_day, end_day)
+        return slice(min(day_slice.start, self.hours), min(day_slice.stop, self.hours))
+
+    def _interpolation_factor(self, hour_slice, start_day, end_day):
+        """
+        计算切片内各时段的线性插值因子：开始日期之前为0，结束日期之后为1，
+        其间为已过去的整天数除以起止日期相隔的天数（起止为同一天时为1）；
+        按时段所在的小时计算，同一小时内的时段因子相同
+        """
+        hour = self.hour_index[hour_slice]
+        if end_day is None:
+            # 结束日期解析失败时，插值因子为0
+            return np.zeros(hour.shape)
+        start_hour = start_day * 24
+        end_hour = end_day * 24
+        total_days = end_day - start_day
+        if total_days == 0:
+            inside = np.ones(hour.shape)
+        else:
+            inside = ((hour - start_hour) // 24) / total_days
+        return np.where(hour < start_hour, 0.0, np.where(hour > end_hour, 1.0, inside))
+
+    def compile(self):
+        """
+        编译所有计划，生成逐小时的修正数组
+        """
+        dm = self.data_model
+        hours = self.hours
+
+        # 调峰机组约束的修正量，与调峰机组参数本身无关，由peak_limits组合出修正后的最大/最小出力
+        self.maintenance_peak_reduction = np.zeros(hours)     # 检修计划减少的最大出力
+        self.maintenance_peak_mask = np.zeros(hours, dtype=bool)  # 最小出力按检修后最大出力比例调整的小时
+        self.commissioning_peak_reduction = np.zeros(hours)   # 投产计划减少的最大出力
+        self.peak_min_override_mask = np.zeros(hours, dtype=bool)  # 最小出力被投产计划改写的小时
+        self.peak_min_override_reduction = np.zeros(hours)    # 改写后最小出力 = 当季最小出力 - 该值
+        # 检修计划和投运计划对用电负荷的减少量
+        self.maintenance_load_reduction = np.zeros(hours)
+        self.commissioning_load_reduction = np.zeros(hours)
+        # 光伏/风机出力上限（无限制计划时为inf）
+        self.pv_limit = np.full(hours, np.inf)
+        self.wind_limit = np.full(hours, np.inf)
+        # 光伏/风机投产修正系数
+        self.pv_factor = np.ones(hours)
+        self.wind_factor = np.ones(hours)
+
+        # 检修计划：仅在起止日期范围内生效，按列表顺序依次作用
+        for schedule in dm.maintenance_schedules:
+            start_day = self._parse_day(schedule.get('start_date', ''))
+            end_day = self._parse_day(schedule.get('end_date', ''))
+            if start_day is None or end_day is None:
+                continue
+            sl = self._day_slice(start_day, end_day)
+            power_type = schedule.get('power_type', '')
+            power_size = schedule.get('power_size', 0.0)
+            if power_type == '调峰机组出力':
+                # 新最大负荷 = 原最大负荷 - 影响负荷出力大小
+                # 新最小负荷 = 原最小负荷 * （新最大负荷/原最大负荷）
+                self.maintenance_peak_reduction[sl] += power_size
+                self.maintenance_peak_mask[sl] = True
+            elif power_type == '用电负荷':
+                self.maintenance_load_reduction[sl] += power_size
+
+        # 投产计划：在开始日期之前以及起止日期范围内生效，期间线性变化
+        pv_impact = np.zeros(hours)
+        wind_impact = np.zeros(hours)
+        has_pv_schedule = np.zeros(hours, dtype=bool)
+        has_wind_schedule = np.zeros(hours, dtype=bool)
+        for schedule in dm.commissioning_schedules:
+            start_day = self._parse_day(schedule.get('start_date', ''))
+            end_day = self._parse_day(schedule.get('end_date', ''))
+            if start_day is None:
+                continue
+            last_hour = start_day * 24 + 1
+            if end_day is not None and end_day >= start_day:
+                last_hour = max(last_hour, (end_day + 1) * 24)
+            sl = slice(0, min(max(last_hour * self.calendar.steps_per_hour, 0), hours))
+            factor = self._interpolation_factor(sl, start_day, end_day)
+            summer = self.summer_mask[sl]
+
+            power_type = schedule.get('power_type', '')
+            power_size = schedule.get('power_size', 0.0)
+            if power_type == '光伏出力':
+                has_pv_schedule[sl] = True
+                pv_impact[sl] += np.where(factor < 1, power_size * (1 - factor), 0.0)
+            elif power_type == '风机出力':
+                has_wind_schedule[sl] = True
+                wind_impact[sl] += np.where(factor < 1, power_size * (1 - factor), 0.0)
+            elif power_type == '调峰机组最大出力':
+                self.commissioning_peak_reduction[sl] += power_size - power_size * factor
+            elif power_type in ('调峰机组夏季最小出力', '调峰机组冬季最小出力', '调峰机组最小出力'):
+                # 夏季/冬季最小出力计划只改写对应季节的小时；
+                # 为了向后兼容，仍然支持原有的调峰机组最小出力设置（不分季节）
+                if power_type == '调峰机组夏季最小出力':
+                    applies = summer
+                elif power_type == '调峰机组冬季最小出力':
+                    applies = ~summer
+                else:
+                    applies = np.ones_like(summer)
+                self.peak_min_override_mask[sl] |= applies
+                self.peak_min_override_reduction[sl] = np.where(applies, power_size * factor,
+                                                                self.peak_min_override_reduction[sl])
+            elif power_type == '用电负荷':
+                self.commissioning_load_reduction[sl] += power_size * (1 - factor)
+
+        # 调峰机组最大/最小出力（修正后）
+        self.peak_power_max, self.peak_power_min = self.peak_limits(
+            dm.peak_power_max, dm.peak_power_min_summer, dm.peak_power_min_winter)
+
+        # 保留投产影响量，装机容量变化时（如批量场景计算）可直接重新计算修正系数
+        self.pv_impact, self.has_pv_schedule = pv_impact, has_pv_schedule
+        self.wind_impact, self.has_wind_schedule = wind_impact, has_wind_schedule
+        self.pv_factor = self.derate_factor(pv_impact, has_pv_schedule, dm.calculate_pv_total_capacity())
+        self.wind_factor = self.derate_factor(wind_impact, has_wind_schedule, dm.calculate_wind_total_capacity())
+
+        # 出力限制计划：多个计划同时生效时取最小限制值
+        for schedule in dm.output_limit_schedules:
+            limit_type = schedule.get('limit_type', '')
+            if limit_type == '光伏最大出力限制':
+                limit = self.pv_limit
+            elif limit_type == '风机最大出力限制':
+                limit = self.wind_limit
+            else:
+                continue
+            start_day = self._parse_day(schedule.get('start_date', ''))
+            end_day = self._parse_day(schedule.get('end_date', ''))
+            if start_day is None or end_day is None:
+                continue
+            sl = self._day_slice(start_day, end_day)
+            np.minimum(limit[sl], schedule.get('power_size', float('inf')), out=limit[sl])
+
+    def peak_limits(self, peak_power_max, peak_power_min_summer, peak_power_min_winter):
+        """
+        由调峰机组参数和已编译的计划修正量得到逐小时最大/最小出力
+        参数可为 (场景数, 1) 数组以同时计算多个场景
+        :return: (最大出力, 最小出力)
+        """
+        peak_power_max = np.asarray(peak_power_max, dtype=float)
+        season_peak_power_min = np.where(self.summer_mask, peak_power_min_summer, peak_power_min_winter)
+
+        # 检修后的最大出力决定最小出力的调整比例，投产计划的减少量在其后扣除
+        maintained_peak_power_max = peak_power_max - self.maintenance_peak_reduction
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peak_power_min = np.where(self.maintenance_peak_mask & (peak_power_max > 0),
+                                      season_peak_power_min * (maintained_peak_power_max / peak_power_max),
+                                      season_peak_power_min)
+        peak_power_min = np.where(self.peak_min_override_mask,
+                                  season_peak_power_min - self.peak_min_override_reduction, peak_power_min)
+        return maintained_peak_power_max - self.commissioning_peak_reduction, peak_power_min
+
+    @staticmethod
+    def derate_factor(impact, has_schedule, total_capacity):
+        """
+        投产修正系数 = (总装机容量 - 未投产容量) / 总装机容量，无投产计划或总装机容量为0时为1
+        :param total_capacity: 总装机容量，可为 (场景数, 1) 数组以同时计算多个场景
+        """
+        total_capacity = np.asarray(total_capacity, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(has_schedule & (total_capacity > 0), (total_capacity - impact) / total_capacity, 1.0)
+
+def schedule_hour_range(schedule, schedule_type, calendar):
+    """
+    计划条目影响的时段区间，与ScheduleTimeline.compile中的生效范围一致
+    :param schedule_type: 'maintenance'（检修）、'commissioning'（投产）或 'output_limit'（出力限制）
+    :return: (起始时段, 结束时段)，条目不影响任何时段时返回None
+    """
+    def parse_day(date_str):
+        try:
+            return (datetime.strptime(date_str, "%Y-%m-%d") - calendar.base_date).days
+        except (ValueError, TypeError):
+            return None
+
+    hours = calendar.hours
+    start_day = parse_day(schedule.get('start_date', ''))
+    end_day = parse_day(schedule.get('end_date', ''))
+    if start_day is None:
+        return None
+    if schedule_type == 'commissioning':
+        # 投产计划从年初开始生效
+        last_hour = start_day * 24 + 1
+        if end_day is not None and end_day >= start_day:
+            last_hour = max(last_hour, (end_day + 1) * 24)
+        start_hour, end_hour = 0, min(max(last_hour * calendar.steps_per_hour, 0), hours)
+    else:
+        if end_day is None:
+            return None
+        day_slice = calendar.day_slice(start_day, end_day)
+        start_hour, end_hour = day_slice.start, day_slice.stop
+    return (start_hour, end_hour) if end_hour > start_hour else None
+
+def schedule_changes_range(old_schedules, new_schedules, schedule_type, calendar):
+    """
+    计划列表修改前后新增、删除或改动的条目影响的小时区间（合并为一个区间）
+    :return: (起始小时, 结束小时)，没有影响任何小时时返回None
+    """
+    changed = [schedule for schedule in old_schedules if schedule not in new_schedules]
+    changed += [schedule for schedule in new_schedules if schedule not in old_schedules]
+    ranges = [hour_range for hour_range in (schedule_hour_range(schedule, schedule_type, calendar)
+                                            for schedule in changed) if hour_range is not None]
+    if not ranges:
+        return None
+    return min(start for start, _ in ranges), max(end for _, end in ranges)
+
+class BalanceStatistics:
+    """
+    年度平衡计算结果的汇总统计（各序列之和及下网、调峰区间的小时数）
+    局部重算后只按重算区间内新旧结果的差值更新，不再遍历整年
+    """
+    # 求和统计的逐小时序列
+    SUM_KEYS = ('hourly_internal_electric_load', 'hourly_total_load', 'hourly_chp_output', 'hourly_pv_output',
+                'hourly_wind_output', 'hourly_peak_pending_output', 'hourly_peak_output', 'hourly_thermal_output',
+                'hourly_generation', 'hourly_wind_pv_abandon', 'hourly_wind_pv_actual', 'hourly_grid_load',
+                'hourly_abandon_rate', 'hourly_corrected_electric_load')
+
+    def __init__(self, results, step_hours=1.0):
+        """
+        :param step_hours: 每个时段的小时数，功率合计乘以该值得到电量
+        """
+        self.hours = len(results['hourly_grid_load'])
+        self.step_hours = step_hours
+        self.totals = self._range_totals(results, slice(None))
+
+    @classmethod
+    def _range_totals(cls, results, hour_slice):
+        """
+        计算结果在给定小时切片内的各项合计
+        """
+        totals = {key: float(np.sum(results[key][hour_slice])) for key in cls.SUM_KEYS if key in results}
+        grid_load = np.asarray(results['hourly_grid_load'][hour_slice])
+        totals['grid_positive_hours'] = int(np.count_nonzero(grid_load > 0))    # 需要下网的小时数
+        totals['grid_negative_hours'] = int(np.count_nonzero(grid_load < 0))    # 可以上网的小时数
+        totals['grid_positive_energy'] = float(grid_load[grid_load > 0].sum())  # 总下网电量
+        totals['grid_negative_energy'] = float(-grid_load[grid_load < 0].sum())  # 总上网电量
+        peak_regime = np.asarray(results.get('hourly_peak_regime', []))
+        if peak_regime.size:
+            peak_regime = peak_regime[hour_slice]
+        totals['peak_max_hours'] = int(np.count_nonzero(peak_regime == PEAK_REGIME_MAX))
+        totals['peak_min_hours'] = int(np.count_nonzero(peak_regime == PEAK_REGIME_MIN))
+        return totals
+
+    def updated(self, old_results, new_results, hour_range):
+        """
+        由局部重算前后的结果得到新的统计（不修改原统计）
+        :param hour_range: 重算的小时区间 (起始小时, 结束小时)，区间外两次结果相同
+        """
+        statistics = copy.copy(self)
+        hour_slice = slice(*hour_range)
+        old_totals = self._range_totals(old_results, hour_slice)
+        new_totals = self._range_totals(new_results, hour_slice)
+        statistics.totals = {key: value + new_totals[key] - old_totals[key] for key, value in self.totals.items()}
+        return statistics
+
+    def total(self, key):
+        return self.totals.get(key, 0.0)
+
+    def mean(self, key):
+        return self.totals.get(key, 0.0) / self.hours if self.hours else 0.0
+
+    def energy(self, key):
+        """
+        功率序列合计对应的电量 (kWh)
+        """
+        return self.total(key) * self.step_hours
+
+    def duration(self, key):
+        """
+        时段数统计对应的小时数
+        """
+        return self.total(key) * self.step_hours
+
+class AnnualBalanceCalculator:
+    def __init__(self, data_model, base_year=DEFAULT_BASE_YEAR):
+        self.data_model = data_model
+        self.base_year = base_year  # 第0小时对应的年份
+        
+    def compile_timeline(self, data_model=None):
+        """
+        编译检修、投产和出力限制计划，时段数与用电负荷序列一致
+        """
+        data_model = data_model or self.data_model
+        hours = len(self.data_model.electric_load_hourly)
+        return ScheduleTimeline(data_model, hours,
+                                CalendarIndex.get(self.base_year, hours, self.data_model.time_step_minutes))
+
+    def corrected_electric_load(self, timeline):
+        """
+        应用检修计划和投运计划对用电负荷的综合影响
+        用电负荷 = 原始用电负荷 / 最大电力负荷 * (最大电力负荷 - 检修影响 - 投运影响)
+        """
+        original_electric_load = np.asarray(self.data_model.electric_load_hourly, dtype=float)
+        current_max_load = original_electric_load.max() if len(original_electric_load) else 1.0  # 防止除零错误
+        if current_max_load > 0:
+            return original_electric_load / current_max_load * (
+                current_max_load - timeline.maintenance_load_reduction - timeline.commissioning_load_reduction)
+        return original_electric_load.copy()
+
+    def calculate_annual_balance(self, progress=None):
+        """
+        计算年度各时段（逐小时为8760小时）的能源平衡
+        根据新公式计算各项参数，所有小时以NumPy数组整体计算
+        :param progress: 进度回调 progress(已完成步数, 总步数, 阶段名称)，可在回调中抛出CalculationCancelled取消计算
+        """
+        report = progress or (lambda done, total, phase: None)
+        report(0, 3, "编译检修和投产计划")
+        timeline = self.compile_timeline()
+        results = self.calculate_hours(timeline, slice(None), report)
+        report(3, 3, "计算完成")
+        return results
+
+    def recalculate_range(self, results, start_hour, end_hour, progress=None):
+        """
+        局部重算：只重新计算 [start_hour, end_hour) 区间内的小时，其余小时沿用上次结果
+        各小时只依赖本小时的输入和当时生效的计划，因此与整年重算的结果一致
+        :param results: 上次的计算结果（不修改，复制后写入重算区间）；
+                        其中有非float64的浮点列（如以float32保存后恢复的结果）时改为整年重算，保证与整年计算逐位一致
+        :return: 新的结果字典，各列数据类型与整年计算相同
+        """
+        if any(np.asarray(value).dtype.kind == 'f' and np.asarray(value).dtype != np.float64
+               for value in results.values()):
+            return self.calculate_annual_balance(progress=progress)
+        report = progress or (lambda done, total, phase: None)
+        report(0, 3, "编译检修和投产计划")
+        timeline = self.compile_timeline()
+        hour_slice = slice(start_hour, end_hour)
+        part = self.calculate_hours(timeline, hour_slice, report)
+        updated = {key: np.array(value) for key, value in results.items()}
+        for key, values in part.items():
+            updated[key][hour_slice] = values
+        report(3, 3, "计算完成")
+        return updated
+
+    def calculate_hours(self, timeline, hour_slice, report):
+        """
+        计算给定小时切片内的机组出力和电力平衡（计算步骤3-13）
+        """
+        dm = self.data_model
+        peak_power_max = timeline.peak_power_max[hour_slice]
+        peak_power_min = timeline.peak_power_min[hour_slice]
+        corrected_electric_load = self.corrected_electric_load(timeline)[hour_slice]
+
+        report(1, 3, "计算机组出力")
+        # 3) 热定电机组出力 = 热力负荷 * 电热比
+        chp_output = (np.asarray(dm.heat_load_hourly, dtype=float)[hour_slice] *
+                      dm.chp_electric_params['electric_heat_ratio'])
+
+        # 4) 光伏最大出力：先应用出力限制，再应用投产修正
+        pv_output = total_pv_power_array(np.asarray(dm.solar_irradiance_hourly, dtype=float)[hour_slice], dm.pv_models)
+        pv_output = np.minimum(pv_output, timeline.pv_limit[hour_slice]) * timeline.pv_factor[hour_slice]
+
+        # 5) 风机最大出力：先应用出力限制，再应用投产修正
+        wind_output = total_wind_power_array(np.asarray(dm.wind_speed_hourly, dtype=float)[hour_slice],
+                                             dm.wind_turbine_models)
+        wind_output = np.minimum(wind_output, timeline.wind_limit[hour_slice]) * timeline.wind_factor[hour_slice]
+
+        report(2, 3, "求解电力平衡")
+        results = compute_balance(corrected_electric_load, chp_output, pv_output, wind_output,
+                                  peak_power_max, peak_power_min, dm.internal_electric_rate,
+                                  dm.flexible_load_min, dm.flexible_load_max)
+        # 计划修正后的机组约束，优化计算直接使用，保证两个阶段的约束一致
+        results['hourly_peak_power_max'] = peak_power_max               # 调峰机组最大出力
+        results['hourly_peak_power_min'] = peak_power_min               # 调峰机组最小出力
+        results['hourly_pv_derate_factor'] = timeline.pv_factor[hour_slice]      # 光伏投产修正系数
+        results['hourly_wind_derate_factor'] = timeline.wind_factor[hour_slice]  # 风机投产修正系数
+        return results
+
+# 批量场景计算可覆盖的全局参数
+SCENARIO_PARAMETERS = ('peak_power_max', 'peak_power_min_summer', 'peak_power_min_winter',
+                       'flexible_load_max', 'flexible_load_min')
+# 批量场景计算可覆盖的型号字段，键写作 '型号列表.型号名称.字段'
+SCENARIO_MODEL_LISTS = ('wind_turbine_models', 'pv_models')
+SCENARIO_MODEL_FIELDS = ('count', 'output_correction_factor')
+
+def apply_scenario_overrides(data_model, overrides):
+    """
+    生成应用场景参数后的数据模型（浅拷贝，逐小时序列和计划与原模型共享，不修改原模型）
+    :param overrides: 场景参数字典，键为SCENARIO_PARAMETERS中的参数，
+                      或 '型号列表.型号名称.字段'，如 'wind_turbine_models.WT-2000.count'
+    """
+    scenario = copy.copy(data_model)
+    scenario.wind_turbine_models = [dict(model) for model in data_model.wind_turbine_models]
+    scenario.pv_models = [dict(model) for model in data_model.pv_models]
+    for key, value in overrides.items():
+        if key in SCENARIO_PARAMETERS:
+            setattr(scenario, key, float(value))
+            continue
+        list_name, _, rest = key.partition('.')
+        name, _, field = rest.rpartition('.')
+        if list_name not in SCENARIO_MODEL_LISTS or field not in SCENARIO_MODEL_FIELDS:
+            raise ValueError(f"不支持的场景参数: {key}")
+        models = [model for model in getattr(scenario, list_name) if model['name'] == name]
+        if not models:
+            raise ValueError(f"场景参数 {key} 中的型号不存在: {name}")
+        for model in models:
+            model[field] = value
+    return scenario
+
+def normalize_scenario_overrides(overrides):
+    """
+    将按列给出的场景参数 {参数: [各场景取值]} 转换为逐场景列表 [{参数: 值}, ...]
+    """
+    if isinstance(overrides, dict):
+        columns = {key: list(values) for key, values in overrides.items()}
+        count = len(next(iter(columns.values()), []))
+        return [{key: values[i] for key, values in columns.items()} for i in range(count)]
+    return list(overrides)
+
+# 年度指标名称，顺序与balance_kpis的返回值一致
+BALANCE_KPI_NAMES = ('renewable_energy', 'abandon_energy', 'abandon_rate', 'grid_purchase_energy',
+                     'grid_feed_energy', 'thermal_energy', 'flexible_load_energy')
+
+def balance_kpis(results, step_hours=1.0):
+    """
+    由平衡计算结果汇总年度指标，沿最后一维（时段）求和，(场景数, 时段数) 结果得到各场景指标
+    :param step_hours: 每个时段的小时数，功率合计乘以该值得到电量
+    :return: 指标字典（电量单位 kWh）
+    """
+    renewable_output = np.asarray(results['hourly_pv_output']) + np.asarray(results['hourly_wind_output'])
+    grid_load = np.asarray(results['hourly_grid_load'])
+    energy = lambda values: np.asarray(values).sum(axis=-1) * step_hours
+    renewable_energy = energy(renewable_output)
+    abandon_energy = energy(renewable_output - results['hourly_wind_pv_actual'])
+    return {
+        'renewable_energy': renewable_energy,                                        # 风光可发电量
+        'abandon_energy': abandon_energy,                                            # 弃风弃光电量
+        'abandon_rate': np.divide(abandon_energy, renewable_energy, out=np.zeros(np.shape(renewable_energy)),
+                                  where=renewable_energy > 0),                       # 弃光风率
+        'grid_purchase_energy': energy(np.maximum(grid_load, 0.0)),                  # 下网电量
+        'grid_feed_energy': energy(np.maximum(-grid_load, 0.0)),                     # 上网电量
+        'thermal_energy': energy(results['hourly_thermal_output']),                  # 火电发电量
+        'flexible_load_energy': energy(results['hourly_flexible_load_consumption']),  # 灵活负荷消纳电量
+    }
+
+def project_kpis(data):
+    """
+    由待保存的项目数据（to_dict的返回值）汇总年度指标，没有计算结果时返回None
+    :return: {指标: 数值}，与balance_kpis相同的指标
+    """
+    results = data.get('calculation_results')
+    if not results or 'hourly_grid_load' not in results:
+        return None
+    step_hours = int(data.get('time_step_minutes', 60)) / 60.0
+    return {key: float(value) for key, value in balance_kpis(results, step_hours).items()}
+
+class ScenarioBatchCalculator(AnnualBalanceCalculator):
+    """
+    批量场景计算
+    对一组参数覆盖（调峰机组最大/最小出力、灵活负荷上下限、各型号数量和修正系数）
+    在共享的逐小时输入序列上以 (场景数, 小时数) 数组一次计算，结果与逐个修改参数后
+    调用calculate_annual_balance一致（风机型号较多时不使用聚合曲线近似）
+    """
+    def evaluate(self, overrides, return_series=False, chunk_size=64, progress=None):
+        """
+        :param overrides: 场景参数列表 [{参数: 值}, ...]，或按列给出的 {参数: [各场景取值]}
+        :param return_series: 是否返回各场景的逐小时序列
+        :param chunk_size: 每批同时计算的场景数，限制内存占用
+        :param progress: 进度回调 progress(已完成场景数, 场景总数, 阶段名称)
+        :return: {'kpis': {指标: (场景数,) 数组}}，return_series为True时另含 'series': {键: (场景数, 小时数) 数组}
+        """
+        report = progress or (lambda done, total, phase: None)
+        overrides = normalize_scenario_overrides(overrides)
+        scenarios = [apply_scenario_overrides(self.data_model, override) for override in overrides]
+        count = len(scenarios)
+
+        dm = self.data_model
+        timeline = self.compile_timeline()
+        hours = timeline.hours
+        corrected_electric_load = self.corrected_electric_load(timeline)
+        chp_output = np.asarray(dm.heat_load_hourly, dtype=float) * dm.chp_electric_params['electric_heat_ratio']
+
+        # 光伏出力与光照强度成正比，各场景只差一个系数
+        irradiance = np.asarray(dm.solar_irradiance_hourly, dtype=float)
+        pv_coefficient = np.array([pv_fleet_coefficient(scenario.pv_models) for scenario in scenarios])
+        # 风机：修正系数为1的单台出力矩阵 (型号数, 小时数)，各场景按 数量×修正系数 加权求和
+        unit_models = [dict(model, output_correction_factor=1.0) for model in dm.wind_turbine_models]
+        wind_unit_power = wind_power_matrix(dm.wind_speed_hourly, unit_models) if unit_models else np.zeros((0, hours))
+        wind_weights = np.array([[model['count'] * model.get('output_correction_factor', 1.0)
+                                  for model in scenario.wind_turbine_models] for scenario in scenarios]).reshape(count, -1)
+        pv_capacity = np.array([scenario.calculate_pv_total_capacity() for scenario in scenarios])
+        wind_capacity = np.array([scenario.calculate_wind_total_capacity() for scenario in scenarios])
+        flexible_load_min = np.array([scenario.flexible_load_min for scenario in scenarios])
+        flexible_load_max = np.array([scenario.flexible_load_max for scenario in scenarios])
+        peak_parameters = np.array([[scenario.peak_power_max, scenario.peak_power_min_summer, scenario.peak_power_min_winter]
+                                    for scenario in scenarios], dtype=float).reshape(count, 3)
+
+        kpis = {}
+        series = {}
+        for start in range(0, count, chunk_size):
+            report(start, count, "场景计算")
+            window = slice(start, min(start + chunk_size, count))
+            column = lambda values: values[window, np.newaxis]
+
+            pv_factor = timeline.derate_factor(timeline.pv_impact, timeline.has_pv_schedule, column(pv_capacity))
+            wind_factor = timeline.derate_factor(timeline.wind_impact, timeline.has_wind_schedule, column(wind_capacity))
+            pv_output = np.minimum(irradiance * column(pv_coefficient), timeline.pv_limit) * pv_factor
+            wind_output = np.minimum(wind_weights[window] @ wind_unit_power, timeline.wind_limit) * wind_factor
+            # 调峰机组约束只与最大出力和夏/冬季最小出力有关，由计划修正量直接组合
+            peak_power_max, peak_power_min = timeline.peak_limits(*(column(peak_parameters[:, i]) for i in range(3)))
+
+            results = compute_balance(corrected_electric_load, chp_output, pv_output, wind_output,
+                                      peak_power_max, peak_power_min, dm.internal_electric_rate,
+                                      column(flexible_load_min), column(flexible_load_max))
+            for key, values in balance_kpis(results, dm.step_hours).items():
+                kpis.setdefault(key, np.empty(count))[window] = values
+            if return_series:
+                results['hourly_peak_power_max'] = peak_power_max
+                results['hourly_peak_power_min'] = peak_power_min
+                results['hourly_pv_derate_factor'] = pv_factor
+                results['hourly_wind_derate_factor'] = wind_factor
+                for key, values in results.items():
+                    series.setdefault(key, np.empty((count, hours), dtype=np.asarray(values).dtype))[window] = values
+
+        report(count, count, "场景计算完成")
+        batch = {'kpis': kpis}
+        if return_series:
+            batch['series'] = series
+        return batch
+
+# 场景扫描工作进程中的计算器（每个进程在初始化时构建一次）
+_sweep_calculator = None
+_sweep_shared_memory = None
+
+def _sweep_worker_init(shared_memory_name, shape, config, base_year):
+    """
+    场景扫描工作进程初始化：从共享内存映射逐小时输入序列，不复制也不反序列化
+    """
+    from multiprocessing import shared_memory
+    global _sweep_calculator, _sweep_shared_memory
+    _sweep_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    series = np.ndarray(shape, dtype=float, buffer=_sweep_shared_memory.buf)
+    data_model = EnergyDataModel()
+    data_model.from_dict(config)
+    for name, values in zip(EnergyDataModel.HOURLY_SERIES, series):
+        setattr(data_model, name, values)
+    _sweep_calculator = ScenarioBatchCalculator(data_model, base_year)
+
+def _sweep_worker_evaluate(overrides):
+    """
+    在工作进程中计算一批场景，只返回指标
+    """
+    return _sweep_calculator.evaluate(overrides)['kpis']
+
+def run_scenario_sweep(data_model, overrides, max_workers=None, tasks_per_worker=4,
+                       base_year=DEFAULT_BASE_YEAR, progress=None):
+    """
+    多进程场景扫描
+    逐小时输入序列只写入一次共享内存，各工作进程直接映射；场景按块分发给进程池，
+    每块在进程内以ScenarioBatchCalculator批量计算，最后汇总为一张指标表
+    :param overrides: 场景参数，格式同ScenarioBatchCalculator.evaluate
+    :param max_workers: 进程数，默认为CPU核数
+    :param tasks_per_worker: 每个进程平均分到的任务块数，块数略多于进程数以平衡负载
+    :param progress: 进度回调 progress(已完成场景数, 场景总数, 阶段名称)
+    :return: {'overrides': 场景参数列表, 'kpis': {指标: (场景数,) 数组}}
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from multiprocessing import shared_memory
+
+    report = progress or (lambda done, total, phase: None)
+    overrides = normalize_scenario_overrides(overrides)
+    count = len(overrides)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk = max(1, -(-count // (max_workers * tasks_per_worker)))
+
+    series = np.stack([np.asarray(getattr(data_model, name), dtype=float) for name in EnergyDataModel.HOURLY_SERIES])
+    config = {key: value for key, value in data_model.to_dict().items()
+              if key not in EnergyDataModel.HOURLY_SERIES and key not in RESULT_DICT_KEYS}
+
+    kpis = {}
+    block = shared_memory.SharedMemory(create=True, size=max(series.nbytes, 1))
+    try:
+        np.ndarray(series.shape, dtype=float, buffer=block.buf)[:] = series
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_sweep_worker_init,
+                                 initargs=(block.name, series.shape, config, base_year)) as pool:
+            futures = {pool.submit(_sweep_worker_evaluate, overrides[start:start + chunk]): start
+                       for start in range(0, count, chunk)}
+            done = 0
+            for future in as_completed(futures):
+                start = futures[future]
+                chunk_kpis = future.result()
+                for key, values in chunk_kpis.items():
+                    kpis.setdefault(key, np.empty(count))[start:start + len(values)] = values
+                done += len(next(iter(chunk_kpis.values()), []))
+                report(done, count, "场景扫描")
+    finally:
+        block.close()
+        block.unlink()
+    return {'overrides': overrides, 'kpis': kpis}
+
+# 多年计算输出目录中的年度指标表，每算完一年追加一行
+MULTI_YEAR_KPI_FILE = "kpis.csv"
+
+def multi_year_growth_factor(growth, index):
+    """
+    第index年（起始年为0）相对起始年数据的增长倍数
+    :param growth: 年增长率（按复利逐年增长），或逐年给出的倍数序列
+    """
+    if isinstance(growth, (int, float)):
+        return (1.0 + growth) ** index
+    return float(growth[index])
+
+def iter_multi_year_balance(data_model, start_year, years, output_dir=None, growth=None, progress=None):
+    """
+    多年滚动计算：逐年计算平衡结果，每次只在内存中保留一年的逐时段序列
+    每年以该年1月1日为第0个时段，检修、投产和出力限制计划按实际日期生效
+    （投产计划在开始日期所在年份之前的各年均按未投产处理，结束日期之后的各年不再修正）
+    :param start_year: 起始年份
+    :param years: 计算年数
+    :param output_dir: 各年逐时段结果的保存目录，每年一个 <年份>.npz 文件；为None时不保存
+    :param growth: 时序数据的增长设置 {序列名: 年增长率或逐年倍数序列}，如 {'electric_load_hourly': 0.03}
+    :param progress: 进度回调 progress(已完成年数, 总年数, 阶段名称)
+    :yield: (年份, 年度指标字典)，每算完一年产出一次
+    """
+    report = progress or (lambda done, total, phase: None)
+    growth = growth or {}
+    unknown = [name for name in growth if name not in EnergyDataModel.HOURLY_SERIES]
+    if unknown:
+        raise ValueError(f"不支持的增长序列: {', '.join(unknown)}")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    base_series = {name: np.asarray(getattr(data_model, name), dtype=float) for name in growth}
+    # 浅复制数据模型：型号和计划列表与原模型共用，只替换增长后的时序数据
+    year_model = copy.copy(data_model)
+    for index in range(years):
+        year = start_year + index
+        report(index, years, f"计算{year}年")
+        for name, values in base_series.items():
+            setattr(year_model, name, values * multi_year_growth_factor(growth[name], index))
+        results = AnnualBalanceCalculator(year_model, year).calculate_annual_balance()
+        kpis = {key: float(value) for key, value in balance_kpis(results, data_model.step_hours).items()}
+        if output_dir:
+            # 先写临时文件再替换，中断时不会留下不完整的 <年份>.npz；替换完成后才产出该年指标
+            atomic_savez(os.path.join(output_dir, f"{year}.npz"), **results)
+        del results
+        yield year, kpis
+    report(years, years, "多年计算完成")
+
+def run_multi_year_balance(data_model, start_year, years, output_dir, growth=None, progress=None):
+    """
+    多年滚动计算并保存结果：各年逐时段结果写入output_dir/<年份>.npz，
+    年度指标每算完一年即追加写入output_dir/kpis.csv，计算过程中可随时读取已完成年份的指标
+    参数同iter_multi_year_balance
+    :return: {'years': 年份数组, 'kpis': {指标: (年数,) 数组}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    year_list = []
+    kpis = {name: [] for name in BALANCE_KPI_NAMES}
+    with open(os.path.join(output_dir, MULTI_YEAR_KPI_FILE), 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['year'] + list(BALANCE_KPI_NAMES))
+        f.flush()
+        for year, year_kpis in iter_multi_year_balance(data_model, start_year, years, output_dir, growth, progress):
+            writer.writerow([year] + [repr(year_kpis[name]) for name in BALANCE_KPI_NAMES])
+            f.flush()
+            year_list.append(year)
+            for name in BALANCE_KPI_NAMES:
+                kpis[name].append(year_kpis[name])
+    return {'years': np.array(year_list), 'kpis': {name: np.array(values) for name, values in kpis.items()}}
+
+def load_multi_year_kpis(output_dir):
+    """
+    读取多年计算的年度指标表（可在计算过程中读取已完成的年份），不存在时返回None
+    :return: {'years': 年份数组, 'kpis': {指标: (年数,) 数组}}
+    """
+    kpi_file = os.path.join(output_dir, MULTI_YEAR_KPI_FILE)
+    if not os.path.exists(kpi_file):
+        return None
+    with open(kpi_file, 'r', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.reader(f) if row]
+    header, rows = rows[0], rows[1:]
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+    return {'years': np.array(columns['year'], dtype=int),
+            'kpis': {name: np.array(columns[name], dtype=float) for name in header[1:]}}
+
+def load_multi_year_results(output_dir, year):
+    """
+    读取多年计算中某一年的逐时段结果
+    :return: 结果字典 {序列名: 数组}
+    """
+    with np.load(os.path.join(output_dir, f"{year}.npz")) as data:
+        return {key: data[key] for key in data.files}
+
+def optimization_revenue(basic_load, flexible_load, chp_output, pv_output, wind_output,
+                         peak_power_max, peak_power_min, grid_price, params):
+    """
+    计算给定基础负荷和灵活负荷组合下的收益（可广播的数组版）
+    收益 = 基础负荷×基础收益 + 灵活负荷×灵活收益 - 火电出力×火电成本 - 光伏出力×光伏成本 - 风机出力×风机成本 - 购电×电价
+    :param params: 优化参数字典，键与EnergyDataModel.optimization_params一致
+    :return: 收益数组
+    """
+    total_load = basic_load + flexible_load
+    # 调峰机组出力
+    peak_pending = total_load - chp_output - pv_output - wind_output
+    peak_output = np.maximum(np.minimum(peak_pending, peak_power_max), peak_power_min)
+    # 火电出力（热电联产+调峰）
+    thermal_output = chp_output + peak_output
+    # 下网负荷
+    generation = pv_output + wind_output + thermal_output
+    grid_load = total_load - generation
+
+    revenue = (
+        basic_load * params['basic_load_revenue'] +
+        flexible_load * params['flexible_load_revenue'] -
+        thermal_output * params['thermal_cost'] -
+        pv_output * params['pv_cost'] -
+        wind_output * params['wind_cost']
+    )
+    # 需要购电时减去购电成本
+    return np.where(grid_load > 0, revenue - grid_load * grid_price, revenue)
+
+def optimize_hourly_grid(max_basic_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min,
+                         grid_price, flexible_load_min, flexible_load_max, params, steps=10):
+    """
+    逐小时网格搜索优化（全年一次广播计算）
+    每小时先评估4种典型策略，再在基础负荷 [0, 最大基础负荷] 与灵活负荷 [最小, 最大] 上按steps等分搜索，
+    取收益最大的组合；收益相同时保留先评估到的组合
+    :param max_basic_load: 各小时基础负荷上限数组，形状 (N,)
+    :return: 优化结果字典
+    """
+    max_basic_load = np.asarray(max_basic_load, dtype=float)
+    column = lambda values: np.asarray(values, dtype=float)[:, np.newaxis]
+    max_basic = column(max_basic_load)
+    zeros = np.zeros_like(max_basic)
+
+    # 典型策略：最小值、基础最大灵活最小、基础最小灵活最大、最大值
+    strategy_basic = np.hstack([zeros, max_basic, zeros, max_basic])
+    strategy_flexible = np.broadcast_to(
+        np.array([0.0, flexible_load_min, flexible_load_max, flexible_load_max]), strategy_basic.shape)
+
+    # 网格候选 (N, steps+1, steps+1)，第二维为基础负荷，第三维为灵活负荷
+    index = np.arange(steps + 1)
+    basic_step = np.where(max_basic > 0, max_basic / steps, 0.0)
+    flex_range = flexible_load_max - flexible_load_min
+    flex_step = flex_range / steps if flex_range > 0 else 0
+    grid_basic = np.minimum(index * basic_step, max_basic)[:, :, np.newaxis]
+    grid_flexible = np.minimum(flexible_load_min + index * flex_step, flexible_load_max)[np.newaxis, np.newaxis, :]
+    grid_shape = (len(max_basic_load), steps + 1, steps + 1)
+    grid_basic = np.broadcast_to(grid_basic, grid_shape).reshape(len(max_basic_load), -1)
+    grid_flexible = np.broadcast_to(grid_flexible, grid_shape).reshape(len(max_basic_load), -1)
+
+    basic_candidates = np.hstack([strategy_basic, grid_basic])
+    flexible_candidates = np.hstack([strategy_flexible, grid_flexible])
+    revenue = optimization_revenue(basic_candidates, flexible_candidates, column(chp_output), column(pv_output),
+                                   column(wind_output), column(peak_power_max), column(peak_power_min),
+                                   column(grid_price), params)
+
+    # argmax返回首个最大值，与逐个比较时只在收益严格增大才替换的顺序一致
+    best = np.argmax(revenue, axis=1)[:, np.newaxis]
+    hourly_revenue = np.take_along_axis(revenue, best, axis=1)[:, 0]
+    return {
+        'hourly_basic_load': np.take_along_axis(basic_candidates, best, axis=1)[:, 0],
+        'hourly_flexible_load': np.take_along_axis(flexible_candidates, best, axis=1)[:, 0],
+        'hourly_revenue': hourly_revenue,
+        'total_revenue': float(hourly_revenue.sum()),
+    }
+
+def optimize_hourly_exact(max_basic_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min,
+                          grid_price, flexible_load_min, flexible_load_max, params):
+    """
+    逐小时精确优化（断点顶点枚举，全年一次广播计算）
+    收益只通过总负荷 = 基础负荷 + 灵活负荷 出现折点：调峰机组达到最小/最大出力处，
+    以及开始购电处（与达到最大出力处重合）。可行域被直线 基础负荷 + 灵活负荷 = 折点总负荷
+    分割为若干多边形，收益在每块上线性，最优解必在这些多边形的顶点上，
+    即可行域四个角点以及折点直线与四条边的交点。另保留网格搜索中的 (0, 0) 策略，
+    保证结果不劣于网格搜索
+    :param max_basic_load: 各小时基础负荷上限数组，形状 (N,)
+    :return: 优化结果字典
+    """
+    column = lambda values: np.asarray(values, dtype=float)[:, np.newaxis]
+    max_basic = np.maximum(column(max_basic_load), 0.0)
+    chp_output, pv_output, wind_output = column(chp_output), column(pv_output), column(wind_output)
+    peak_power_max, peak_power_min = column(peak_power_max), column(peak_power_min)
+    flex_low = min(flexible_load_min, flexible_load_max)
+    flex_high = flexible_load_max
+    zeros = np.zeros_like(max_basic)
+    flex_low_column = np.full_like(max_basic, flex_low)
+    flex_high_column = np.full_like(max_basic, flex_high)
+
+    # 折点对应的总负荷：待定出力等于最小出力、等于最大出力（此后开始购电）
+    fixed_output = chp_output + pv_output + wind_output
+    breakpoints = [fixed_output + peak_power_min, fixed_output + np.maximum(peak_power_max, peak_power_min)]
+
+    # 角点（顺序与网格搜索的典型策略一致），以及 (0, 0) 策略
+    basic_candidates = [zeros, max_basic, zeros, max_basic, zeros]
+    flexible_candidates = [flex_low_column, flex_low_column, flex_high_column, flex_high_column, zeros]
+    for total_load in breakpoints:
+        # 折点直线与 基础负荷=0/上限 两条边的交点
+        for basic in (zeros, max_basic):
+            basic_candidates.append(basic)
+            flexible_candidates.append(np.clip(total_load - basic, flex_low, flex_high))
+        # 折点直线与 灵活负荷=最小/最大 两条边的交点
+        for flexible in (flex_low_column, flex_high_column):
+            basic_candidates.append(np.clip(total_load - flexible, 0.0, max_basic))
+            flexible_candidates.append(flexible)
+
+    basic_candidates = np.hstack(basic_candidates)
+    flexible_candidates = np.hstack(flexible_candidates)
+    revenue = optimization_revenue(basic_candidates, flexible_candidates, chp_output, pv_output, wind_output,
+                                   peak_power_max, peak_power_min, column(grid_price), params)
+
+    best = np.argmax(revenue, axis=1)[:, np.newaxis]
+    hourly_revenue = np.take_along_axis(revenue, best, axis=1)[:, 0]
+    return {
+        'hourly_basic_load': np.take_along_axis(basic_candidates, best, axis=1)[:, 0],
+        'hourly_flexible_load': np.take_along_axis(flexible_candidates, best, axis=1)[:, 0],
+        'hourly_revenue': hourly_revenue,
+        'total_revenue': float(hourly_revenue.sum()),
+    }
+
+def optimize_annual_lp(max_basic_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min,
+                       grid_price, flexible_load_min, flexible_load_max, params, step_hours=1.0):
+    """
+    全年线性规划优化（scipy HiGHS求解）
+    决策变量为各小时的基础负荷、灵活负荷、调峰机组出力和购电量，目标与逐小时优化相同，
+    并可加入跨时段约束（params中为0表示不限制）：
+        daily_flexible_energy_max/min: 每日灵活负荷电量上/下限 (kWh)
+        flexible_ramp_limit: 相邻小时灵活负荷变化上限 (kW)
+        peak_ramp_limit: 相邻小时调峰机组出力变化上限 (kW)，出力上下限因计划跳变的时段除外
+    与逐小时优化不同，调峰机组出力作为可调度变量，在 [最小出力, 最大出力] 内由求解器决定
+    :param step_hours: 每个时段的小时数；时段不足1小时时，日电量按时段电量累加，
+                       爬坡限制按时段长度折算为相邻时段的变化上限
+    :return: 优化结果字典，另含逐时段调峰机组出力和购电量
+    """
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    max_basic_load = np.maximum(np.asarray(max_basic_load, dtype=float), 0.0)
+    chp_output, pv_output, wind_output = (np.asarray(v, dtype=float) for v in (chp_output, pv_output, wind_output))
+    peak_power_min = np.asarray(peak_power_min, dtype=float)
+    peak_power_max = np.maximum(np.asarray(peak_power_max, dtype=float), peak_power_min)
+    grid_price = np.asarray(grid_price, dtype=float)
+    hours = len(max_basic_load)
+
+    # 变量排列: [基础负荷, 灵活负荷, 调峰机组出力, 购电量]，各占hours列
+    basic, flexible, peak, purchase = (slice(i * hours, (i + 1) * hours) for i in range(4))
+    cost = np.concatenate([
+        np.full(hours, -params['basic_load_revenue']),
+        np.full(hours, -params['flexible_load_revenue']),
+        np.full(hours, params['thermal_cost']),
+        grid_price,
+    ])
+    bounds = np.empty((4 * hours, 2))
+    bounds[basic] = np.column_stack([np.zeros(hours), max_basic_load])
+    bounds[flexible] = [min(flexible_load_min, flexible_load_max), flexible_load_max]
+    bounds[peak] = np.column_stack([peak_power_min, peak_power_max])
+    bounds[purchase] = [0.0, np.inf]
+
+    identity = sparse.identity(hours, format='csr')
+    zero = sparse.csr_matrix((hours, hours))
+    # 电力平衡：基础负荷 + 灵活负荷 - 调峰机组出力 - 购电量 <= 热电联产 + 光伏 + 风机出力
+    blocks = [sparse.hstack([identity, identity, -identity, -identity])]
+    limits = [chp_output + pv_output + wind_output]
+
+    daily_max = params.get('daily_flexible_energy_max', 0.0)
+    daily_min = params.get('daily_flexible_energy_min', 0.0)
+    if daily_max > 0 or daily_min > 0:
+        day_index = np.arange(hours) // int(round(24 / step_hours))
+        days = day_index[-1] + 1
+        daily_sum = sparse.csr_matrix((np.full(hours, step_hours), (day_index, np.arange(hours))), shape=(days, hours))
+        empty = sparse.csr_matrix((days, hours))
+        if daily_max > 0:
+            blocks.append(sparse.hstack([empty, daily_sum, empty, empty]))
+            limits.append(np.full(days, daily_max))
+        if daily_min > 0:
+            blocks.append(sparse.hstack([empty, -daily_sum, empty, empty]))
+            limits.append(np.full(days, -daily_min))
+
+    # 爬坡约束：|x[t+1] - x[t]| <= 限值
+    # 检修、投产等计划使调峰机组出力上下限在某一时段跳变时，该时段不受爬坡限制（否则必然无解）
+    difference = sparse.diags([-1.0, 1.0], [0, 1], shape=(hours - 1, hours), format='csr')
+    peak_steady = (np.diff(peak_power_min) == 0) & (np.diff(peak_power_max) == 0)
+    for key, column, steady in (('flexible_ramp_limit', 1, None), ('peak_ramp_limit', 2, peak_steady)):
+        ramp_limit = params.get(key, 0.0)
+        if ramp_limit > 0 and hours > 1:
+            ramp = difference if steady is None else difference[np.flatnonzero(steady)]
+            if ramp.shape[0] == 0:
+                continue
+            empty = sparse.csr_matrix((ramp.shape[0], hours))
+            for sign in (1.0, -1.0):
+                row = [empty] * 4
+                row[column] = sign * ramp
+                blocks.append(sparse.hstack(row))
+                limits.append(np.full(ramp.shape[0], ramp_limit * step_hours))
+
+    result = linprog(cost, A_ub=sparse.vstack(blocks, format='csr'), b_ub=np.concatenate(limits),
+                     bounds=bounds, method='highs')
+    if result.status != 0:
+        raise ValueError(f"线性规划求解失败: {result.message}")
+
+    x = result.x
+    thermal_output = chp_output + x[peak]
+    hourly_revenue = (
+        x[basic] * params['basic_load_revenue'] +
+        x[flexible] * params['flexible_load_revenue'] -
+        thermal_output * params['thermal_cost'] -
+        pv_output * params['pv_cost'] -
+        wind_output * params['wind_cost'] -
+        x[purchase] * grid_price
+    )
+    return {
+        'hourly_basic_load': x[basic],
+        'hourly_flexible_load': x[flexible],
+        'hourly_peak_output': x[peak],
+        'hourly_grid_purchase': x[purchase],
+        'hourly_revenue': hourly_revenue,
+        'total_revenue': float(hourly_revenue.sum()),
+    }
+
+# 优化方法：键为保存在optimization_params中的标识，值为(显示名称, 求解函数, 各小时是否相互独立)
+OPTIMIZATION_METHODS = {
+    'grid': ('网格搜索', optimize_hourly_grid, True),
+    'exact': ('精确求解', optimize_hourly_exact, True),
+    'lp': ('全年线性规划', optimize_annual_lp, False),
+}
+
+# 跨时段约束参数及其界面显示名称
+OPTIMIZATION_CONSTRAINTS = [
+    ('daily_flexible_energy_max', '每日灵活负荷电量上限 (kWh): '),
+    ('daily_flexible_energy_min', '每日灵活负荷电量下限 (kWh): '),
+    ('flexible_ramp_limit', '灵活负荷爬坡限制 (kW/h): '),
+    ('peak_ramp_limit', '调峰机组爬坡限制 (kW/h): '),
+]
+
+def run_optimization(method, max_basic_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min,
+                     grid_price, flexible_load_min, flexible_load_max, params, progress=None, chunk_hours=730,
+                     step_hours=1.0):
+    """
+    按指定优化方法求解
+    各小时相互独立的方法分块计算，每块之后汇报进度，结果与一次整体计算相同
+    :param method: OPTIMIZATION_METHODS中的方法标识
+    :param progress: 进度回调 progress(已完成时段数, 总时段数, 阶段名称)
+    :param step_hours: 每个时段的小时数，各时段收益（按功率计算）乘以该值得到时段收益
+    :return: 优化结果字典
+    """
+    report = progress or (lambda done, total, phase: None)
+    _, optimize, hourly_independent = OPTIMIZATION_METHODS[method]
+    hourly = [np.asarray(values, dtype=float) for values in
+              (max_basic_load, chp_output, pv_output, wind_output, peak_power_max, peak_power_min, grid_price)]
+    hours = len(hourly[0])
+
+    if not hourly_independent:
+        report(0, hours, "求解全年优化模型")
+        result = optimize(*hourly, flexible_load_min, flexible_load_max, params, step_hours=step_hours)
+        result['hourly_revenue'] = result['hourly_revenue'] * step_hours
+        result['total_revenue'] = float(result['hourly_revenue'].sum())
+        report(hours, hours, "优化完成")
+        return result
+
+    parts = []
+    for start in range(0, hours, chunk_hours):
+        report(start, hours, "逐小时优化")
+        window = slice(start, start + chunk_hours)
+        parts.append(optimize(*(values[window] for values in hourly), flexible_load_min, flexible_load_max, params))
+    result = {key: np.concatenate([part[key] for part in parts]) for key in parts[0] if key != 'total_revenue'}
+    result['hourly_revenue'] = result['hourly_revenue'] * step_hours
+    result['total_revenue'] = float(result['hourly_revenue'].sum())
+    report(hours, hours, "优化完成")
+    return result
+
+# 只参与优化计算、不影响年度平衡计算的数据项
+OPTIMIZATION_ONLY_KEYS = ('grid_purchase_price_hourly', 'optimization_params')
+
+def model_inputs_hash(data_model, base_year=DEFAULT_BASE_YEAR, include_optimization=False):
+    """
+    计算数据模型输入的内容哈希（计算结果和优化结果不参与）
+    逐小时序列按二进制内容计算，其余数据项按键排序后的JSON计算
+    :param include_optimization: False时只包含影响年度平衡计算的数据项，True时再加入下网电价和优化参数
+    :return: 十六进制哈希字符串
+    """
+    digest = hashlib.sha256(str(base_year).encode())
+    for key, value in sorted(data_model.to_dict().items()):
+        if key in RESULT_DICT_KEYS or (not include_optimization and key in OPTIMIZATION_ONLY_KEYS):
+            continue
+        digest.update(key.encode())
+        if key in EnergyDataModel.HOURLY_SERIES:
+            digest.update(np.ascontiguousarray(value if value is not None else [], dtype=float).tobytes())
+        else:
+            digest.update(json.dumps(value, sort_keys=True, ensure_ascii=False, default=json_default).encode('utf-8'))
+    return digest.hexdigest()
+
+def optimize_balance_results(data_model, results, params, method='grid', calendar=None, progress=None):
+    """
+    在年度平衡计算结果的基础上进行负荷优化
+    :param results: calculate_annual_balance的返回值
+    :param params: 优化参数（收益、成本和跨时段约束）
+    :param calendar: 小时与日期对照表，仅在结果中缺少调峰机组出力上下限时用于重新编译计划
+    :return: 优化结果字典，附带优化方法标识
+    """
+    # 获取电价数据，使用导入的下网电价，如果没有则默认为0
+    grid_price = data_model.grid_purchase_price_hourly
+    
+    # 逐小时数组（来自平衡计算结果）
+    hours = len(results['hourly_corrected_electric_load'])
+    price = np.zeros(hours)
+    price[:min(len(grid_price), hours)] = grid_price[:hours]
+    # 调峰机组最大/最小出力（考虑检修和投产计划修正），由平衡计算给出；
+    # 早期保存的计算结果中没有这两项，此时重新编译计划
+    if 'hourly_peak_power_max' in results and 'hourly_peak_power_min' in results:
+        peak_power_max = results['hourly_peak_power_max']
+        peak_power_min = results['hourly_peak_power_min']
+    else:
+        timeline = ScheduleTimeline(data_model, hours, calendar)
+        peak_power_max, peak_power_min = timeline.peak_power_max, timeline.peak_power_min
+    
+    # 基础负荷上限为平衡计算得到的电力负荷（考虑检修和投运计划修正后）
+    optimized_results = run_optimization(
+        method,
+        results['hourly_corrected_electric_load'],
+        results['hourly_chp_output'],
+        results['hourly_pv_output'],
+        results['hourly_wind_output'],
+        peak_power_max,
+        peak_power_min,
+        price,
+        data_model.flexible_load_min,
+        data_model.flexible_load_max,
+        params,
+        progress=progress,
+        step_hours=data_model.step_hours
+    )
+    optimized_results['method'] = method
+    return optimized_results
+
+# 优化计算用到的平衡计算结果序列
+OPTIMIZATION_RESULT_INPUTS = ('hourly_corrected_electric_load', 'hourly_chp_output', 'hourly_pv_output',
+                              'hourly_wind_output', 'hourly_peak_power_max', 'hourly_peak_power_min')
+
+def optimization_inputs_hash(data_model, results, params, method):
+    """
+    计算优化计算输入的内容哈希：平衡计算结果序列、下网电价、灵活负荷上下限、时间步长、优化参数和优化方法
+    """
+    digest = hashlib.sha256(method.encode())
+    digest.update(json.dumps([params, data_model.flexible_load_min, data_model.flexible_load_max,
+                              data_model.time_step_minutes],
+                             sort_keys=True, default=json_default).encode('utf-8'))
+    digest.update(np.ascontiguousarray(data_model.grid_purchase_price_hourly, dtype=float).tobytes())
+    for key in OPTIMIZATION_RESULT_INPUTS:
+        if key in results:
+            digest.update(key.encode())
+            digest.update(np.ascontiguousarray(results[key], dtype=float).tobytes())
+    if 'hourly_peak_power_max' not in results or 'hourly_peak_power_min' not in results:
+        # 结果中缺少调峰机组出力上下限时由计划重新编译，计划内容也需参与哈希
+        digest.update(model_inputs_hash(data_model).encode())
+    return digest.hexdigest()
+
+# 计算结果缓存默认占用上限（字节）：5分钟步长下一次平衡计算结果约17MB
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def results_nbytes(results):
+    """
+    结果字典中数组占用的总字节数
+    """
+    return sum(value.nbytes for value in results.values() if isinstance(value, np.ndarray))
+
+class ResultCache:
+    """
+    计算结果缓存
+    以输入内容哈希为键保存年度平衡计算和优化计算的结果，输入未变化时直接返回；
+    缓存数组的总字节数超过上限时淘汰最久未使用的结果（最新放入的结果始终保留）。可在多个线程中使用
+    """
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        取出缓存结果（返回字典的浅拷贝），未命中时返回None
+        """
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return dict(self.entries[key])
+
+    def put(self, key, results):
+        with self.lock:
+            self.nbytes -= self.sizes.get(key, 0)
+            self.entries[key] = dict(results)
+            self.entries.move_to_end(key)
+            self.sizes[key] = results_nbytes(results)
+            self.nbytes += self.sizes[key]
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                old_key, _ = self.entries.popitem(last=False)
+                self.nbytes -= self.sizes.pop(old_key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.nbytes = 0
+
+    def annual_balance(self, calculator, progress=None, previous_results=None, hour_range=None):
+        """
+        年度平衡计算，输入与缓存中的某次计算相同时直接返回该结果；
+        未命中且给出上次结果和待重算区间时，只局部重算该区间
+        """
+        key = ('balance', model_inputs_hash(calculator.data_model, calculator.base_year))
+        results = self.get(key)
+        if results is None:
+            if previous_results is not None and hour_range is not None:
+                results = calculator.recalculate_range(previous_results, *hour_range, progress=progress)
+            else:
+                results = calculator.calculate_annual_balance(progress=progress)
+            self.put(key, results)
+        return results
+
+    def optimize(self, data_model, results, params, method='grid', calendar=None, progress=None):
+        """
+        负荷优化计算，参数同optimize_balance_results；输入未变化时直接返回缓存结果
+        """
+        key = ('optimization', optimization_inputs_hash(data_model, results, params, method))
+        optimized_results = self.get(key)
+        if optimized_results is None:
+            optimized_results = optimize_balance_results(data_model, results, params, method, calendar, progress)
+            self.put(key, optimized_results)
+        return optimized_results
+
+class CalculationCancelled(Exception):
+    """
+    计算被用户取消
+    """
+
+class BackgroundTask:
+    """
+    后台计算任务
+    在工作线程中执行 target(*args, progress=回调, **kwargs)，进度、结果和异常放入队列，
+    由界面线程调用poll()取出处理，工作线程本身不接触任何界面对象
+    """
+    def __init__(self, target, *args, **kwargs):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """
+        请求取消，工作线程在下一次汇报进度时停止
+        """
+        self.cancel_event.set()
+
+    def report(self, done, total, phase):
+        """
+        进度回调，在工作线程中调用
+        """
+        if self.cancel_event.is_set():
+            raise CalculationCancelled()
+        self.messages.put(('progress', (done, total, phase)))
+
+    def _run(self):
+        try:
+            result = self.target(*self.args, progress=self.report, **self.kwargs)
+        except CalculationCancelled:
+            self.messages.put(('cancelled', None))
+        except Exception as e:
+            self.messages.put(('error', e))
+        else:
+            self.messages.put(('done', result))
+
+    def poll(self):
+        """
+        取出当前所有消息，返回 [(类型, 内容), ...]
+        """
+        items = []
+        while True:
+            try:
+                items.append(self.messages.get_nowait())
+            except queue.Empty:
+                return items
+
+def project_data_snapshot(data):
+    """
+    生成待保存项目数据（to_dict的返回值）的快照，供后台线程写入，不做哈希等逐元素计算：
+    逐时段输入序列可能被导入等操作原地修改，复制数组内容；
+    计算结果和优化结果的数组只会被整体替换，只复制字典；其余参数、型号和计划数据量小，深拷贝
+    """
+    snapshot = {}
+    for key, value in data.items():
+        if isinstance(value, np.ndarray):
+            snapshot[key] = value.copy()
+        elif key in RESULT_DICT_KEYS and isinstance(value, dict):
+            snapshot[key] = dict(value)
+        else:
+            snapshot[key] = copy.deepcopy(value)
+    return snapshot
+
+class ProjectAutosaver:
+    """
+    去抖动的项目自动保存
+    request()提交项目数据快照，同一项目在去抖动时间内的多次请求只保留最后一次，
+    由后台线程在最后一次请求delay秒后计算各分区哈希、只重写有变化的分区；
+    写入结果放入队列，由界面线程调用poll()取出处理
+    """
+    def __init__(self, project_manager, delay=1.0):
+        self.project_manager = project_manager
+        self.delay = delay
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()  # 项目ID -> (数据快照, 已保存的分区哈希, 标记)
+        self.saved_hashes = {}  # 项目ID -> 本线程上次写入成功的分区哈希
+        self.deadline = 0.0
+        self.writing = False
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self, project_id, data, saved_hashes=None, token=None):
+        """
+        提交一次保存请求，data必须是不再被修改的快照（见project_data_snapshot）
+        :param saved_hashes: 项目文件中已保存内容的分区哈希（EnergyDataModel.saved_section_hashes），
+                             写入时只重写与之不同的分区，None表示全部重写；本线程写入过该项目后以写入的哈希为准
+        :param token: 随写入结果原样返回
+        """
+        with self.condition:
+            self.pending.pop(project_id, None)
+            self.pending[project_id] = (data, saved_hashes, token)
+            self.deadline = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def busy(self):
+        """
+        是否还有等待写入或正在写入的请求
+        """
+        with self.condition:
+            return bool(self.pending) or self.writing
+
+    def flush(self, timeout=None):
+        """
+        立即写入所有等待中的请求，并等待写入完成
+        :return: 在timeout内全部写入完成时为True
+        """
+        with self.condition:
+            self.deadline = 0.0
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: not self.pending and not self.writing, timeout)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                project_id, (data, saved_hashes, token) = self.pending.popitem(last=False)
+                saved_hashes = self.saved_hashes.get(project_id, saved_hashes)
+                self.writing = True
+            section_hashes = None
+            try:
+                section_hashes = EnergyDataModel.section_hashes(data)
+                sections = None
+                if saved_hashes is not None:
+                    sections = {section for section, value in section_hashes.items()
+                                if saved_hashes.get(section) != value}
+                success = self.project_manager.save_project_data(project_id, data, sections, section_hashes)
+            except Exception as e:
+                print(f"自动保存项目失败: {e}")
+                success = False
+            with self.condition:
+                if success:
+                    self.saved_hashes[project_id] = section_hashes
+                self.results.put((project_id, success, section_hashes, token))
+                self.writing = False
+                self.condition.notify_all()
+
+    def poll(self):
+        """
+        取出当前所有写入结果，返回 [(项目ID, 是否成功, 写入内容的分区哈希, 标记), ...]
+        """
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
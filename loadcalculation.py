@@ -10,8 +10,16 @@ import json
 import os
 import sys
 import shutil  # 添加缺失的shutil导入
+import copy
+import multiprocessing
 from datetime import datetime, timedelta  # 添加对timedelta的导入
-
+from energy_engine import (
+    TIME_STEP_OPTIONS, results_to_arrays, ProjectManager, EnergyDataModel, wind_power_array,
+    STANDARD_AIR_DENSITY, TabulatedPowerCurve, pv_power_function, DEFAULT_BASE_YEAR, CalendarIndex,
+    AnnualBalanceCalculator, BalanceStatistics, OPTIMIZATION_METHODS, OPTIMIZATION_CONSTRAINTS,
+    ResultCache, BackgroundTask, ProjectAutosaver, project_data_snapshot, model_inputs_hash,
+    schedule_changes_range,
+)
 
 # 尝试导入openpyxl用于Excel导出1
 try:
@@ -24,930 +32,10 @@ except ImportError:
 plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'FangSong', 'Arial Unicode MS', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
-class ProjectManager:
-    """项目管理器"""
-    def __init__(self, app_root_path):
-        self.app_root_path = app_root_path
-        self.projects_dir = os.path.join(app_root_path, "projects")
-        self.ensure_projects_directory()
-        
-    def ensure_projects_directory(self):
-        """确保项目目录存在"""
-        if not os.path.exists(self.projects_dir):
-            os.makedirs(self.projects_dir)
-
-    def get_project_list(self):
-        """获取项目列表"""
-        projects = []
-        if os.path.exists(self.projects_dir):
-            for item in os.listdir(self.projects_dir):
-                project_path = os.path.join(self.projects_dir, item)
-                if os.path.isdir(project_path):
-                    project_info_path = os.path.join(project_path, "project_info.json")
-                    if os.path.exists(project_info_path):
-                        try:
-                            with open(project_info_path, 'r', encoding='utf-8') as f:
-                                project_info = json.load(f)
-                                projects.append({
-                                    'id': item,
-                                    'name': project_info.get('name', item),
-                                    'created_time': project_info.get('created_time', ''),
-                                    'modified_time': project_info.get('modified_time', ''),
-                                    'path': project_path
-                                })
-                        except Exception as e:
-                            print(f"读取项目信息失败: {e}")
-        return sorted(projects, key=lambda x: x['modified_time'], reverse=True)
-        
-    def create_project(self, name, description=""):
-        """创建新项目"""
-        # 生成项目ID
-        project_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        project_path = os.path.join(self.projects_dir, project_id)
-        
-        # 创建项目目录
-        os.makedirs(project_path)
-        
-        # 创建项目信息文件
-        project_info = {
-            'name': name,
-            'description': description,
-            'created_time': datetime.now().isoformat(),
-            'modified_time': datetime.now().isoformat()
-        }
-        
-        with open(os.path.join(project_path, "project_info.json"), 'w', encoding='utf-8') as f:
-            json.dump(project_info, f, ensure_ascii=False, indent=2)
-            
-        return {
-            'id': project_id,
-            'name': name,
-            'created_time': project_info['created_time'],
-            'modified_time': project_info['modified_time'],
-            'path': project_path
-        }
-        
-    def delete_project(self, project_id):
-        """删除项目"""
-        project_path = os.path.join(self.projects_dir, project_id)
-        if os.path.exists(project_path):
-            shutil.rmtree(project_path)
-            return True
-        return False
-        
-    def load_project_data(self, project_id):
-        """加载项目数据"""
-        project_path = os.path.join(self.projects_dir, project_id)
-        data_file = os.path.join(project_path, "project_data.json")
-        
-        if os.path.exists(data_file):
-            try:
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"加载项目数据失败: {e}")
-        return None
-        
-    def save_project_data(self, project_id, data):
-        """保存项目数据"""
-        project_path = os.path.join(self.projects_dir, project_id)
-        data_file = os.path.join(project_path, "project_data.json")
-        
-        # 更新项目修改时间
-        info_file = os.path.join(project_path, "project_info.json")
-        if os.path.exists(info_file):
-            try:
-                with open(info_file, 'r', encoding='utf-8') as f:
-                    project_info = json.load(f)
-                project_info['modified_time'] = datetime.now().isoformat()
-                with open(info_file, 'w', encoding='utf-8') as f:
-                    json.dump(project_info, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                print(f"更新项目信息失败: {e}")
-        
-        # 保存项目数据
-        try:
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"保存项目数据失败: {e}")
-            return False
-
-class EnergyDataModel:
-    def __init__(self):
-        # 时序数据存储 (8760小时)
-        self.electric_load_hourly = [0.0] * 8760  # 电力负荷
-        self.heat_load_hourly = [0.0] * 8760      # 热力负荷
-        self.internal_electric_rate = 0.0         # 厂用电率
-        self.solar_irradiance_hourly = [0.0] * 8760  # 光照强度
-        self.wind_speed_hourly = [0.0] * 8760     # 风速
-        self.grid_purchase_price_hourly = [0.0] * 8760  # 下网电价
-        
-        # 数据导入状态跟踪
-        self.data_imported = {
-            'electric': False,
-            'heat': False,
-            'solar': False,
-            'wind': False,
-            'grid_price': False
-        }
-        
-        # 风机型号列表，每个元素是一个字典，包含型号名称、参数、数量和计算方法
-        self.wind_turbine_models = [
-            {
-                'name': '默认型号',
-                'params': {
-                    'cut_in_wind': 3.0,
-                    'rated_wind': 12.0,
-                    'max_rated_wind': 18.0,
-                    'cut_out_wind': 25.0,
-                    'rated_power': 2000.0
-                },
-                'count': 10,
-                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
-            }
-        ]
-        
-        # 光伏型号列表，每个元素是一个字典，包含型号名称、参数、数量和计算方法
-        self.pv_models = [
-            {
-                'name': '默认型号',
-                'method': 'area_efficiency',  # 计算方法：area_efficiency(面积效率法) 或 installed_capacity(装机容量法)
-                'params': {
-                    'panel_efficiency': 0.2,
-                    'panel_area': 1000.0
-                },
-                'count': 10,  # 光伏板数量
-                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
-            }
-        ]
-        
-        self.chp_electric_params = {
-            'electric_heat_ratio': 0.5,
-            'base_electric': 100.0
-        }
-        
-        # 新增调峰机组最小出力参数
-        self.peak_power_min_summer = 0.0  # 夏季最小出力
-        self.peak_power_min_winter = 0.0  # 冬季最小出力
-        self.peak_power_max = 2000.0
-        
-        # 最大电力负荷参数
-        self.max_electric_load = 5000.0
-        
-        # 灵活负荷参数
-        self.flexible_load_max = 0.0  # 最大灵活负荷
-        self.flexible_load_min = 0.0  # 最小灵活负荷
-        
-        # 检修和投产计划数据
-        self.maintenance_schedules = []  # 检修计划列表
-        self.commissioning_schedules = []  # 投产计划列表
-        
-        # 出力限制计划数据
-        self.output_limit_schedules = []  # 出力限制计划列表
-        
-        # 优化参数
-        self.optimization_params = {
-            'basic_load_revenue': 1.0,      # 基础负荷单位收益 (元/kWh)
-            'flexible_load_revenue': 0.8,   # 灵活负荷单位收益 (元/kWh)
-            'thermal_cost': 0.2,            # 火电发电单位成本 (元/kWh)
-            'pv_cost': 0.05,               # 光伏发电单位成本 (元/kWh)
-            'wind_cost': 0.05              # 风机发电单位成本 (元/kWh)
-        }
-        
-    def calculate_wind_total_capacity(self):
-        """
-        计算风机总装机容量
-        风机总装机容量 = 每个型号的装机容量相加得到
-        其中每个型号的装机容量 = 额定功率 乘以 风机数量
-        """
-        total_capacity = 0.0
-        for model in self.wind_turbine_models:
-            rated_power = model['params'].get('rated_power', 0.0)
-            count = model.get('count', 0)
-            total_capacity += rated_power * count
-        return total_capacity
-        
-    def calculate_pv_total_capacity(self):
-        """
-        计算光伏总装机容量
-        光伏总装机容量 = 每个型号的装机容量相加得到
-        其中面积效率法型号的装机容量 = 光伏板面积 * 光伏板效率 * 光伏板数量
-        其中装机容量法型号的装机容量 = 装机容量 * 光伏板数量
-        """
-        total_capacity = 0.0
-        for model in self.pv_models:
-            method = model.get('method', 'area_efficiency')
-            count = model.get('count', 0)
-            
-            if method == 'area_efficiency':
-                # 面积效率法
-                panel_area = model['params'].get('panel_area', 0.0)
-                panel_efficiency = model['params'].get('panel_efficiency', 0.0)
-                capacity = panel_area * panel_efficiency * count
-            elif method == 'installed_capacity':
-                # 装机容量法
-                installed_capacity = model['params'].get('installed_capacity', 0.0)
-                capacity = installed_capacity * count
-            else:
-                # 默认使用面积效率法
-                panel_area = model['params'].get('panel_area', 0.0)
-                panel_efficiency = model['params'].get('panel_efficiency', 0.0)
-                capacity = panel_area * panel_efficiency * count
-                
-            total_capacity += capacity
-        return total_capacity
-        
-
-    def to_dict(self):
-        """将数据模型转换为字典，用于保存"""
-        data = {
-            'electric_load_hourly': self.electric_load_hourly,
-            'heat_load_hourly': self.heat_load_hourly,
-            'internal_electric_rate': self.internal_electric_rate,
-            'solar_irradiance_hourly': self.solar_irradiance_hourly,
-            'wind_speed_hourly': self.wind_speed_hourly,
-            'grid_purchase_price_hourly': self.grid_purchase_price_hourly,  # 下网电价
-            'data_imported': self.data_imported,
-            'wind_turbine_models': self.wind_turbine_models,
-            'pv_models': self.pv_models,
-            'chp_electric_params': self.chp_electric_params,
-            'peak_power_min_summer': self.peak_power_min_summer,
-            'peak_power_min_winter': self.peak_power_min_winter,
-            'peak_power_max': self.peak_power_max,
-            'max_electric_load': self.max_electric_load,
-            'flexible_load_max': self.flexible_load_max,
-            'flexible_load_min': self.flexible_load_min,
-            'maintenance_schedules': self.maintenance_schedules,
-            'commissioning_schedules': self.commissioning_schedules,
-            'output_limit_schedules': self.output_limit_schedules,
-            'optimization_params': self.optimization_params,
-            'optimized_results': getattr(self, 'optimized_results', None)
-        }
-        return data
-        
-    def from_dict(self, data):
-        """从字典加载数据模型"""
-        self.electric_load_hourly = data.get('electric_load_hourly', [0.0] * 8760)
-        self.heat_load_hourly = data.get('heat_load_hourly', [0.0] * 8760)
-        self.internal_electric_rate = data.get('internal_electric_rate', 0.0)
-        self.solar_irradiance_hourly = data.get('solar_irradiance_hourly', [0.0] * 8760)
-        self.wind_speed_hourly = data.get('wind_speed_hourly', [0.0] * 8760)
-        self.grid_purchase_price_hourly = data.get('grid_purchase_price_hourly', [0.0] * 8760)  # 下网电价
-        self.data_imported = data.get('data_imported', {
-            'electric': False,
-            'heat': False,
-            'solar': False,
-            'wind': False,
-            'grid_price': False
-        })
-        self.wind_turbine_models = data.get('wind_turbine_models', [
-            {
-                'name': '默认型号',
-                'params': {
-                    'cut_in_wind': 3.0,
-                    'rated_wind': 12.0,
-                    'max_rated_wind': 18.0,
-                    'cut_out_wind': 25.0,
-                    'rated_power': 2000.0
-                },
-                'count': 10,
-                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
-            }
-        ])
-        self.pv_models = data.get('pv_models', [
-            {
-                'name': '默认型号',
-                'method': 'area_efficiency',
-                'params': {
-                    'panel_efficiency': 0.2,
-                    'panel_area': 1000.0
-                },
-                'count': 10,
-                'output_correction_factor': 1.0  # 出力修正系数，默认値为1
-            }
-        ])
-        self.chp_electric_params = data.get('chp_electric_params', {
-            'electric_heat_ratio': 0.5,
-            'base_electric': 100.0
-        })
-        self.peak_power_min_summer = data.get('peak_power_min_summer', 0.0)  # 夏季最小出力
-        self.peak_power_min_winter = data.get('peak_power_min_winter', 0.0)  # 冬季最小出力
-        self.peak_power_max = data.get('peak_power_max', 2000.0)
-        self.max_electric_load = data.get('max_electric_load', 5000.0)
-        self.flexible_load_max = data.get('flexible_load_max', 0.0)  # 最大灵活负荷
-        self.flexible_load_min = data.get('flexible_load_min', 0.0)  # 最小灵活负荷
-        
-        # 加载检修和投产计划数据
-        self.maintenance_schedules = data.get('maintenance_schedules', [])
-        self.commissioning_schedules = data.get('commissioning_schedules', [])
-        
-        # 加载出力限制计划数据
-        self.output_limit_schedules = data.get('output_limit_schedules', [])
-        
-        # 加载优化参数
-        self.optimization_params = data.get('optimization_params', {
-            'basic_load_revenue': 1.0,
-            'flexible_load_revenue': 0.8,
-            'thermal_cost': 0.2,
-            'pv_cost': 0.05,
-            'wind_cost': 0.05
-        })
-        
-        # 加载优化结果（如果有）
-        if 'optimized_results' in data and data['optimized_results'] is not None:
-            self.optimized_results = data['optimized_results']
-        
-        # 加载计算结果（如果有）
-        calculation_results = data.get('calculation_results')
-        return calculation_results
-
-# 风机出力与风速函数关系
-def wind_power_function(wind_speed, params, correction_factor=1.0):
-    """
-    风机出力计算函数（修改版）
-    1) 在切入风速和设计风速之间采用2次曲线拟合，并在接近设计风速时平滑过渡
-    2) 增加一个最大额定风速，在额定风速和最大额定风速之间为额定功率，
-       在最大额定风速和切出风速之间使用线性函数
-    3) 应用出力修正系数
-    """
-    cut_in_wind = params.get('cut_in_wind', 3.0)           # 切入风速
-    rated_wind = params.get('rated_wind', 12.0)             # 额定风速
-    max_rated_wind = params.get('max_rated_wind', 18.0)     # 最大额定风速
-    cut_out_wind = params.get('cut_out_wind', 25.0)         # 切出风速
-    rated_power = params.get('rated_power', 2000.0)         # 额定功率
-    
-    # 风速低于切入风速或高于切出风速时，出力为0
-    if wind_speed < cut_in_wind or wind_speed > cut_out_wind:
-        return 0.0
-    
-    # 在切入风速和额定风速之间，采用二次曲线拟合
-    elif wind_speed < rated_wind:
-        # 二次曲线拟合，确保在额定风速处平滑过渡
-        # 使用抛物线方程: P = a * (v - v_in)^2
-        # 约束条件: 在额定风速处达到额定功率
-        a = rated_power / ((rated_wind - cut_in_wind) ** 2)
-        return a * (wind_speed - cut_in_wind) ** 2 * correction_factor
-    
-    # 在额定风速和最大额定风速之间，保持额定功率
-    elif wind_speed < max_rated_wind:
-        return rated_power * correction_factor
-    
-    # 在最大额定风速和切出风速之间，使用线性递减函数
-    else:
-        # 线性递减从额定功率到0
-        slope = rated_power / (cut_out_wind - max_rated_wind)
-        return (rated_power - slope * (wind_speed - max_rated_wind)) * correction_factor
-
-def total_wind_power_function(wind_speed, turbine_models):
-    """
-    计算所有风机型号的总出力
-    :param wind_speed: 风速
-    :param turbine_models: 风机型号列表，每个元素包含参数和数量
-    :return: 总出力
-    """
-    total_power = 0.0
-    for model in turbine_models:
-        # 计算单台风机出力，应用修正系数
-        single_power = wind_power_function(wind_speed, model['params'], model.get('output_correction_factor', 1.0))
-        # 乘以该型号风机数量
-        total_power += single_power * model['count']
-    return total_power
-
-# 光伏出力与光照强度函数关系
-def pv_power_function(irradiance, model):
-    """
-    光伏出力计算函数（支持两种计算方法）
-    :param irradiance: 光照强度 (W/m²)
-    :param model: 光伏型号参数
-    :return: 光伏出力 (kW)
-    """
-    method = model.get('method', 'area_efficiency')
-    params = model.get('params', {})
-    correction_factor = model.get('output_correction_factor', 1.0)  # 获取出力修正系数，默认为1
-    
-    if method == 'area_efficiency':
-        # 面积效率法
-        panel_efficiency = params.get('panel_efficiency', 0.2)
-        panel_area = params.get('panel_area', 1000.0)
-        return panel_area * irradiance * panel_efficiency / 1000.0 * correction_factor
-    elif method == 'installed_capacity':
-        # 装机容量法
-        installed_capacity = params.get('installed_capacity', 200.0)  # 装机容量 (kW)
-        system_efficiency = params.get('system_efficiency', 0.9)    # 系统效率
-        return irradiance / 1000.0 * installed_capacity * system_efficiency * correction_factor
-    else:
-        # 默认使用面积效率法
-        panel_efficiency = params.get('panel_efficiency', 0.2)
-        panel_area = params.get('panel_area', 1000.0)
-        return panel_area * irradiance * panel_efficiency / 1000.0 * correction_factor
-
-def total_pv_power_function(irradiance, pv_models):
-    """
-    计算所有光伏型号的总出力
-    :param irradiance: 光照强度 (W/m²)
-    :param pv_models: 光伏型号列表，每个元素包含参数和数量
-    :return: 总出力 (kW)
-    """
-    total_power = 0.0
-    for model in pv_models:
-        # 计算单个光伏型号出力
-        single_power = pv_power_function(irradiance, model)
-        # 乘以该型号光伏板数量
-        total_power += single_power * model.get('count', 1)
-    return total_power
-
-# 热电联产电出力与供热热负荷函数关系
-def chp_electric_power(heat_load, params):
-    """
-    热电联产电出力计算函数
-    """
-    electric_heat_ratio = params.get('electric_heat_ratio', 0.5)
-    base_electric = params.get('base_electric', 100.0)
-    
-    return base_electric + heat_load * electric_heat_ratio
-
-class AnnualBalanceCalculator:
-    def __init__(self, data_model):
-        self.data_model = data_model
-        
-    def is_date_in_range(self, date_str, start_date_str, end_date_str):
-        """
-        检查给定日期是否在指定范围内（包含起止日期）
-        :param date_str: 检查的日期字符串 (YYYY-MM-DD)
-        :param start_date_str: 起始日期字符串 (YYYY-MM-DD)
-        :param end_date_str: 结束日期字符串 (YYYY-MM-DD)
-        :return: 是否在范围内
-        """
-        try:
-            from datetime import datetime
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-            return start_date <= date <= end_date
-        except ValueError:
-            # 如果日期解析失败，返回False
-            return False
-    
-    def calculate_interpolation_factor(self, hour, start_date_str, end_date_str):
-        """
-        计算线性插值因子
-        :param hour: 小时索引 (0-8759)
-        :param start_date_str: 起始日期字符串 (YYYY-MM-DD)
-        :param end_date_str: 结束日期字符串 (YYYY-MM-DD)
-        :return: 插值因子 (0.0-1.0)
-        """
-        try:
-            from datetime import datetime, timedelta
-            # 计算当前日期
-            base_date = datetime(2024, 1, 1)
-            current_date = base_date + timedelta(hours=hour)
-            current_date_str = current_date.strftime("%Y-%m-%d")
-            
-            # 如果在开始日期之前，因子为0
-            if current_date < datetime.strptime(start_date_str, "%Y-%m-%d"):
-                return 0.0
-                
-            # 如果在结束日期之后，因子为1
-            if current_date > datetime.strptime(end_date_str, "%Y-%m-%d"):
-                return 1.0
-                
-            # 计算在范围内的位置
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-            
-            total_days = (end_date - start_date).days
-            elapsed_days = (current_date - start_date).days
-            
-            if total_days == 0:
-                return 1.0
-                
-            return elapsed_days / total_days
-            
-        except ValueError:
-            # 如果日期解析失败，返回0
-            return 0.0
-    
-    def get_active_maintenance_schedules(self, hour):
-        """
-        获取在指定小时处于活动状态的检修计划
-        :param hour: 小时索引 (0-8759)
-        :return: 活动的检修计划列表
-        """
-        # 计算日期 (假设从2024年1月1日开始)
-        from datetime import datetime, timedelta
-        base_date = datetime(2024, 1, 1)
-        current_date = base_date + timedelta(hours=hour)
-        current_date_str = current_date.strftime("%Y-%m-%d")
-        
-        active_schedules = []
-        for schedule in self.data_model.maintenance_schedules:
-            if self.is_date_in_range(current_date_str, 
-                                   schedule.get('start_date', ''), 
-                                   schedule.get('end_date', '')):
-                active_schedules.append(schedule)
-                
-        return active_schedules
-    
-    def get_active_commissioning_schedules(self, hour):
-        """
-        获取在指定小时处于活动状态的投产计划
-        对于投产计划，不仅在计划日期范围内需要激活，在计划开始日期之前也需要激活（用于投产前修正）
-        :param hour: 小时索引 (0-8759)
-        :return: 活动的投产计划列表
-        """
-        # 计算日期 (假设从2024年1月1日开始)
-        from datetime import datetime, timedelta
-        base_date = datetime(2024, 1, 1)
-        current_date = base_date + timedelta(hours=hour)
-        current_date_str = current_date.strftime("%Y-%m-%d")
-        
-        active_schedules = []
-        for schedule in self.data_model.commissioning_schedules:
-            start_date_str = schedule.get('start_date', '')
-            end_date_str = schedule.get('end_date', '')
-            
-            # 检查当前日期是否在投产计划的起止日期范围内，或者在起始日期之前
-            # 如果在开始日期之前，也要激活计划（用于投产前修正）
-            try:
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-                if current_date <= start_date or self.is_date_in_range(current_date_str, start_date_str, end_date_str):
-                    active_schedules.append(schedule)
-            except ValueError:
-                # 如果日期解析失败，使用原来的逻辑
-                if self.is_date_in_range(current_date_str, start_date_str, end_date_str):
-                    active_schedules.append(schedule)
-                
-        return active_schedules
-    
-    def get_active_output_limit_schedules(self, hour, limit_type=None):
-        """
-        获取在指定小时处于活动状态的出力限制计划
-        :param hour: 小时索引 (0-8759)
-        :param limit_type: 限制类型，如果为None则返回所有类型的限制计划
-        :return: 活动的出力限制计划列表
-        """
-        # 计算日期 (假设从2024年1月1日开始)
-        from datetime import datetime
-        base_date = datetime(2024, 1, 1)
-        current_date = base_date + timedelta(hours=hour)
-        current_date_str = current_date.strftime("%Y-%m-%d")
-        
-        active_schedules = []
-        for schedule in self.data_model.output_limit_schedules:
-            # 如果指定了限制类型，则只返回该类型的计划
-            if limit_type and schedule.get('limit_type', '') != limit_type:
-                continue
-                
-            if self.is_date_in_range(current_date_str, 
-                                   schedule.get('start_date', ''), 
-                                   schedule.get('end_date', '')):
-                active_schedules.append(schedule)
-                
-        return active_schedules
-    
-    def calculate_annual_balance(self):
-        """
-        计算年度8760小时的能源平衡
-        根据新公式计算各项参数
-        """
-        results = {
-            'hourly_internal_electric_load': [0.0] * 8760,  # 厂用电负荷
-            'hourly_total_load': [0.0] * 8760,              # 总负荷
-            'hourly_chp_output': [0.0] * 8760,              # 热定电机组出力
-            'hourly_pv_output': [0.0] * 8760,               # 光伏最大出力
-            'hourly_wind_output': [0.0] * 8760,             # 风机最大出力
-            'hourly_peak_pending_output': [0.0] * 8760,     # 调峰机组待定出力
-            'hourly_peak_output': [0.0] * 8760,             # 调峰机组出力
-            'hourly_thermal_output': [0.0] * 8760,          # 火电出力
-            'hourly_generation': [0.0] * 8760,              # 总出力
-            'hourly_wind_pv_abandon': [0.0] * 8760,         # 风机光伏放弃出力
-            'hourly_wind_pv_actual': [0.0] * 8760,          # 风机光伏实际出力
-            'hourly_grid_load': [0.0] * 8760,               # 下网负荷
-            'hourly_abandon_rate': [0.0] * 8760,            # 弃光风率
-            'hourly_corrected_electric_load': [0.0] * 8760,  # 修正后电力负荷
-            'hourly_flexible_load_consumption': [0.0] * 8760  # 灵活负荷消纳量
-        }
-        
-        # 保存原始参数用于检修修正计算
-        original_peak_power_max = self.data_model.peak_power_max
-        original_peak_power_min_summer = self.data_model.peak_power_min_summer  # 夏季最小出力
-        original_peak_power_min_winter = self.data_model.peak_power_min_winter  # 冬季最小出力
-        original_electric_load = list(self.data_model.electric_load_hourly)  # 复制一份
-        
-        for hour in range(8760):
-            # 获取当前小时的活动检修计划和投产计划
-            active_maintenance_schedules = self.get_active_maintenance_schedules(hour)
-            active_commissioning_schedules = self.get_active_commissioning_schedules(hour)
-            
-            # 初始化当前小时的参数
-            current_peak_power_max = original_peak_power_max
-            
-            # 根据月份确定当前应该使用的最小出力
-            from datetime import datetime, timedelta
-            base_date = datetime(2024, 1, 1)
-            current_date = base_date + timedelta(hours=hour)
-            current_month = current_date.month
-            
-            if 5 <= current_month <= 9:  # 夏季：5-9月
-                current_peak_power_min = original_peak_power_min_summer
-            else:  # 冬季：10-12月和1-4月
-                current_peak_power_min = original_peak_power_min_winter
-                
-            current_electric_load = original_electric_load[hour]
-            current_max_load = max(original_electric_load) if original_electric_load else 1.0  # 防止除零错误
-            
-            # 计算检修计划和投运计划对用电负荷的总影响
-            maintenance_load_reduction = 0.0  # 检修计划对用电负荷的减少量
-            commissioning_load_reduction = 0.0  # 投运计划对用电负荷的减少量（开始前）或增加量（结束后）
-            
-            # 收集检修计划对用电负荷的影响
-            for schedule in active_maintenance_schedules:
-                power_type = schedule.get('power_type', '')
-                power_size = schedule.get('power_size', 0.0)
-                
-                if power_type == '调峰机组出力':
-                    # 新最大负荷 = 原最大负荷 - 影响负荷出力大小
-                    current_peak_power_max = current_peak_power_max - power_size
-                    # 新最小负荷 = 原最小负荷 * （新最大负荷/原最大负荷）
-                    if original_peak_power_max > 0:
-                        # 分别调整夏季和冬季最小出力
-                        if 5 <= current_date.month <= 9:  # 夏季
-                            current_peak_power_min = original_peak_power_min_summer * (current_peak_power_max / original_peak_power_max)
-                        else:  # 冬季
-                            current_peak_power_min = original_peak_power_min_winter * (current_peak_power_max / original_peak_power_max)
-                        
-                elif power_type == '用电负荷':
-                    maintenance_load_reduction += power_size
-            
-            # 收集投运计划对用电负荷的影响（线性变化）
-            for schedule in active_commissioning_schedules:
-                power_type = schedule.get('power_type', '')
-                power_size = schedule.get('power_size', 0.0)
-                start_date = schedule.get('start_date', '')
-                end_date = schedule.get('end_date', '')
-                
-                # 计算线性插值因子
-                interpolation_factor = self.calculate_interpolation_factor(hour, start_date, end_date)
-                
-                if power_type == '光伏出力':
-                    # 在投产开始日期前，其最大出力修正为原最大出力减去设置的影响出力负荷大小
-                    # 在投产结束日后，最大出力即为原最大出力
-                    # 在投产期间，采用线性变化
-                    pass  # 光伏出力的修正将在计算光伏出力时处理
-                    
-                elif power_type == '风机出力':
-                    # 在投产开始日期前，其最大出力修正为原最大出力减去设置的影响出力负荷大小
-                    # 在投产结束日后，最大出力即为原最大出力
-                    # 在投产期间，采用线性变化
-                    pass  # 风机出力的修正将在计算风机出力时处理
-                    
-                elif power_type == '调峰机组最大出力':
-                    # 在投产开始日期前，修正的调峰机组最大负荷为原调峰机组最大负荷减去设置的影响出力负荷大小
-                    # 在投产结束日后，修正的调峰机组最大负荷即为原调峰机组最大负荷
-                    # 在投产期间，采用线性变化。即最大负荷随着投产进行逐步增大
-                    adjusted_power_size = power_size * interpolation_factor
-                    current_peak_power_max = current_peak_power_max - (power_size - adjusted_power_size)
-                    
-                elif power_type == '调峰机组夏季最小出力':
-                    # 在投产开始日期前，修正的调峰机组夏季最小负荷为原调峰机组夏季最小负荷
-                    # 在投产结束日后，修正的调峰机组夏季最小负荷即为原调峰机组夏季最小负荷减去设置的影响出力负荷大小
-                    # 在投产期间，采用线性变化。即最小负荷随着投产进行逐步减小
-                    adjusted_power_size = power_size * interpolation_factor
-                    if 5 <= current_date.month <= 9:  # 夏季：5-9月
-                        current_peak_power_min = original_peak_power_min_summer - adjusted_power_size
-                elif power_type == '调峰机组冬季最小出力':
-                    # 在投产开始日期前，修正的调峰机组冬季最小负荷为原调峰机组冬季最小负荷
-                    # 在投产结束日后，修正的调峰机组冬季最小负荷即为原调峰机组冬季最小负荷减去设置的影响出力负荷大小
-                    # 在投产期间，采用线性变化。即最小负荷随着投产进行逐步减小
-                    adjusted_power_size = power_size * interpolation_factor
-                    if current_date.month < 5 or current_date.month > 9:  # 冬季：10-12月和1-4月
-                        current_peak_power_min = original_peak_power_min_winter - adjusted_power_size
-                elif power_type == '调峰机组最小出力':
-                    # 为了向后兼容，仍然支持原有的调峰机组最小出力设置
-                    # 在投产开始日期前，修正的调峰机组最小负荷为原调峰机组最小负荷
-                    # 在投产结束日后，修正的调峰机组最小负荷即为原调峰机组最小负荷减去设置的影响出力负荷大小
-                    # 在投产期间，采用线性变化。即最小负荷随着投产进行逐步减小
-                    adjusted_power_size = power_size * interpolation_factor
-                    if 5 <= current_date.month <= 9:  # 夏季
-                        current_peak_power_min = original_peak_power_min_summer - adjusted_power_size
-                    else:  # 冬季
-                        current_peak_power_min = original_peak_power_min_winter - adjusted_power_size
-                    
-                elif power_type == '用电负荷':
-                    # 投运计划对用电负荷的影响是渐变的：开始前是全部影响，结束后是无影响，中间线性变化
-                    adjusted_power_size = power_size * (1 - interpolation_factor)  # 1-interpolation_factor 表示剩余影响
-                    commissioning_load_reduction += adjusted_power_size
-            
-            # 应用检修计划和投运计划对用电负荷的综合影响
-            # 用电负荷 = 原始用电负荷 / 最大电力负荷 * (最大电力负荷 - 检修影响 - 投运影响)
-            if current_max_load > 0:
-                current_electric_load = current_electric_load / current_max_load * (current_max_load - maintenance_load_reduction - commissioning_load_reduction)
-            
-            # 保存修正后的电力负荷，以便在输出中显示
-            results['hourly_corrected_electric_load'][hour] = current_electric_load
-            
-            # 使用迭代方法计算厂用电负荷和总负荷，解决循环依赖问题
-            # 初始化：先使用传统方法计算初始值
-            internal_electric_load = current_electric_load * self.data_model.internal_electric_rate
-            total_load = current_electric_load + internal_electric_load
-            
-            # 迭代计算，直到收敛或达到最大迭代次数
-            max_iterations = 10  # 最大迭代次数
-            tolerance = 1e-6     # 收敛阈值
-            
-            for iteration in range(max_iterations):
-                # 保存上一次的值用于比较
-                prev_internal_electric_load = internal_electric_load
-                prev_total_load = total_load
-                
-                # 3) 热定电机组出力 = 热力负荷 * 电热比
-                chp_output = (
-                    self.data_model.heat_load_hourly[hour] * 
-                    self.data_model.chp_electric_params['electric_heat_ratio']
-                )
-                
-                # 4) 光伏最大出力 = 根据所有光伏型号计算总出力
-                pv_output = total_pv_power_function(
-                    self.data_model.solar_irradiance_hourly[hour],
-                    self.data_model.pv_models
-                )
-                
-                # 收集所有光伏出力相关的投产计划
-                pv_schedules = []
-                for schedule in active_commissioning_schedules:
-                    if schedule.get('power_type', '') == '光伏出力':
-                        pv_schedules.append(schedule)
-                
-                # 应用出力限制计划对光伏出力的修正
-                active_pv_limit_schedules = self.get_active_output_limit_schedules(hour, '光伏最大出力限制')
-                if active_pv_limit_schedules:
-                    # 如果有多个限制计划，取最小的限制值
-                    min_limit = min([schedule.get('power_size', float('inf')) for schedule in active_pv_limit_schedules])
-                    # 限制光伏出力不超过设定值
-                    pv_output = min(pv_output, min_limit)
-                
-                # 应用投产计划对光伏出力的修正（支持多个计划叠加）
-                if pv_schedules:
-                    # 获取光伏总装机容量
-                    total_pv_capacity = self.data_model.calculate_pv_total_capacity()
-                    if total_pv_capacity > 0:
-                        # 计算累计影响
-                        cumulative_impact = 0.0
-                        for schedule in pv_schedules:
-                            power_size = schedule.get('power_size', 0.0)
-                            start_date = schedule.get('start_date', '')
-                            end_date = schedule.get('end_date', '')
-                            
-                            # 计算线性插值因子
-                            interpolation_factor = self.calculate_interpolation_factor(hour, start_date, end_date)
-                            
-                            # 累计影响（投产前为全部影响，投产后为0影响）
-                            if interpolation_factor < 1:  # 投产前或投产中
-                                # 投产前影响是全部，投产中是部分影响
-                                impact = power_size * (1 - interpolation_factor)
-                                cumulative_impact += impact
-                        
-                        # 应用累计修正
-                        adjusted_output_factor = (total_pv_capacity - cumulative_impact) / total_pv_capacity
-                        pv_output = pv_output * adjusted_output_factor
-                
-                # 5) 风机最大出力 = 根据所有风机型号计算总出力
-                wind_output = total_wind_power_function(
-                    self.data_model.wind_speed_hourly[hour],
-                    self.data_model.wind_turbine_models
-                )
-                
-                # 收集所有风机出力相关的投产计划
-                wind_schedules = []
-                for schedule in active_commissioning_schedules:
-                    if schedule.get('power_type', '') == '风机出力':
-                        wind_schedules.append(schedule)
-                
-                # 应用出力限制计划对风机出力的修正
-                active_wind_limit_schedules = self.get_active_output_limit_schedules(hour, '风机最大出力限制')
-                if active_wind_limit_schedules:
-                    # 如果有多个限制计划，取最小的限制值
-                    min_limit = min([schedule.get('power_size', float('inf')) for schedule in active_wind_limit_schedules])
-                    # 限制风机出力不超过设定值
-                    wind_output = min(wind_output, min_limit)
-                
-                # 应用投产计划对风机出力的修正（支持多个计划叠加）
-                if wind_schedules:
-                    # 获取风机总装机容量
-                    total_wind_capacity = self.data_model.calculate_wind_total_capacity()
-                    if total_wind_capacity > 0:
-                        # 计算累计影响
-                        cumulative_impact = 0.0
-                        for schedule in wind_schedules:
-                            power_size = schedule.get('power_size', 0.0)
-                            start_date = schedule.get('start_date', '')
-                            end_date = schedule.get('end_date', '')
-                            
-                            # 计算线性插值因子
-                            interpolation_factor = self.calculate_interpolation_factor(hour, start_date, end_date)
-                            
-                            # 累计影响（投产前为全部影响，投产后为0影响）
-                            if interpolation_factor < 1:  # 投产前或投产中
-                                # 投产前影响是全部，投产中是部分影响
-                                impact = power_size * (1 - interpolation_factor)
-                                cumulative_impact += impact
-                        
-                        # 应用累计修正
-                        adjusted_output_factor = (total_wind_capacity - cumulative_impact) / total_wind_capacity
-                        wind_output = wind_output * adjusted_output_factor
-                
-                # 6) 调峰机组待定出力 = 总负荷 - 热定电机组出力 - 光伏最大出力 - 风机最大出力
-                peak_pending_output = total_load - chp_output - pv_output - wind_output
-                
-                # 7) 调峰机组出力 = max(min(调峰机组待定出力, 调峰机组最大出力），调峰机组最小出力）
-                peak_output = max(
-                    min(peak_pending_output, current_peak_power_max),
-                    current_peak_power_min
-                )
-                
-                # 8) 火电出力 = 热定电机组出力 + 调峰机组出力
-                thermal_output = chp_output + peak_output
-                
-                # 使用新的公式计算厂用电负荷: 厂用电负荷 = 火电出力 * 厂用电率
-                internal_electric_load = thermal_output * self.data_model.internal_electric_rate
-                
-                # 重新计算总负荷，使用修正后的电力负荷
-                total_load = current_electric_load + internal_electric_load
-                
-                # 检查收敛性
-                load_diff = abs(total_load - prev_total_load)
-                if load_diff < tolerance:
-                    # 已收敛，跳出迭代循环
-                    break
-            
-            # 9) 风机光伏放弃出力 = max（当前月份对应的调峰机组最小出力 - 调峰机组待定出力，0）
-            wind_pv_abandon = max(current_peak_power_min - peak_pending_output, 0)
-            
-            # 10) 应用灵活负荷消纳逻辑
-            # 2-1）当光伏及风力放弃出力小于最小灵活负荷时，灵活负荷不启动，不消纳；
-            # 2-2）当光伏及风力放弃出力大于等于最小灵活负荷时，小于等于最大灵活负荷时，所有放弃出力都被灵活负荷消纳。
-            # 2-3) 当光伏及风力放弃出力大于最大灵活负荷时，新消纳的出力等于最大灵活负荷，剩余部分出力继续放弃。
-            flexible_load_max = self.data_model.flexible_load_max
-            flexible_load_min = self.data_model.flexible_load_min
-            
-            if wind_pv_abandon >= flexible_load_min:
-                # 当放弃出力大于等于最小灵活负荷时，启动灵活负荷消纳
-                if wind_pv_abandon <= flexible_load_max:
-                    # 当放弃出力小于等于最大灵活负荷时，全部消纳
-                    actual_flexible_load = wind_pv_abandon
-                else:
-                    # 当放弃出力大于最大灵活负荷时，只消纳最大灵活负荷
-                    actual_flexible_load = flexible_load_max
-            else:
-                # 当放弃出力小于最小灵活负荷时，不启动灵活负荷
-                actual_flexible_load = 0.0
-            
-            # 11) 修正计算结果中风机光伏放弃出力
-            # 新的风机光伏放弃出力 = 原风机光伏放弃出力 - 新增的灵活负荷消纳出力
-            corrected_wind_pv_abandon = max(wind_pv_abandon - actual_flexible_load, 0)  # 确保不为负数
-            
-            # 10) 新的光伏风电实际出力 = （光伏最大出力+风机最大出力）- 新的风机光伏放弃出力
-            wind_pv_actual = (pv_output + wind_output) - corrected_wind_pv_abandon
-            
-            # 11) 总出力 = 光伏出力 + 风机出力 + 火电出力 - 新的风机光伏放弃出力
-            generation = pv_output + wind_output + thermal_output - corrected_wind_pv_abandon
-            
-            # 12) 弃光风率 = 新的风机光伏放弃出力 / (光伏最大出力 + 风机最大出力)，避免除零错误
-            abandon_rate = 0
-            if (pv_output + wind_output) > 0:
-                abandon_rate = corrected_wind_pv_abandon / (pv_output + wind_output)
-            else:
-                abandon_rate = 0
-            
-            # 13) 修正下网负荷计算
-            # 下网负荷 = 总负荷 + 新增的灵活负荷消纳出力 - 总出力
-            grid_load = total_load + actual_flexible_load - generation
-            
-            # 记录灵活负荷消纳量
-            results['hourly_flexible_load_consumption'][hour] = actual_flexible_load
-            
-            # 存储修正后的风机光伏放弃出力和实际出力
-            results['hourly_wind_pv_abandon'][hour] = corrected_wind_pv_abandon
-            results['hourly_wind_pv_actual'][hour] = wind_pv_actual
-            
-            # 存储结果
-            results['hourly_internal_electric_load'][hour] = internal_electric_load
-            results['hourly_total_load'][hour] = total_load
-            results['hourly_chp_output'][hour] = chp_output
-            results['hourly_pv_output'][hour] = pv_output
-            results['hourly_wind_output'][hour] = wind_output
-            results['hourly_peak_pending_output'][hour] = peak_pending_output
-            results['hourly_peak_output'][hour] = peak_output
-            results['hourly_thermal_output'][hour] = thermal_output
-            results['hourly_generation'][hour] = generation
-            results['hourly_wind_pv_abandon'][hour] = wind_pv_abandon
-            results['hourly_wind_pv_actual'][hour] = wind_pv_actual
-            results['hourly_grid_load'][hour] = grid_load
-            results['hourly_abandon_rate'][hour] = abandon_rate
-            
-        return results
+# 自动保存的去抖动时间（秒）、写入结果的轮询间隔（毫秒），以及返回项目列表或关闭窗口时等待写入完成的最长时间（秒）
+AUTOSAVE_DELAY = 0.8
+AUTOSAVE_POLL_MS = 200
+AUTOSAVE_FLUSH_TIMEOUT = 30
 
 class EnergyBalanceApp:
     def __init__(self, root):
@@ -974,6 +62,16 @@ class EnergyBalanceApp:
         self.calculator = AnnualBalanceCalculator(self.data_model)
         self.results = None
         
+        # 后台计算任务（平衡计算和优化计算）
+        self.calculation_task = None
+        self.optimization_task = None
+        # 计算结果缓存（本次运行期间在各项目和各方案之间共用）
+        self.result_cache = ResultCache()
+        # 后台自动保存（合并短时间内的多次保存请求）
+        self.autosaver = ProjectAutosaver(self.project_manager, AUTOSAVE_DELAY)
+        self.autosave_poll_id = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # 初始化图表交互变量
         self.pan_mode = False
         self.zoom_mode = False
@@ -1003,23 +101,36 @@ class EnergyBalanceApp:
         new_project_btn = ttk.Button(main_frame, text="新建项目", command=self.create_new_project)
         new_project_btn.pack(pady=(0, 20))
         
+        # 按名称搜索项目
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(pady=(0, 10))
+        ttk.Label(search_frame, text="搜索项目名称:").pack(side=tk.LEFT)
+        self.project_search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.project_search_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.project_search_var.trace_add('write', lambda *args: self.load_project_list())
+        
         # 项目列表
         projects_frame = ttk.LabelFrame(main_frame, text="项目列表", padding="10")
         projects_frame.pack(fill=tk.BOTH, expand=True)
         
         # 创建表格来显示项目列表
-        columns = ('项目名称', '创建时间', '修改时间')
+        columns = ('项目名称', '创建时间', '修改时间', '新能源电量(万kWh)', '弃电率')
         self.projects_tree = ttk.Treeview(projects_frame, columns=columns, show='headings', height=15)
         
-        # 定义列标题
-        self.projects_tree.heading('项目名称', text='项目名称')
-        self.projects_tree.heading('创建时间', text='创建时间')
-        self.projects_tree.heading('修改时间', text='修改时间')
+        # 定义列标题，点击名称和时间列标题按该列排序（再次点击反向）
+        self.project_sort = ('modified_time', True)
+        self.projects_tree.heading('项目名称', text='项目名称', command=lambda: self.sort_project_list('name'))
+        self.projects_tree.heading('创建时间', text='创建时间', command=lambda: self.sort_project_list('created_time'))
+        self.projects_tree.heading('修改时间', text='修改时间', command=lambda: self.sort_project_list('modified_time'))
+        self.projects_tree.heading('新能源电量(万kWh)', text='新能源电量(万kWh)')
+        self.projects_tree.heading('弃电率', text='弃电率')
         
         # 定义列宽度
         self.projects_tree.column('项目名称', width=200)
         self.projects_tree.column('创建时间', width=150)
         self.projects_tree.column('修改时间', width=150)
+        self.projects_tree.column('新能源电量(万kWh)', width=130)
+        self.projects_tree.column('弃电率', width=80)
         
         # 添加滚动条
         scrollbar_y = ttk.Scrollbar(projects_frame, orient=tk.VERTICAL, command=self.projects_tree.yview)
@@ -1052,19 +163,32 @@ class EnergyBalanceApp:
         for item in self.projects_tree.get_children():
             self.projects_tree.delete(item)
         
-        # 获取项目列表
-        projects = self.project_manager.get_project_list()
+        # 获取项目列表（来自项目索引，按搜索文字过滤并按所选列排序）
+        sort_by, reverse = self.project_sort
+        projects = self.project_manager.get_project_list(self.project_search_var.get(), sort_by, reverse)
         
-        # 添加到Treeview
+        # 添加到Treeview，年度指标为项目上次保存的计算结果汇总
         for project in projects:
             created_time = datetime.fromisoformat(project['created_time']).strftime('%Y-%m-%d %H:%M')
             modified_time = datetime.fromisoformat(project['modified_time']).strftime('%Y-%m-%d %H:%M')
-            self.projects_tree.insert('', tk.END, values=(project['name'], created_time, modified_time),
-                                     tags=(project['id'],))
+            kpis = project.get('kpis')
+            renewable_energy = f"{kpis['renewable_energy'] / 1e4:,.1f}" if kpis else ''
+            abandon_rate = f"{kpis['abandon_rate'] * 100:.2f}%" if kpis else ''
+            self.projects_tree.insert('', tk.END,
+                                      values=(project['name'], created_time, modified_time, renewable_energy, abandon_rate),
+                                      tags=(project['id'],))
         
         # 绑定双击事件到项目名称列，用于编辑项目名称
         self.projects_tree.bind('<Double-1>', self.on_project_name_double_click)
         
+    def sort_project_list(self, sort_by):
+        """
+        按指定列排序项目列表，再次点击同一列时反向排序
+        """
+        current, reverse = self.project_sort
+        self.project_sort = (sort_by, not reverse if sort_by == current else sort_by != 'name')
+        self.load_project_list()
+        
     def on_project_name_double_click(self, event):
         """
         处理项目名称列双击事件，用于编辑项目名称
@@ -1105,27 +229,13 @@ class EnergyBalanceApp:
             
             if new_name and new_name != current_name:
                 # 检查新名称是否与其他项目重名
-                all_projects = self.project_manager.get_project_list()
-                for proj in all_projects:
-                    if proj['name'] == new_name and proj['id'] != project_id:
-                        messagebox.showwarning("警告", f"项目名称 '{new_name}' 已存在，请选择其他名称！")
-                        return
+                if self.project_manager.project_name_exists(new_name, exclude_id=project_id):
+                    messagebox.showwarning("警告", f"项目名称 '{new_name}' 已存在，请选择其他名称！")
+                    return
                 
-                # 更新项目信息
+                # 更新项目信息（同时更新项目索引）
                 try:
-                    # 加载项目信息文件
-                    project_info_path = os.path.join(self.project_manager.projects_dir, project_id, "project_info.json")
-                    if os.path.exists(project_info_path):
-                        with open(project_info_path, 'r', encoding='utf-8') as f:
-                            project_info = json.load(f)
-                        
-                        # 更新项目名称
-                        project_info['name'] = new_name
-                        
-                        # 保存项目信息文件
-                        with open(project_info_path, 'w', encoding='utf-8') as f:
-                            json.dump(project_info, f, ensure_ascii=False, indent=2)
-                        
+                    if self.project_manager.rename_project(project_id, new_name):
                         # 更新Treeview显示
                         values = list(self.projects_tree.item(item, 'values'))
                         values[0] = new_name
@@ -1270,8 +380,7 @@ class EnergyBalanceApp:
                 return
             
             # 检查新项目名称是否已存在
-            projects = self.project_manager.get_project_list()
-            if any(p['name'] == new_name for p in projects):
+            if self.project_manager.project_name_exists(new_name):
                 messagebox.showwarning("警告", f"项目名称 '{new_name}' 已存在，请选择其他名称！")
                 return
             
@@ -1321,11 +430,8 @@ class EnergyBalanceApp:
         if self.current_project:
             project_data = self.project_manager.load_project_data(self.current_project['id'])
             if project_data is not None:  # 修改判断条件，允许空数据
-                calculation_results = self.data_model.from_dict(project_data)
-                if calculation_results:
-                    self.results = calculation_results
-                    # 显示结果
-                    self.display_results()
+                # 已保存的计算结果直接恢复，由auto_load_existing_data显示
+                self.results = self.data_model.from_dict(project_data)
                 # 更新数据统计和趋势图
                 self.update_statistics()
                 self.update_imported_data_plot()
@@ -1349,32 +455,40 @@ class EnergyBalanceApp:
         自动加载已存在的数据或计算结果
         """
         if self.current_project:
-            project_data = self.project_manager.load_project_data(self.current_project['id'])
-            if project_data is not None:
-                # 检查是否已存在导入的数据
-                has_imported_data = any([
-                    any(self.data_model.electric_load_hourly),
-                    any(self.data_model.heat_load_hourly),
-                    any(self.data_model.solar_irradiance_hourly),
-                    any(self.data_model.wind_speed_hourly)
-                ])
+            # 项目数据已由enter_main_app加载到数据模型中，无需再次读取项目文件
+            # 检查是否已存在导入的数据
+            has_imported_data = any([
+                np.any(self.data_model.electric_load_hourly),
+                np.any(self.data_model.heat_load_hourly),
+                np.any(self.data_model.solar_irradiance_hourly),
+                np.any(self.data_model.wind_speed_hourly)
+            ])
+            
+            if has_imported_data:
+                # 更新数据统计和趋势图
+                self.update_statistics()
+                self.update_imported_data_plot()
                 
-                if has_imported_data:
-                    # 更新数据统计和趋势图
-                    self.update_statistics()
-                    self.update_imported_data_plot()
-                    
-                # 检查是否已存在计算结果
-                if 'calculation_results' in project_data and project_data['calculation_results']:
-                    self.results = project_data['calculation_results']
-                    self.display_results()
-                    self.update_plot()
+            # 检查是否已存在计算结果（随项目保存，打开项目时无需重算）
+            if self.results:
+                self.display_results()
+                self.update_plot()
+                if self.data_model.calculation_results_stale():
+                    self.result_text.insert('1.0', "注意：以下为已保存的计算结果，计算之后输入数据已修改，请重新计算。\n\n")
         
     def return_to_project_list(self):
         """返回项目列表界面"""
-        # 保存当前项目数据
+        # 取消仍在进行的后台计算，其结果不再写回
+        for task_attr in ('calculation_task', 'optimization_task'):
+            task = getattr(self, task_attr, None)
+            if task is not None:
+                task.cancel()
+                setattr(self, task_attr, None)
+        
+        # 保存当前项目数据，并等待后台写入完成
         if self.current_project:
             self.save_current_project()
+        self.flush_autosave()
             
         # 清除当前项目
         self.current_project = None
@@ -1425,7 +539,7 @@ class EnergyBalanceApp:
         back_btn.grid(row=0, column=3, sticky=tk.E, padx=5, pady=5)
         
         # 数据说明
-        info_label = ttk.Label(tab, text="请导入包含8760小时数据的CSV文件\n"
+        info_label = ttk.Label(tab, text="请导入包含全年逐时段数据的CSV文件（逐小时8760行，15分钟35040行，5分钟105120行）\n"
                                          "文件应包含列: 时间, 电力负荷(kW), 热力负荷(kW), 光照强度(W/m²), 风速(m/s)")
         info_label.grid(row=1, column=0, columnspan=4, pady=(0, 20), sticky=tk.W)
         
@@ -1481,47 +595,49 @@ class EnergyBalanceApp:
             messagebox.showerror("错误", "开始日期不能晚于结束日期")
             return
         
-        if start_hour < 0 or end_hour >= 8760:
-            messagebox.showerror("错误", "日期超出范围，应在2025-01-01至2025-12-31之间")
+        calendar = self.get_calendar()
+        if start_hour < 0 or start_hour >= calendar.hours:
+            messagebox.showerror("错误", f"日期超出范围，应在{calendar.base_date:%Y-%m-%d}至{calendar.last_date:%Y-%m-%d}之间")
             return
+        # 结束日期超出数据范围时截取到最后一个小时
+        end_hour = min(end_hour, calendar.hours - 1)
         
         # 获取时间段内的数据
         hours = list(range(start_hour, end_hour + 1))
         
-        # 将小时转换为日期格式
-        dates = [datetime(2025, 1, 1) + timedelta(hours=h) for h in hours]
-        date_labels = [d.strftime('%m-%d') for d in dates]
+        # 将小时转换为matplotlib日期数值
+        dates = calendar.date_nums[start_hour:end_hour + 1]
         
         # 绘制已导入的数据
         lines = []  # 存储所有绘制的线条
         labels = []  # 存储所有标签
         
         if self.data_model.data_imported['electric']:
-            electric_data = [self.data_model.electric_load_hourly[i] for i in hours]
+            electric_data = self.data_model.electric_load_hourly[start_hour:end_hour + 1]
             line, = self.data_ax.plot(dates, electric_data, label='电力负荷(kW)', linewidth=0.5)
             lines.append(line)
             labels.append('电力负荷(kW)')
             
         if self.data_model.data_imported['heat']:
-            heat_data = [self.data_model.heat_load_hourly[i] for i in hours]
+            heat_data = self.data_model.heat_load_hourly[start_hour:end_hour + 1]
             line, = self.data_ax.plot(dates, heat_data, label='热力负荷(kW)', linewidth=0.5)
             lines.append(line)
             labels.append('热力负荷(kW)')
             
         if self.data_model.data_imported['solar']:
-            solar_data = [self.data_model.solar_irradiance_hourly[i] for i in hours]
+            solar_data = self.data_model.solar_irradiance_hourly[start_hour:end_hour + 1]
             line, = self.data_ax.plot(dates, solar_data, label='光照强度(W/m²)', linewidth=0.5)
             lines.append(line)
             labels.append('光照强度(W/m²)')
             
         if self.data_model.data_imported['wind']:
-            wind_data = [self.data_model.wind_speed_hourly[i] for i in hours]
+            wind_data = self.data_model.wind_speed_hourly[start_hour:end_hour + 1]
             line, = self.data_ax.plot(dates, wind_data, label='风速(m/s)', linewidth=0.5)
             lines.append(line)
             labels.append('风速(m/s)')
         
         if self.data_model.data_imported['grid_price']:
-            grid_price_data = [self.data_model.grid_purchase_price_hourly[i] for i in hours]
+            grid_price_data = self.data_model.grid_purchase_price_hourly[start_hour:end_hour + 1]
             line, = self.data_ax.plot(dates, grid_price_data, label='下网电价(元/kWh)', linewidth=0.5)
             lines.append(line)
             labels.append('下网电价(元/kWh)')
@@ -1531,10 +647,11 @@ class EnergyBalanceApp:
         self.data_ax.set_title(f'已导入数据趋势图 ({self.start_date_var.get()} 至 {self.end_date_var.get()})')
         
         # 设置x轴日期格式
+        self.data_ax.xaxis_date()
         self.data_ax.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%m-%d'))
         
         # 根据时间跨度自动选择适当的日期定位器
-        date_span = (dates[-1] - dates[0]).days
+        date_span = (end_hour - start_hour) // (24 * calendar.steps_per_hour)
         if date_span <= 31:  # 一个月内，使用周定位器
             self.data_ax.xaxis.set_major_locator(plt.matplotlib.dates.WeekdayLocator(interval=1))
         elif date_span <= 180:  # 6个月内，使用双周定位器
@@ -1594,13 +711,23 @@ class EnergyBalanceApp:
         back_btn.grid(row=0, column=3, sticky=tk.E, padx=5, pady=5)
         
         # 数据说明
-        info_label = ttk.Label(tab, text="请导入包含8760小时数据的CSV文件\n"
+        info_label = ttk.Label(tab, text="请导入包含全年逐时段数据的CSV文件（逐小时8760行，15分钟35040行，5分钟105120行）\n"
                                          "文件应包含列: 时间, 电力负荷(kW), 热力负荷(kW), 光照强度(W/m²), 风速(m/s), 下网电价(元/kWh)")
         info_label.grid(row=1, column=0, columnspan=4, pady=(0, 20), sticky=tk.W)
         
         # 添加下载模板按钮
         ttk.Button(tab, text="下载CSV模板", command=self.download_template).grid(row=2, column=0, pady=5, sticky=tk.W)
         
+        # 时间步长设置：导入数据每行对应的时段长度，修改后已导入的数据重采样到新步长
+        time_step_frame = ttk.Frame(tab)
+        time_step_frame.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(time_step_frame, text="时间步长:").pack(side=tk.LEFT)
+        self.time_step_var = tk.StringVar(value=f"{self.data_model.time_step_minutes}分钟")
+        time_step_combo = ttk.Combobox(time_step_frame, textvariable=self.time_step_var, state="readonly", width=10,
+                                       values=[f"{minutes}分钟" for minutes in TIME_STEP_OPTIONS])
+        time_step_combo.pack(side=tk.LEFT, padx=5)
+        time_step_combo.bind("<<ComboboxSelected>>", self.on_time_step_changed)
+        
         # 单一文件导入控件
         ttk.Label(tab, text="统一数据文件:").grid(row=3, column=0, sticky=tk.W, pady=5)
         self.single_file_path = tk.StringVar()
@@ -1643,12 +770,12 @@ class EnergyBalanceApp:
         time_range_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
         
         ttk.Label(time_range_frame, text="开始日期:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.start_date_var = tk.StringVar(value="2025-01-01")
+        self.start_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-01-01")
         self.start_date_entry = ttk.Entry(time_range_frame, textvariable=self.start_date_var, width=12)
         self.start_date_entry.grid(row=0, column=1, padx=5)
         
         ttk.Label(time_range_frame, text="结束日期:").grid(row=0, column=2, sticky=tk.W, padx=(10, 5))
-        self.end_date_var = tk.StringVar(value="2025-12-31")
+        self.end_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-12-31")
         self.end_date_entry = ttk.Entry(time_range_frame, textvariable=self.end_date_var, width=12)
         self.end_date_entry.grid(row=0, column=3, padx=5)
         
@@ -1714,12 +841,12 @@ class EnergyBalanceApp:
         time_range_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
         ttk.Label(time_range_frame, text="开始日期:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.start_date_var = tk.StringVar(value="2025-01-01")
+        self.start_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-01-01")
         self.start_date_entry = ttk.Entry(time_range_frame, textvariable=self.start_date_var, width=12)
         self.start_date_entry.grid(row=0, column=1, padx=5)
         
         ttk.Label(time_range_frame, text="结束日期:").grid(row=0, column=2, sticky=tk.W, padx=(10, 5))
-        self.end_date_var = tk.StringVar(value="2025-12-31")
+        self.end_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-12-31")
         self.end_date_entry = ttk.Entry(time_range_frame, textvariable=self.end_date_var, width=12)
         self.end_date_entry.grid(row=0, column=3, padx=5)
         
@@ -2093,7 +1220,20 @@ class EnergyBalanceApp:
         self.wind_model_correction_factor = tk.DoubleVar(value=1.0)
         ttk.Entry(self.wind_model_detail_frame, textvariable=self.wind_model_correction_factor, width=20).grid(row=5, column=1, pady=2)
         
-        ttk.Button(self.wind_model_detail_frame, text="保存型号", command=self.save_wind_model).grid(row=6, column=0, columnspan=2, pady=5, sticky=tk.W+tk.E)
+        # 场址空气密度，仅对带密度分档的厂家功率曲线生效
+        ttk.Label(self.wind_model_detail_frame, text="空气密度 (kg/m³):").grid(row=6, column=0, sticky=tk.W, pady=2)
+        self.wind_model_air_density = tk.DoubleVar(value=STANDARD_AIR_DENSITY)
+        ttk.Entry(self.wind_model_detail_frame, textvariable=self.wind_model_air_density, width=20).grid(row=6, column=1, pady=2)
+        
+        # 厂家功率曲线导入/清除
+        power_curve_frame = ttk.Frame(self.wind_model_detail_frame)
+        power_curve_frame.grid(row=7, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=2)
+        self.wind_power_curve_label = ttk.Label(power_curve_frame, text="功率曲线: 参数曲线")
+        self.wind_power_curve_label.grid(row=0, column=0, sticky=tk.W)
+        ttk.Button(power_curve_frame, text="导入功率曲线", command=self.import_wind_power_curve).grid(row=0, column=1, padx=(10, 0))
+        ttk.Button(power_curve_frame, text="清除功率曲线", command=self.clear_wind_power_curve).grid(row=0, column=2, padx=(5, 0))
+        
+        ttk.Button(self.wind_model_detail_frame, text="保存型号", command=self.save_wind_model).grid(row=8, column=0, columnspan=2, pady=5, sticky=tk.W+tk.E)
         
         # 风机函数图像显示
         self.wind_function_frame = ttk.LabelFrame(wind_models_frame, text="风机函数图像", padding="10")
@@ -2336,6 +1476,8 @@ class EnergyBalanceApp:
         self.wind_model_cut_out.set(0.0)
         self.wind_model_rated_power.set(0.0)
         self.wind_model_count.set(0)
+        self.wind_model_air_density.set(STANDARD_AIR_DENSITY)
+        self.wind_power_curve_label.config(text="功率曲线: 参数曲线")
         
         # 清空风机函数图像
         self.wind_ax.clear()
@@ -2499,6 +1641,11 @@ class EnergyBalanceApp:
             messagebox.showerror("错误", "出力修正系数不能为负数！")
             return
             
+        air_density = self.wind_model_air_density.get()
+        if air_density <= 0:
+            messagebox.showerror("错误", "空气密度必须大于0！")
+            return
+            
         # 创建型号数据
         model_data = {
             'name': name,
@@ -2510,11 +1657,16 @@ class EnergyBalanceApp:
                 'rated_power': rated_power
             },
             'count': count,
-            'output_correction_factor': correction_factor  # 添加出力修正系数
+            'output_correction_factor': correction_factor,  # 添加出力修正系数
+            'air_density': air_density
         }
         
         # 如果是编辑现有型号
         if self.current_editing_index is not None and self.current_editing_index < len(self.data_model.wind_turbine_models):
+            # 保留已导入的厂家功率曲线
+            power_curve = self.data_model.wind_turbine_models[self.current_editing_index].get('power_curve')
+            if power_curve:
+                model_data['power_curve'] = power_curve
             self.data_model.wind_turbine_models[self.current_editing_index] = model_data
         # 如果是新增型号（理论上不会走到这里，因为新增型号会直接添加）
         else:
@@ -2714,12 +1866,25 @@ class EnergyBalanceApp:
             self.data_model.optimization_params['thermal_cost'] = self.thermal_cost.get()
             self.data_model.optimization_params['pv_cost'] = self.pv_cost.get()
             self.data_model.optimization_params['wind_cost'] = self.wind_cost.get()
+            self.data_model.optimization_params['method'] = self.get_optimization_method()
+            for key, var in self.optimization_constraint_vars.items():
+                self.data_model.optimization_params[key] = var.get()
             
             # 显示成功消息
             messagebox.showinfo("成功", "优化参数已保存！")
         except Exception as e:
             messagebox.showerror("错误", f"保存优化参数时发生错误：{str(e)}")
             
+    def get_optimization_method(self):
+        """
+        获取界面上选择的优化方法标识
+        """
+        selected = self.optimization_method.get()
+        for method, (name, *_) in OPTIMIZATION_METHODS.items():
+            if name == selected:
+                return method
+        return 'grid'
+        
     def save_and_return_to_project_list(self):
         """
         保存当前项目并返回项目列表
@@ -2729,26 +1894,76 @@ class EnergyBalanceApp:
         
     def save_current_project(self):
         """
-        保存当前项目数据
+        请求保存当前项目数据
+        在界面线程中只生成项目数据快照，交给后台自动保存线程；
+        去抖动时间内的多次请求合并为一次写入，分区哈希在后台线程中计算，写入结果由poll_autosave处理
         """
         if self.current_project:
             # 准备项目数据，包含优化结果（如果存在）
             project_data = self.data_model.to_dict()
             
             # 如果存在优化结果，将其添加到项目数据中
-            if hasattr(self, 'optimized_results') and self.optimized_results is not None:
+            if getattr(self, 'optimized_results', None) is not None:
                 project_data['optimized_results'] = self.optimized_results
             
-            # 保存数据模型到项目文件
-            success = self.project_manager.save_project_data(
-                self.current_project['id'], 
-                project_data
+            # 快照生成后界面可继续修改数据；只重写与已保存内容相比有变化的分区
+            self.autosaver.request(
+                self.current_project['id'],
+                project_data_snapshot(project_data),
+                self.data_model.saved_section_hashes,
+                token=self.current_project['name']
             )
-            
+            if self.autosave_poll_id is None:
+                self.autosave_poll_id = self.root.after(AUTOSAVE_POLL_MS, self.poll_autosave)
+    
+    def poll_autosave(self):
+        """
+        处理后台自动保存的写入结果，仍有等待写入的请求时继续轮询
+        """
+        self.autosave_poll_id = None
+        self.handle_autosave_results()
+        if self.autosaver.busy():
+            self.autosave_poll_id = self.root.after(AUTOSAVE_POLL_MS, self.poll_autosave)
+    
+    def handle_autosave_results(self):
+        """
+        写入成功时更新当前项目的已保存状态，失败时提示
+        """
+        for project_id, success, section_hashes, project_name in self.autosaver.poll():
             if success:
-                print(f"项目 '{self.current_project['name']}' 已保存")
+                # 切换项目后才完成的写入不影响当前项目的已保存状态
+                if self.current_project and self.current_project['id'] == project_id:
+                    self.data_model.mark_saved(section_hashes)
+                print(f"项目 '{project_name}' 已保存")
             else:
                 messagebox.showerror("错误", "保存项目数据失败！")
+    
+    def flush_autosave(self):
+        """
+        立即写入等待中的自动保存请求并等待完成（返回项目列表和关闭窗口时调用），
+        超过AUTOSAVE_FLUSH_TIMEOUT秒仍未完成时提示用户，不再等待
+        """
+        flushed = self.autosaver.flush(AUTOSAVE_FLUSH_TIMEOUT)
+        if self.autosave_poll_id is not None:
+            self.root.after_cancel(self.autosave_poll_id)
+            self.autosave_poll_id = None
+        self.handle_autosave_results()
+        if not flushed:
+            messagebox.showwarning("警告", f"保存项目数据超过{AUTOSAVE_FLUSH_TIMEOUT}秒仍未完成，最近的修改可能未保存！")
+        return flushed
+    
+    def on_close(self):
+        """
+        关闭窗口：取消后台计算并保存当前项目后退出
+        """
+        for task_attr in ('calculation_task', 'optimization_task'):
+            task = getattr(self, task_attr, None)
+            if task is not None:
+                task.cancel()
+        if self.current_project:
+            self.save_current_project()
+        self.flush_autosave()
+        self.root.destroy()
 
     def create_calculation_tab(self, notebook):
         tab = ttk.Frame(notebook, padding="10")
@@ -2767,12 +1982,17 @@ class EnergyBalanceApp:
         # 添加导出结果按钮
         ttk.Button(control_frame, text="导出计算结果", command=self.export_results).grid(row=0, column=1, pady=10, padx=(0, 10))
         
+        # 取消计算按钮，仅在计算进行中可用
+        self.cancel_calculation_button = ttk.Button(control_frame, text="取消计算", state=tk.DISABLED,
+                                                    command=lambda: self.cancel_background_task('calculation_task'))
+        self.cancel_calculation_button.grid(row=0, column=2, pady=10, padx=(0, 10))
+        
         # 进度条
         self.progress = ttk.Progressbar(control_frame, mode='determinate')
-        self.progress.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        self.progress.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         
         self.progress_label = ttk.Label(control_frame, text="准备就绪")
-        self.progress_label.grid(row=2, column=0, columnspan=2, pady=5)
+        self.progress_label.grid(row=2, column=0, columnspan=3, pady=5)
         
         # 结果展示
         result_frame = ttk.LabelFrame(tab, text="计算结果", padding="10")
@@ -2790,12 +2010,12 @@ class EnergyBalanceApp:
         time_range_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
         
         ttk.Label(time_range_frame, text="开始日期:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.result_start_date_var = tk.StringVar(value="2025-01-01")
+        self.result_start_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-01-01")
         self.result_start_date_entry = ttk.Entry(time_range_frame, textvariable=self.result_start_date_var, width=12)
         self.result_start_date_entry.grid(row=0, column=1, padx=5)
         
         ttk.Label(time_range_frame, text="结束日期:").grid(row=0, column=2, sticky=tk.W, padx=(10, 5))
-        self.result_end_date_var = tk.StringVar(value="2025-12-31")
+        self.result_end_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-12-31")
         self.result_end_date_entry = ttk.Entry(time_range_frame, textvariable=self.result_end_date_var, width=12)
         self.result_end_date_entry.grid(row=0, column=3, padx=5)
         
@@ -2920,11 +2140,7 @@ class EnergyBalanceApp:
             self.data_model.internal_electric_rate = self.internal_rate_var.get()
             
             # 清空之前的数据
-            self.data_model.electric_load_hourly = [0.0] * 8760
-            self.data_model.heat_load_hourly = [0.0] * 8760
-            self.data_model.solar_irradiance_hourly = [0.0] * 8760
-            self.data_model.wind_speed_hourly = [0.0] * 8760
-            self.data_model.grid_purchase_price_hourly = [0.0] * 8760  # 同时清空下网电价数据
+            self.data_model.clear_hourly_series()  # 按当前时间步长的时段数清空，含下网电价数据
             
             # 使用单一文件导入模式
             if not self.single_file_path.get():
@@ -2961,9 +2177,10 @@ class EnergyBalanceApp:
                 messagebox.showerror("错误", "文件表头不正确！请使用模板文件格式。\n期望格式: ['时间', '电力负荷(kW)', '热力负荷(kW)', '光照强度(W/m²)', '风速(m/s)'[, '下网电价(元/kWh)']]")
                 return
             
-            # 读取数据
+            # 读取数据（最多读取全年的时段数，逐小时为8760行）
+            steps = self.data_model.steps_per_year
             for i, row in enumerate(reader):
-                if i >= 8760:
+                if i >= steps:
                     break
                 self.data_model.electric_load_hourly[i] = float(row[1])
                 self.data_model.heat_load_hourly[i] = float(row[2])
@@ -2978,10 +2195,10 @@ class EnergyBalanceApp:
                     self.data_model.data_imported['grid_price'] = False  # 标记下网电价数据未导入
                 
             # 标记所有数据类型为已导入（只要有数据就标记为导入）
-            self.data_model.data_imported['electric'] = any(self.data_model.electric_load_hourly)
-            self.data_model.data_imported['heat'] = any(self.data_model.heat_load_hourly)
-            self.data_model.data_imported['solar'] = any(self.data_model.solar_irradiance_hourly)
-            self.data_model.data_imported['wind'] = any(self.data_model.wind_speed_hourly)
+            self.data_model.data_imported['electric'] = bool(np.any(self.data_model.electric_load_hourly))
+            self.data_model.data_imported['heat'] = bool(np.any(self.data_model.heat_load_hourly))
+            self.data_model.data_imported['solar'] = bool(np.any(self.data_model.solar_irradiance_hourly))
+            self.data_model.data_imported['wind'] = bool(np.any(self.data_model.wind_speed_hourly))
                 
 
                 
@@ -3056,6 +2273,8 @@ class EnergyBalanceApp:
             
             # 设置出力修正系数
             self.wind_model_correction_factor.set(model.get('output_correction_factor', 1.0))
+            self.wind_model_air_density.set(model.get('air_density', STANDARD_AIR_DENSITY))
+            self.update_wind_power_curve_label(model)
             
             # 绘制当前选中风机型号的函数曲线
             self.plot_single_wind_curve(model)
@@ -3068,15 +2287,17 @@ class EnergyBalanceApp:
         self.wind_ax.clear()
         
         # 绘制风机出力函数曲线
-        wind_speeds = np.linspace(0, 30, 300)  # 风速范围 0-30 m/s
-        wind_powers = []
-        
-        for wind_speed in wind_speeds:
-            power = wind_power_function(wind_speed, model['params'])
-            wind_powers.append(power)
+        if model.get('power_curve'):
+            # 厂家功率曲线直接使用计算时的缓存表格
+            table = TabulatedPowerCurve.get(model)
+            wind_speeds = np.linspace(0, max(30.0, table.wind_speeds[-1] + 1.0), 300)
+            self.wind_ax.plot(wind_speeds, table(wind_speeds), '-', linewidth=2, color='blue')
+            self.wind_ax.plot(table.wind_speeds, table.powers, 'o', markersize=3, color='blue')
+        else:
+            wind_speeds = np.linspace(0, 30, 300)  # 风速范围 0-30 m/s
+            self.wind_ax.plot(wind_speeds, wind_power_array(wind_speeds, model['params']), '-', linewidth=2, color='blue')
         
         # 绘制曲线
-        self.wind_ax.plot(wind_speeds, wind_powers, '-', linewidth=2, color='blue')
         self.wind_ax.set_xlabel('风速 (m/s)')
         self.wind_ax.set_ylabel('出力 (kW)')
         self.wind_ax.set_title(f'{model["name"]} 出力函数')
@@ -3085,6 +2306,63 @@ class EnergyBalanceApp:
         # 刷新画布
         self.wind_function_canvas.draw()
 
+    def update_wind_power_curve_label(self, model):
+        """
+        更新型号详情中的功率曲线来源说明
+        """
+        power_curve = model.get('power_curve')
+        if not power_curve:
+            text = "功率曲线: 参数曲线"
+        elif power_curve.get('densities'):
+            text = f"功率曲线: 厂家表格 ({len(power_curve['wind_speeds'])}点, {len(power_curve['densities'])}档密度)"
+        else:
+            text = f"功率曲线: 厂家表格 ({len(power_curve['wind_speeds'])}点)"
+        self.wind_power_curve_label.config(text=text)
+
+    def import_wind_power_curve(self):
+        """
+        为选中的风机型号导入厂家功率曲线CSV
+        """
+        if self.current_editing_index is None or self.current_editing_index >= len(self.data_model.wind_turbine_models):
+            messagebox.showwarning("警告", "请先选择一个风机型号！")
+            return
+            
+        filename = filedialog.askopenfilename(
+            title="选择功率曲线CSV文件",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+            
+        try:
+            power_curve = TabulatedPowerCurve.from_csv(filename)
+            model = self.data_model.wind_turbine_models[self.current_editing_index]
+            # 先构建一次以校验数据
+            TabulatedPowerCurve(power_curve, model.get('air_density', STANDARD_AIR_DENSITY))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"导入功率曲线失败: {str(e)}")
+            return
+            
+        model['power_curve'] = power_curve
+        self.update_wind_power_curve_label(model)
+        self.plot_single_wind_curve(model)
+        self.update_wind_total_capacity()
+        messagebox.showinfo("成功", f"已为风机型号 '{model['name']}' 导入 {len(power_curve['wind_speeds'])} 个功率曲线点")
+
+    def clear_wind_power_curve(self):
+        """
+        清除选中风机型号的厂家功率曲线，恢复参数曲线
+        """
+        if self.current_editing_index is None or self.current_editing_index >= len(self.data_model.wind_turbine_models):
+            messagebox.showwarning("警告", "请先选择一个风机型号！")
+            return
+            
+        model = self.data_model.wind_turbine_models[self.current_editing_index]
+        model.pop('power_curve', None)
+        self.update_wind_power_curve_label(model)
+        self.plot_single_wind_curve(model)
+        self.update_wind_total_capacity()
+
     def on_pv_model_select(self, event):
         """
         当选择光伏型号时的回调函数
@@ -3232,11 +2510,7 @@ class EnergyBalanceApp:
             self.data_model.internal_electric_rate = self.internal_rate_var.get()
             
             # 清空之前的数据
-            self.data_model.electric_load_hourly = [0.0] * 8760
-            self.data_model.heat_load_hourly = [0.0] * 8760
-            self.data_model.solar_irradiance_hourly = [0.0] * 8760
-            self.data_model.wind_speed_hourly = [0.0] * 8760
-            self.data_model.grid_purchase_price_hourly = [0.0] * 8760  # 清空下网电价数据
+            self.data_model.clear_hourly_series()  # 按当前时间步长的时段数清空，含下网电价数据
             
             # 检查使用哪种导入模式
             if self.single_file_mode.get():
@@ -3260,6 +2534,22 @@ class EnergyBalanceApp:
         except Exception as e:
             messagebox.showerror("错误", f"数据导入失败: {str(e)}")
             
+    def on_time_step_changed(self, event=None):
+        """
+        切换时间步长：已导入的时序数据重采样到新步长，之前的计算和优化结果不再适用
+        """
+        minutes = int(self.time_step_var.get().replace("分钟", ""))
+        if minutes == self.data_model.time_step_minutes:
+            return
+        self.data_model.set_time_step(minutes)
+        self.results = None
+        self.optimized_results = None
+        self.data_model.optimized_results = None
+        self.result_text.delete(1.0, tk.END)
+        
+        # 更新数据统计和趋势图
+        self.update_statistics()
+        
     def import_single_file_data(self):
         """
         从单一文件导入所有数据
@@ -3278,9 +2568,10 @@ class EnergyBalanceApp:
                 messagebox.showerror("错误", "文件表头不正确！请使用模板文件格式。")
                 return
             
-            # 读取数据
+            # 读取数据（最多读取全年的时段数，逐小时为8760行）
+            steps = self.data_model.steps_per_year
             for i, row in enumerate(reader):
-                if i >= 8760:
+                if i >= steps:
                     break
                 self.data_model.electric_load_hourly[i] = float(row[1])
                 self.data_model.heat_load_hourly[i] = float(row[2])
@@ -3346,8 +2637,9 @@ class EnergyBalanceApp:
                         raise Exception(f"文件列标题不匹配!\n期望: {expected_headers}\n实际: {headers}")
                 
                 # 读取数据行
+                steps = self.data_model.steps_per_year
                 for i, row in enumerate(reader):
-                    if i >= 8760:  # 最多读取8760小时的数据
+                    if i >= steps:  # 最多读取全年的时段数
                         break
                         
                     # 检查行是否有足够的列数
@@ -3421,27 +2713,28 @@ class EnergyBalanceApp:
         stats = f"""数据统计信息:
 {imported_info}
 
-电力负荷: 最小 {min(self.data_model.electric_load_hourly):.2f} kW, 
-          最大 {max(self.data_model.electric_load_hourly):.2f} kW, 
-          平均 {np.mean(self.data_model.electric_load_hourly):.2f} kW
+电力负荷: 最小 {self.data_model.electric_load_hourly.min():.2f} kW, 
+          最大 {self.data_model.electric_load_hourly.max():.2f} kW, 
+          平均 {self.data_model.electric_load_hourly.mean():.2f} kW
 
-热力负荷: 最小 {min(self.data_model.heat_load_hourly):.2f} kW, 
-          最大 {max(self.data_model.heat_load_hourly):.2f} kW, 
-          平均 {np.mean(self.data_model.heat_load_hourly):.2f} kW
+热力负荷: 最小 {self.data_model.heat_load_hourly.min():.2f} kW, 
+          最大 {self.data_model.heat_load_hourly.max():.2f} kW, 
+          平均 {self.data_model.heat_load_hourly.mean():.2f} kW
 
-光照强度: 最小 {min(self.data_model.solar_irradiance_hourly):.2f} W/m², 
-          最大 {max(self.data_model.solar_irradiance_hourly):.2f} W/m², 
-          平均 {np.mean(self.data_model.solar_irradiance_hourly):.2f} W/m²
+光照强度: 最小 {self.data_model.solar_irradiance_hourly.min():.2f} W/m², 
+          最大 {self.data_model.solar_irradiance_hourly.max():.2f} W/m², 
+          平均 {self.data_model.solar_irradiance_hourly.mean():.2f} W/m²
 
-风速:     最小 {min(self.data_model.wind_speed_hourly):.2f} m/s, 
-          最大 {max(self.data_model.wind_speed_hourly):.2f} m/s, 
-          平均 {np.mean(self.data_model.wind_speed_hourly):.2f} m/s
+风速:     最小 {self.data_model.wind_speed_hourly.min():.2f} m/s, 
+          最大 {self.data_model.wind_speed_hourly.max():.2f} m/s, 
+          平均 {self.data_model.wind_speed_hourly.mean():.2f} m/s
 
-下网电价: 最小 {min(self.data_model.grid_purchase_price_hourly):.2f} 元/kWh, 
-          最大 {max(self.data_model.grid_purchase_price_hourly):.2f} 元/kWh, 
-          平均 {np.mean(self.data_model.grid_purchase_price_hourly):.2f} 元/kWh
+下网电价: 最小 {self.data_model.grid_purchase_price_hourly.min():.2f} 元/kWh, 
+          最大 {self.data_model.grid_purchase_price_hourly.max():.2f} 元/kWh, 
+          平均 {self.data_model.grid_purchase_price_hourly.mean():.2f} 元/kWh
 
 厂用电率: {self.data_model.internal_electric_rate*100:.2f}%
+时间步长: {self.data_model.time_step_minutes}分钟 (共{len(self.data_model.electric_load_hourly)}个时段)
 """
         self.stats_text.delete(1.0, tk.END)
         self.stats_text.insert(tk.END, stats)
@@ -3450,90 +2743,155 @@ class EnergyBalanceApp:
         self.update_imported_data_plot()
         
     def start_calculation(self):
+        if self.calculation_task is not None:
+            messagebox.showwarning("警告", "年度平衡计算正在进行，请等待完成或取消后再试！")
+            return
+            
         try:
             # 更新参数
             self.save_function_parameters()
             
-            # 执行计算
-            self.progress_label.config(text="正在计算...")
-            self.progress["value"] = 0
-            self.root.update_idletasks()
-            
-            # 实际计算过程
-            self.results = self.calculator.calculate_annual_balance()
-            
-            # 更新进度
-            self.progress["value"] = 100
-            self.progress_label.config(text="计算完成")
-            
-            # 显示结果
-            self.display_results()
-            
-            # 保存项目数据（包括计算结果）
-            self.save_current_project()
-            
-            messagebox.showinfo("成功", "年度平衡计算完成！")
-            
+            # 使用数据模型快照计算，计算期间界面上的修改不影响本次计算
+            calculator = AnnualBalanceCalculator(copy.deepcopy(self.data_model), self.calculator.base_year)
+            inputs_hash = model_inputs_hash(calculator.data_model)
+            # 上次计算之后只有检修、投产或出力限制计划的局部修改时，只重算受影响的小时
+            previous_results = self.results
+            hour_range = self.data_model.incremental_range() if previous_results else None
         except Exception as e:
             self.progress_label.config(text="计算失败")
             messagebox.showerror("错误", f"计算过程中出现错误: {str(e)}")
+            return
             
+        # 在后台线程中执行计算
+        self.progress_label.config(text="正在计算...")
+        self.progress["value"] = 0
+        self.calculation_task = BackgroundTask(self.result_cache.annual_balance, calculator,
+                                               previous_results=previous_results, hour_range=hour_range).start()
+        self.cancel_calculation_button.config(state=tk.NORMAL)
+        self.poll_background_task('calculation_task', self.progress, self.progress_label,
+                                  self.cancel_calculation_button,
+                                  lambda results: self.finish_calculation(results, inputs_hash, previous_results,
+                                                                          hour_range))
+        
+    def finish_calculation(self, results, inputs_hash=None, previous_results=None, hour_range=None):
+        """
+        年度平衡计算完成后的处理（在界面线程中执行）
+        :param inputs_hash: 参与本次计算的输入哈希
+        :param previous_results: 局部重算时的上次结果，汇总统计只按重算区间增量更新
+        :param hour_range: 局部重算的小时区间，整年计算时为None
+        """
+        if hour_range is not None and previous_results is not None:
+            statistics = self.get_result_statistics(previous_results).updated(previous_results, results, hour_range)
+            self.result_statistics = (results, statistics)
+        self.results = results
+        self.data_model.set_calculation_results(results, inputs_hash)
+        self.data_model.mark_calculated(inputs_hash)
+        self.progress_label.config(text="计算完成")
+        
+        # 显示结果
+        self.display_results()
+        
+        # 保存项目数据（包括计算结果）
+        self.save_current_project()
+        
+        messagebox.showinfo("成功", "年度平衡计算完成！")
+        
+    def poll_background_task(self, task_attr, progress_bar, progress_label, cancel_button, on_done):
+        """
+        通过root.after定时取出后台任务的进度和结果，并在界面线程中更新界面
+        :param task_attr: 保存任务的实例属性名，任务被替换或清除后停止轮询
+        """
+        task = getattr(self, task_attr)
+        if task is None:
+            return
+            
+        for kind, payload in task.poll():
+            if kind == 'progress':
+                done, total, phase = payload
+                progress_bar["value"] = done / total * 100 if total else 0
+                progress_label.config(text=f"{phase}... ({done}/{total})")
+                continue
+                
+            # 任务结束
+            setattr(self, task_attr, None)
+            cancel_button.config(state=tk.DISABLED)
+            if kind == 'done':
+                progress_bar["value"] = 100
+                on_done(payload)
+            elif kind == 'cancelled':
+                progress_label.config(text="已取消")
+            else:
+                progress_label.config(text="计算失败")
+                messagebox.showerror("错误", f"计算过程中出现错误: {str(payload)}")
+            return
+            
+        self.root.after(50, self.poll_background_task, task_attr, progress_bar, progress_label, cancel_button, on_done)
+        
+    def cancel_background_task(self, task_attr):
+        """
+        请求取消后台任务，任务在下一次汇报进度时停止
+        """
+        task = getattr(self, task_attr)
+        if task is not None:
+            task.cancel()
+            
+    def get_result_statistics(self, results=None):
+        """
+        获取计算结果的汇总统计，结果被替换后重新统计
+        """
+        results = results if results is not None else self.results
+        cached = getattr(self, 'result_statistics', None)
+        if cached is None or cached[0] is not results:
+            cached = (results, BalanceStatistics(results, self.data_model.step_hours))
+            self.result_statistics = cached
+        return cached[1]
+        
     def display_results(self):
         if not self.results:
             return
             
-        # 计算统计信息
-        internal_electric_load = self.results['hourly_internal_electric_load']
-        total_load = self.results['hourly_total_load']
-        chp_output = self.results['hourly_chp_output']
-        pv_output = self.results['hourly_pv_output']
-        wind_output = self.results['hourly_wind_output']
-        # 修复 KeyError: 'hourly_peak_pending_output'
-        peak_pending_output = self.results.get('hourly_peak_pending_output', [0.0] * 8760)
-        peak_output = self.results['hourly_peak_output']
-        thermal_output = self.results['hourly_thermal_output']
-        generation = self.results['hourly_generation']
-        wind_pv_abandon = self.results['hourly_wind_pv_abandon']
-        grid_load = self.results['hourly_grid_load']
-        abandon_rate = self.results['hourly_abandon_rate']
-        corrected_electric_load = self.results['hourly_corrected_electric_load']
-        
-        # 计算各种统计数据
-        grid_load_positive_hours = sum(1 for x in grid_load if x > 0)  # 需要下网的小时数
-        grid_load_negative_hours = sum(1 for x in grid_load if x < 0)  # 可以上网的小时数
-        
-        total_grid_load_positive = sum(x for x in grid_load if x > 0)  # 总下网电量
-        total_grid_load_negative = sum(abs(x) for x in grid_load if x < 0)  # 总上网电量
-        total_wind_pv_abandon = sum(x for x in wind_pv_abandon)  # 总弃光弃风量
-        total_pv_wind_output = sum(x for x in pv_output) + sum(x for x in wind_output)  # 总风光发电量
-        avg_abandon_rate = np.mean(abandon_rate) * 100  # 平均弃光风率转为百分比
+        # 计算统计信息（局部重算后汇总统计已增量更新）
+        # 时段数按时段长度折算为小时数，功率合计折算为电量
+        statistics = self.get_result_statistics()
+        hours = statistics.hours * statistics.step_hours
+        grid_load_positive_hours = statistics.duration('grid_positive_hours')  # 需要下网的小时数
+        grid_load_negative_hours = statistics.duration('grid_negative_hours')  # 可以上网的小时数
+        
+        total_grid_load_positive = statistics.energy('grid_positive_energy')  # 总下网电量
+        total_grid_load_negative = statistics.energy('grid_negative_energy')  # 总上网电量
+        total_wind_pv_abandon = statistics.energy('hourly_wind_pv_abandon')  # 总弃光弃风量
+        total_pv_wind_output = statistics.energy('hourly_pv_output') + statistics.energy('hourly_wind_output')  # 总风光发电量
+        avg_abandon_rate = statistics.mean('hourly_abandon_rate') * 100  # 平均弃光风率转为百分比
         
         # 计算弃光风率（按总电量计算）
         overall_abandon_rate = 0
         if total_pv_wind_output > 0:
             overall_abandon_rate = abs(total_wind_pv_abandon) / total_pv_wind_output * 100
             
-        avg_internal_electric_load = np.mean(internal_electric_load)
-        avg_total_load = np.mean(total_load)
-        avg_chp_output = np.mean(chp_output)
-        avg_pv_output = np.mean(pv_output)
-        avg_wind_output = np.mean(wind_output)
-        avg_peak_pending_output = np.mean(peak_pending_output)
-        avg_peak_output = np.mean(peak_output)
-        avg_thermal_output = np.mean(thermal_output)
-        avg_generation = np.mean(generation)
-        avg_wind_pv_abandon = np.mean(wind_pv_abandon)
-        avg_grid_load = np.mean(grid_load)
-        avg_corrected_electric_load = np.mean(corrected_electric_load)
-        
-        # 计算风机光伏实际出力的平均值
-        wind_pv_actual = self.results['hourly_wind_pv_actual']
-        avg_wind_pv_actual = np.mean(wind_pv_actual)
+        avg_internal_electric_load = statistics.mean('hourly_internal_electric_load')
+        avg_total_load = statistics.mean('hourly_total_load')
+        avg_chp_output = statistics.mean('hourly_chp_output')
+        avg_pv_output = statistics.mean('hourly_pv_output')
+        avg_wind_output = statistics.mean('hourly_wind_output')
+        avg_peak_pending_output = statistics.mean('hourly_peak_pending_output')
+        avg_peak_output = statistics.mean('hourly_peak_output')
+        avg_thermal_output = statistics.mean('hourly_thermal_output')
+        avg_generation = statistics.mean('hourly_generation')
+        avg_wind_pv_abandon = statistics.mean('hourly_wind_pv_abandon')
+        avg_grid_load = statistics.mean('hourly_grid_load')
+        avg_corrected_electric_load = statistics.mean('hourly_corrected_electric_load')
+        
+        # 风机光伏实际出力的平均值
+        avg_wind_pv_actual = statistics.mean('hourly_wind_pv_actual')
+        
+        # 调峰机组出力区间统计
+        peak_max_hours = statistics.duration('peak_max_hours')
+        peak_min_hours = statistics.duration('peak_min_hours')
         
         result_text = f"""年度计算结果:
 
 负荷分析:
-  平均电力负荷: {np.mean(self.data_model.electric_load_hourly):.2f} kW
+  平均电力负荷: {self.data_model.electric_load_hourly.mean():.2f} kW
   平均修正后电力负荷: {avg_corrected_electric_load:.2f} kW
   平均厂用电负荷: {avg_internal_electric_load:.2f} kW
   平均总负荷: {avg_total_load:.2f} kW
@@ -3547,6 +2905,8 @@ class EnergyBalanceApp:
   调峰机组平均出力: {avg_peak_output:.2f} kW
   火电平均出力: {avg_thermal_output:.2f} kW
   总平均发电出力: {avg_generation:.2f} kW
+  调峰机组达最大出力小时数: {peak_max_hours:g} 小时
+  调峰机组处最小出力小时数: {peak_min_hours:g} 小时
 
 弃光弃风分析:
   总弃光弃风量: {abs(total_wind_pv_abandon):.2f} kWh
@@ -3555,8 +2915,8 @@ class EnergyBalanceApp:
   平均弃光风率: {avg_abandon_rate:.2f}%
 
 供需平衡分析:
-  需要下网小时数: {grid_load_positive_hours} 小时 ({grid_load_positive_hours/8760*100:.2f}%)
-  可以上网小时数: {grid_load_negative_hours} 小时 ({grid_load_negative_hours/8760*100:.2f}%)
+  需要下网小时数: {grid_load_positive_hours:g} 小时 ({grid_load_positive_hours/hours*100:.2f}%)
+  可以上网小时数: {grid_load_negative_hours:g} 小时 ({grid_load_negative_hours/hours*100:.2f}%)
   总下网电量: {total_grid_load_positive:.2f} kWh
   总上网电量: {total_grid_load_negative:.2f} kWh
   平均下网负荷: {avg_grid_load:+.2f} kW
@@ -3591,45 +2951,50 @@ class EnergyBalanceApp:
             messagebox.showerror("错误", "开始日期不能晚于结束日期")
             return
         
-        if start_hour < 0 or end_hour >= 8760:
-            messagebox.showerror("错误", "日期超出范围，应在2025-01-01至2025-12-31之间")
+        calendar = self.get_calendar()
+        if start_hour < 0 or start_hour >= calendar.hours:
+            messagebox.showerror("错误", f"日期超出范围，应在{calendar.base_date:%Y-%m-%d}至{calendar.last_date:%Y-%m-%d}之间")
             return
+        # 结束日期超出数据范围时截取到最后一个小时
+        end_hour = min(end_hour, calendar.hours - 1)
         
         # 获取时间段内的数据
-        hours = list(range(start_hour, end_hour + 1))
-        total_load = [self.results['hourly_total_load'][i] for i in hours]
-        generation = [self.results['hourly_generation'][i] for i in hours]
-        grid_load = [self.results['hourly_grid_load'][i] for i in hours]
+        window = slice(start_hour, end_hour + 1)
+        empty = np.zeros(calendar.hours)
+        total_load = self.results['hourly_total_load'][window]
+        generation = self.results['hourly_generation'][window]
+        grid_load = self.results['hourly_grid_load'][window]
         
         # 处理可能缺失的新字段
-        pv_output = [self.results.get('hourly_pv_output', [0.0] * 8760)[i] for i in hours]
-        wind_output = [self.results.get('hourly_wind_output', [0.0] * 8760)[i] for i in hours]
-        chp_output = [self.results.get('hourly_chp_output', [0.0] * 8760)[i] for i in hours]
+        pv_output = self.results.get('hourly_pv_output', empty)[window]
+        wind_output = self.results.get('hourly_wind_output', empty)[window]
+        chp_output = self.results.get('hourly_chp_output', empty)[window]
         # 修复 KeyError: 'hourly_peak_pending_output'
-        peak_pending_output = [self.results.get('hourly_peak_pending_output', [0.0] * 8760)[i] for i in hours]
-        peak_output = [self.results.get('hourly_peak_output', [0.0] * 8760)[i] for i in hours]
+        peak_pending_output = self.results.get('hourly_peak_pending_output', empty)[window]
+        peak_output = self.results.get('hourly_peak_output', empty)[window]
         
-        # 将小时转换为日期格式
-        dates = [datetime(2025, 1, 1) + timedelta(hours=h) for h in hours]
+        # 将小时转换为matplotlib日期数值
+        dates = calendar.date_nums[start_hour:end_hour + 1]
         
         # 绘制各类出力组成
         line_total_load, = self.ax.plot(dates, total_load, label='总负荷', linewidth=0.5, color='blue')
         line_generation, = self.ax.plot(dates, generation, label='总出力', linewidth=0.5, color='green')
         line_grid_load, = self.ax.plot(dates, grid_load, label='下网负荷', linewidth=0.5, color='red')
-        fill_pv = self.ax.fill_between(dates, [0]*len(dates), pv_output, label='光伏出力', alpha=0.3, color='orange')
-        fill_wind = self.ax.fill_between(dates, [0]*len(dates), wind_output, label='风机出力', alpha=0.3, color='purple')
-        fill_chp = self.ax.fill_between(dates, [0]*len(dates), chp_output, label='热电联产出力', alpha=0.3, color='brown')
-        fill_peak = self.ax.fill_between(dates, [0]*len(dates), peak_output, label='调峰机组出力', alpha=0.3, color='cyan')
+        fill_pv = self.ax.fill_between(dates, 0, pv_output, label='光伏出力', alpha=0.3, color='orange')
+        fill_wind = self.ax.fill_between(dates, 0, wind_output, label='风机出力', alpha=0.3, color='purple')
+        fill_chp = self.ax.fill_between(dates, 0, chp_output, label='热电联产出力', alpha=0.3, color='brown')
+        fill_peak = self.ax.fill_between(dates, 0, peak_output, label='调峰机组出力', alpha=0.3, color='cyan')
         
         self.ax.set_xlabel('日期 (MM-DD)')
         self.ax.set_ylabel('功率 (kW)')
         self.ax.set_title(f'能源供需趋势 ({self.result_start_date_var.get()} 至 {self.result_end_date_var.get()})')
         
         # 设置x轴日期格式
+        self.ax.xaxis_date()
         self.ax.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%m-%d'))
         
         # 根据时间跨度自动选择适当的日期定位器
-        date_span = (dates[-1] - dates[0]).days
+        date_span = (end_hour - start_hour) // (24 * calendar.steps_per_hour)
         if date_span <= 31:  # 一个月内，使用周定位器
             self.ax.xaxis.set_major_locator(plt.matplotlib.dates.WeekdayLocator(interval=1))
         elif date_span <= 180:  # 6个月内，使用双周定位器
@@ -3692,10 +3057,10 @@ class EnergyBalanceApp:
         # 只在没有真实数据导入时才生成示例数据
         # 检查是否有真实数据
         has_real_data = any([
-            any(self.data_model.electric_load_hourly),
-            any(self.data_model.heat_load_hourly),
-            any(self.data_model.solar_irradiance_hourly),
-            any(self.data_model.wind_speed_hourly)
+            np.any(self.data_model.electric_load_hourly),
+            np.any(self.data_model.heat_load_hourly),
+            np.any(self.data_model.solar_irradiance_hourly),
+            np.any(self.data_model.wind_speed_hourly)
         ])
         
         if has_real_data:
@@ -3805,7 +3170,6 @@ class EnergyBalanceApp:
             return
         
         try:
-            from datetime import datetime, timedelta
             from openpyxl import Workbook
         except ImportError:
             messagebox.showerror("错误", "缺少openpyxl库，请先安装：pip install openpyxl")
@@ -3828,11 +3192,10 @@ class EnergyBalanceApp:
         ws1.append(headers)
         
         # 写入数据行
-        base_date = datetime(2026, 1, 1)  # 从2026年开始
-        for i in range(8760):
-            # 构造准确的时间字符串
-            current_time = base_date + timedelta(hours=i)
-            time_str = current_time.strftime("%Y-%m-%d %H:%M")
+        calendar = self.get_calendar()
+        for i in range(calendar.hours):
+            # 时间字符串取自日期对照表
+            time_str = str(calendar.timestamps[i])
             
             row = [
                 time_str,
@@ -3847,7 +3210,7 @@ class EnergyBalanceApp:
                 self.results['hourly_pv_output'][i],
                 self.results['hourly_wind_output'][i],
                 # 修复 KeyError: 'hourly_peak_pending_output'
-                self.results.get('hourly_peak_pending_output', [0.0] * 8760)[i],
+                self.results['hourly_peak_pending_output'][i] if 'hourly_peak_pending_output' in self.results else 0.0,
                 self.results['hourly_peak_output'][i],
                 self.results['hourly_thermal_output'][i],
                 self.results['hourly_generation'][i],
@@ -3867,66 +3230,33 @@ class EnergyBalanceApp:
                          '光伏风电发电量(kWh)', '光伏风电消纳电量(kWh)', '弃电量(kWh)', '下网电量(kWh)', '弃风光率(%)']
         ws2.append(monthly_headers)
         
-        # 计算每月统计数据
-        monthly_stats = {}
-        base_date = datetime(2026, 1, 1)
-        
-        # 初始化12个月的数据
-        for month in range(1, 13):
-            monthly_stats[month] = {
-                'grid_load_sum': 0.0,          # 下网电量
-                'abandon_sum': 0.0,            # 弃风光量
-                'max_output_sum': 0.0,         # 光伏风电发电量(最大出力)
-                'generation_sum': 0.0,         # 总发电量
-                'total_load_sum': 0.0,         # 总用电量
-                'wind_pv_abandon_sum': 0.0,    # 弃电量
-                'thermal_sum': 0.0,            # 火电发电量
-                'internal_electric_sum': 0.0,  # 厂用电量
-                'wind_pv_actual_sum': 0.0,     # 光伏风电消纳电量
-                'corrected_electric_sum': 0.0  # 负荷用电量（修正后电力负荷累加）
-            }
-        
-        # 累计每个月的数据
-        for i in range(8760):
-            current_time = base_date + timedelta(hours=i)
-            month = current_time.month
-            
-            # 累计下网电量（下网负荷相加）
-            monthly_stats[month]['grid_load_sum'] += self.results['hourly_grid_load'][i]
-            
-            # 累计最大风光发电量
-            pv_output = self.results['hourly_pv_output'][i]
-            wind_output = self.results['hourly_wind_output'][i]
-            monthly_stats[month]['max_output_sum'] += (pv_output + wind_output)
-            
-            # 累计总发电量
-            monthly_stats[month]['generation_sum'] += self.results['hourly_generation'][i]
-            
-            # 累计总用电量
-            monthly_stats[month]['total_load_sum'] += self.results['hourly_total_load'][i]
-            
-            # 累计弃电量（原弃电量 - 灵活负荷的消纳电量）
-            hourly_original_abandon = max(self.results['hourly_wind_pv_abandon'][i], 0)  # 确保为非负数
-            hourly_flexible_consumption = self.results['hourly_flexible_load_consumption'][i]
-            adjusted_hourly_abandon = max(hourly_original_abandon - hourly_flexible_consumption, 0)
-            monthly_stats[month]['wind_pv_abandon_sum'] += adjusted_hourly_abandon
-            
-            # 累计弃风光量（用于弃风光率计算，使用修正后的弃电量）
-            monthly_stats[month]['abandon_sum'] = monthly_stats[month]['wind_pv_abandon_sum']
-            
-            # 累计火电发电量
-            monthly_stats[month]['thermal_sum'] += self.results['hourly_thermal_output'][i]
-            
-            # 累计厂用电量
-            monthly_stats[month]['internal_electric_sum'] += self.results['hourly_internal_electric_load'][i]
-            
-            # 累计光伏风电消纳电量（原消纳电量 + 灵活负荷的消纳电量）
-            hourly_original_actual = (pv_output + wind_output) - hourly_original_abandon
-            hourly_adjusted_actual = hourly_original_actual + hourly_flexible_consumption
-            monthly_stats[month]['wind_pv_actual_sum'] += hourly_adjusted_actual
-            
-            # 累计负荷用电量（修正后电力负荷）
-            monthly_stats[month]['corrected_electric_sum'] += self.results['hourly_corrected_electric_load'][i]
+        # 计算每月统计数据：按月份对逐时段序列分组累加（np.bincount按时段顺序累加），
+        # 功率合计乘以时段长度得到电量
+        results = self.results
+        month_index = calendar.month - 1
+        step_hours = self.data_model.step_hours
+        monthly_sum = lambda values: np.bincount(month_index, weights=np.asarray(values, dtype=float),
+                                                 minlength=12) * step_hours
+        max_output = results['hourly_pv_output'] + results['hourly_wind_output']
+        # 弃电量 = 原弃电量 - 灵活负荷的消纳电量（均不小于0）
+        original_abandon = np.maximum(results['hourly_wind_pv_abandon'], 0)
+        flexible_consumption = results['hourly_flexible_load_consumption']
+        adjusted_abandon = monthly_sum(np.maximum(original_abandon - flexible_consumption, 0))
+        monthly_columns = {
+            'grid_load_sum': monthly_sum(results['hourly_grid_load']),         # 下网电量（下网负荷相加）
+            'abandon_sum': adjusted_abandon,                                   # 弃风光量（用于弃风光率计算，使用修正后的弃电量）
+            'max_output_sum': monthly_sum(max_output),                         # 光伏风电发电量(最大出力)
+            'generation_sum': monthly_sum(results['hourly_generation']),       # 总发电量
+            'total_load_sum': monthly_sum(results['hourly_total_load']),       # 总用电量
+            'wind_pv_abandon_sum': adjusted_abandon,                           # 弃电量
+            'thermal_sum': monthly_sum(results['hourly_thermal_output']),      # 火电发电量
+            'internal_electric_sum': monthly_sum(results['hourly_internal_electric_load']),  # 厂用电量
+            # 光伏风电消纳电量（原消纳电量 + 灵活负荷的消纳电量）
+            'wind_pv_actual_sum': monthly_sum(max_output - original_abandon + flexible_consumption),
+            'corrected_electric_sum': monthly_sum(results['hourly_corrected_electric_load'])  # 负荷用电量（修正后电力负荷累加）
+        }
+        monthly_stats = {month: {key: float(values[month - 1]) for key, values in monthly_columns.items()}
+                         for month in range(1, 13)}
         
         # 计算年度汇总数据
         annual_totals = {
@@ -3951,7 +3281,7 @@ class EnergyBalanceApp:
                 abandon_rate = (stats['abandon_sum'] / stats['max_output_sum']) * 100
             
             # 月份格式化
-            month_str = f"2026-{month:02d}"
+            month_str = f"{calendar.year}-{month:02d}"
             # 按照：总用电量、总发电量、火电发电量、负荷用电量、厂用电量、光伏风电发电量、光伏风电消纳电量、弃电量、下网电量、弃风光率 排列
             row = [month_str, stats['total_load_sum'], stats['generation_sum'], stats['thermal_sum'],
                    stats['corrected_electric_sum'], stats['internal_electric_sum'], stats['max_output_sum'], 
@@ -4010,12 +3340,10 @@ class EnergyBalanceApp:
             writer.writerow(headers)
             
             # 写入数据行
-            # 使用准确的2025年时间戳（根据规范要求）
-            from datetime import datetime, timedelta
-            base_date = datetime(2025, 1, 1)
-            for i in range(8760):
-                current_time = base_date + timedelta(hours=i)
-                time_str = current_time.strftime("%Y-%m-%d %H:%M")
+            # 时间戳取自日期对照表，与计算和图表使用同一基准年份
+            calendar = self.get_calendar()
+            for i in range(calendar.hours):
+                time_str = str(calendar.timestamps[i])
                 
                 row = [
                     time_str,
@@ -4029,7 +3357,7 @@ class EnergyBalanceApp:
                     self.results['hourly_pv_output'][i],
                     self.results['hourly_wind_output'][i],
                     # 修复 KeyError: 'hourly_peak_pending_output'
-                    self.results.get('hourly_peak_pending_output', [0.0] * 8760)[i],
+                    self.results['hourly_peak_pending_output'][i] if 'hourly_peak_pending_output' in self.results else 0.0,
                     self.results['hourly_peak_output'][i],
                     self.results['hourly_thermal_output'][i],
                     self.results['hourly_generation'][i],
@@ -4202,6 +3530,21 @@ class EnergyBalanceApp:
         self.wind_cost = tk.DoubleVar(value=self.data_model.optimization_params['wind_cost'])  # 使用数据模型中的值
         ttk.Entry(params_frame, textvariable=self.wind_cost, width=20).grid(row=4, column=1, sticky=tk.W, padx=5)
         
+        # 优化方法
+        ttk.Label(params_frame, text="优化方法: ").grid(row=5, column=0, sticky=tk.W, pady=5)
+        method = self.data_model.optimization_params.get('method', 'grid')
+        self.optimization_method = tk.StringVar(value=OPTIMIZATION_METHODS.get(method, OPTIMIZATION_METHODS['grid'])[0])
+        ttk.Combobox(params_frame, textvariable=self.optimization_method, state="readonly", width=17,
+                     values=[name for name, *_ in OPTIMIZATION_METHODS.values()]).grid(row=5, column=1, sticky=tk.W, padx=5)
+        
+        # 跨时段约束（仅全年线性规划使用，0表示不限制）
+        self.optimization_constraint_vars = {}
+        for row, (key, label) in enumerate(OPTIMIZATION_CONSTRAINTS, start=6):
+            ttk.Label(params_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=5)
+            var = tk.DoubleVar(value=self.data_model.optimization_params.get(key, 0.0))
+            ttk.Entry(params_frame, textvariable=var, width=20).grid(row=row, column=1, sticky=tk.W, padx=5)
+            self.optimization_constraint_vars[key] = var
+        
         # 优化控制按钮
         control_frame = ttk.Frame(tab)
         control_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=5)
@@ -4211,6 +3554,15 @@ class EnergyBalanceApp:
         ttk.Button(control_frame, text="开始优化计算", command=self.start_optimization).grid(row=0, column=1, padx=5, pady=10)
         ttk.Button(control_frame, text="导出优化结果", command=self.export_optimization_results).grid(row=0, column=2, padx=5, pady=10)
         ttk.Button(control_frame, text="更新趋势图", command=self.update_optimization_plot).grid(row=0, column=3, padx=5, pady=10)
+        self.cancel_optimization_button = ttk.Button(control_frame, text="取消优化", state=tk.DISABLED,
+                                                     command=lambda: self.cancel_background_task('optimization_task'))
+        self.cancel_optimization_button.grid(row=0, column=4, padx=5, pady=10)
+        
+        # 优化进度
+        self.optimization_progress = ttk.Progressbar(control_frame, mode='determinate')
+        self.optimization_progress.grid(row=1, column=0, columnspan=5, sticky=(tk.W, tk.E), padx=5)
+        self.optimization_progress_label = ttk.Label(control_frame, text="准备就绪")
+        self.optimization_progress_label.grid(row=2, column=0, columnspan=5, pady=5)
         
         # 优化结果显示
         result_frame = ttk.LabelFrame(tab, text="优化结果", padding="10")
@@ -4239,12 +3591,12 @@ class EnergyBalanceApp:
         time_range_frame_opt.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Label(time_range_frame_opt, text="开始日期:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.optimization_start_date_var = tk.StringVar(value="2025-01-01")
+        self.optimization_start_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-01-01")
         self.optimization_start_date_entry = ttk.Entry(time_range_frame_opt, textvariable=self.optimization_start_date_var, width=12)
         self.optimization_start_date_entry.grid(row=0, column=1, padx=5)
         
         ttk.Label(time_range_frame_opt, text="结束日期:").grid(row=0, column=2, sticky=tk.W, padx=(10, 5))
-        self.optimization_end_date_var = tk.StringVar(value="2025-12-31")
+        self.optimization_end_date_var = tk.StringVar(value=f"{DEFAULT_BASE_YEAR}-12-31")
         self.optimization_end_date_entry = ttk.Entry(time_range_frame_opt, textvariable=self.optimization_end_date_var, width=12)
         self.optimization_end_date_entry.grid(row=0, column=3, padx=5)
         
@@ -4263,225 +3615,79 @@ class EnergyBalanceApp:
         """
         开始优化计算
         """
-        import numpy as np
-        from scipy.optimize import minimize_scalar
-        
-        # 获取当前设置的参数
-        basic_load_revenue = self.basic_load_revenue.get()
-        flexible_load_revenue = self.flexible_load_revenue.get()
-        thermal_cost = self.thermal_cost.get()
-        pv_cost = self.pv_cost.get()
-        wind_cost = self.wind_cost.get()
+        if self.optimization_task is not None:
+            messagebox.showwarning("警告", "优化计算正在进行，请等待完成或取消后再试！")
+            return
         
         # 检查是否有计算结果可供优化
         if not self.results:
             messagebox.showwarning("警告", "请先进行年度平衡计算，再进行优化！")
             return
         
-        # 获取电价数据，使用导入的下网电价，如果没有则默认为0
-        grid_price = self.data_model.grid_purchase_price_hourly
-        
-        # 创建优化后的结果字典
-        optimized_results = {
-            'hourly_basic_load': [0.0] * 8760,      # 基础负荷优化值
-            'hourly_flexible_load': [0.0] * 8760,  # 灵活负荷优化值
-            'hourly_revenue': [0.0] * 8760,        # 每小时收益
-            'total_revenue': 0.0                     # 总收益
+        # 获取当前设置的参数
+        params = {
+            'basic_load_revenue': self.basic_load_revenue.get(),
+            'flexible_load_revenue': self.flexible_load_revenue.get(),
+            'thermal_cost': self.thermal_cost.get(),
+            'pv_cost': self.pv_cost.get(),
+            'wind_cost': self.wind_cost.get()
         }
+        for key, var in self.optimization_constraint_vars.items():
+            params[key] = var.get()
+        method = self.get_optimization_method()
         
-        # 执行逐小时优化
-        total_revenue = 0.0
-        
-        # 预计算可能重复使用的值
-        from datetime import datetime, timedelta
-        base_date = datetime(2024, 1, 1)
-        
-        for hour in range(8760):
-            # 获取平衡计算得到的电力负荷（考虑检修和投运计划修正后）作为基础负荷的最大值
-            max_basic_load = self.results['hourly_corrected_electric_load'][hour]
-            
-            # 获取当前小时的其他参数（来自平衡计算结果）
-            chp_output = self.results['hourly_chp_output'][hour]
-            pv_output = self.results['hourly_pv_output'][hour]
-            wind_output = self.results['hourly_wind_output'][hour]
-            
-            # 当前小时的约束条件
-            max_flexible_load = self.data_model.flexible_load_max
-            min_flexible_load = self.data_model.flexible_load_min
-            
-            # 获取当前小时的日期信息
-            current_date = base_date + timedelta(hours=hour)
-            current_month = current_date.month
-            
-            # 获取当前小时的活动检修计划和投产计划
-            calculator = self.calculator  # 获取计算器实例以使用其方法
-            active_maintenance_schedules = calculator.get_active_maintenance_schedules(hour)
-            active_commissioning_schedules = calculator.get_active_commissioning_schedules(hour)
-            
-            # 预先计算修正后的调峰机组参数
-            current_peak_power_max = self.data_model.peak_power_max
-            if 5 <= current_month <= 9:  # 夏季
-                current_peak_power_min = self.data_model.peak_power_min_summer
-            else:  # 冬季
-                current_peak_power_min = self.data_model.peak_power_min_winter
-            
-            # 应用检修计划对调峰机组参数的修正
-            for schedule in active_maintenance_schedules:
-                power_type = schedule.get('power_type', '')
-                power_size = schedule.get('power_size', 0.0)
-                
-                if power_type == '调峰机组出力':
-                    # 检修计划影响调峰机组出力
-                    current_peak_power_max = current_peak_power_max - power_size
-                    # 根据经验教训，检修计划影响调峰机组出力时，需同时降低最大出力，并按比例调整最小出力
-                    original_peak_power_max = self.data_model.peak_power_max
-                    if original_peak_power_max > 0:
-                        # 按比例调整最小出力
-                        if 5 <= current_month <= 9:  # 夏季
-                            current_peak_power_min = self.data_model.peak_power_min_summer * (current_peak_power_max / original_peak_power_max)
-                        else:  # 冬季
-                            current_peak_power_min = self.data_model.peak_power_min_winter * (current_peak_power_max / original_peak_power_max)
-            
-            # 应用投产计划对调峰机组参数的修正
-            for schedule in active_commissioning_schedules:
-                power_type = schedule.get('power_type', '')
-                power_size = schedule.get('power_size', 0.0)
-                start_date = schedule.get('start_date', '')
-                end_date = schedule.get('end_date', '')
-                
-                # 计算线性插值因子
-                interpolation_factor = calculator.calculate_interpolation_factor(hour, start_date, end_date)
-                
-                if power_type == '调峰机组最大出力':
-                    # 投产计划对调峰机组最大出力的影响
-                    adjusted_power_size = power_size * interpolation_factor
-                    current_peak_power_max = current_peak_power_max - (power_size - adjusted_power_size)
-                elif power_type == '调峰机组夏季最小出力':
-                    # 投产计划对调峰机组夏季最小出力的影响
-                    adjusted_power_size = power_size * interpolation_factor
-                    if 5 <= current_month <= 9:  # 夏季：5-9月
-                        current_peak_power_min = self.data_model.peak_power_min_summer - adjusted_power_size
-                elif power_type == '调峰机组冬季最小出力':
-                    # 投产计划对调峰机组冬季最小出力的影响
-                    adjusted_power_size = power_size * interpolation_factor
-                    if current_date.month < 5 or current_date.month > 9:  # 冬季：10-12月和1-4月
-                        current_peak_power_min = self.data_model.peak_power_min_winter - adjusted_power_size
-                elif power_type == '调峰机组最小出力':
-                    # 为了向后兼容，仍然支持原有的调峰机组最小出力设置
-                    adjusted_power_size = power_size * interpolation_factor
-                    if 5 <= current_month <= 9:  # 夏季
-                        current_peak_power_min = self.data_model.peak_power_min_summer - adjusted_power_size
-                    else:  # 冬季
-                        current_peak_power_min = self.data_model.peak_power_min_winter - adjusted_power_size
-            
-            # 定义收益计算函数
-            def calculate_revenue(basic_load, flexible_load):
-                # 计算当前负荷组合下的总负荷
-                total_load = basic_load + flexible_load
-                
-                # 计算火电出力（热电联产+调峰）
-                peak_pending = total_load - chp_output - pv_output - wind_output
-                
-                # 调峰机组出力
-                peak_output = max(min(peak_pending, current_peak_power_max), current_peak_power_min)
-                
-                # 火电出力
-                thermal_output = chp_output + peak_output
-                
-                # 计算下网负荷
-                generation = pv_output + wind_output + thermal_output
-                grid_load = total_load - generation
-                
-                # 计算收益
-                revenue = (
-                    basic_load * basic_load_revenue + 
-                    flexible_load * flexible_load_revenue - 
-                    thermal_output * thermal_cost - 
-                    pv_output * pv_cost - 
-                    wind_output * wind_cost
-                )
-                
-                # 如果需要购电，减去购电成本
-                if grid_load > 0:
-                    revenue -= grid_load * grid_price[hour] if hour < len(grid_price) else 0
-                
-                return revenue
-            
-            # 为了优化性能，我们不使用双重优化，而是分析经济性来确定最优策略
-            # 如果基础负荷收益 > 火电成本，且基础负荷收益 > 灵活负荷收益，则尽可能使用基础负荷
-            # 如果灵活负荷收益 > 火电成本，则使用灵活负荷
-            
-            best_revenue = float('-inf')
-            best_basic_load = 0
-            best_flexible_load = 0
-            
-            # 测试几种策略
-            strategies = [
-                (0, 0),  # 最小值
-                (max_basic_load, min_flexible_load),  # 基础负荷最大，灵活负荷最小
-                (0, max_flexible_load),  # 基础负荷最小，灵活负荷最大
-                (max_basic_load, max_flexible_load),  # 最大值
-            ]
-            
-            # 评估每种策略
-            for basic_test, flex_test in strategies:
-                revenue = calculate_revenue(basic_test, flex_test)
-                if revenue > best_revenue:
-                    best_revenue = revenue
-                    best_basic_load = basic_test
-                    best_flexible_load = flex_test
-            
-            # 简单线性搜索优化
-            # 以较粗粒度搜索可能的组合
-            basic_step = max_basic_load / 10 if max_basic_load > 0 else 0
-            flex_step = (max_flexible_load - min_flexible_load) / 10 if (max_flexible_load - min_flexible_load) > 0 else 0
-            
-            for i in range(11):  # 0到10，共11个点
-                basic_load = min(i * basic_step, max_basic_load)
-                for j in range(11):  # 0到10，共11个点
-                    flexible_load = min(min_flexible_load + j * flex_step, max_flexible_load)
-                    revenue = calculate_revenue(basic_load, flexible_load)
-                    if revenue > best_revenue:
-                        best_revenue = revenue
-                        best_basic_load = basic_load
-                        best_flexible_load = flexible_load
-            
-            # 存储优化结果
-            optimized_results['hourly_basic_load'][hour] = best_basic_load
-            optimized_results['hourly_flexible_load'][hour] = best_flexible_load
-            optimized_results['hourly_revenue'][hour] = best_revenue
-            
-            total_revenue += best_revenue
-        
-        optimized_results['total_revenue'] = total_revenue
+        # 使用数据模型和平衡计算结果的快照，计算期间界面上的修改不影响本次计算
+        data_model = copy.deepcopy(self.data_model)
+        results = dict(self.results)
+        calendar = self.get_calendar()
+        
+        # 在后台线程中执行优化
+        self.optimization_progress_label.config(text="正在优化...")
+        self.optimization_progress["value"] = 0
+        self.optimization_task = BackgroundTask(self.result_cache.optimize, data_model, results, params, method,
+                                                calendar=calendar).start()
+        self.cancel_optimization_button.config(state=tk.NORMAL)
+        self.poll_background_task('optimization_task', self.optimization_progress, self.optimization_progress_label,
+                                  self.cancel_optimization_button,
+                                  lambda optimized_results: self.finish_optimization(optimized_results, params))
         
+    def finish_optimization(self, optimized_results, params):
+        """
+        优化计算完成后的处理（在界面线程中执行）
+        """
         # 将优化结果存储到实例变量中
         self.optimized_results = optimized_results
+        self.optimization_progress_label.config(text="优化完成")
         
         # 显示优化结果摘要
+        total_revenue = optimized_results['total_revenue']
+        method_name = OPTIMIZATION_METHODS[optimized_results['method']][0]
         avg_basic_load = np.mean(optimized_results['hourly_basic_load'])
         avg_flexible_load = np.mean(optimized_results['hourly_flexible_load'])
+        # 按时段长度折算的总小时数（逐小时数据为8760）
+        total_hours = len(optimized_results['hourly_revenue']) * self.data_model.step_hours
         
         result_text = f"""优化计算完成!
 
 优化参数:
-基础负荷单位收益: {basic_load_revenue} 元/kWh
-灵活负荷单位收益: {flexible_load_revenue} 元/kWh
-火电发电单位成本: {thermal_cost} 元/kWh
-光伏发电单位成本: {pv_cost} 元/kWh
-风机发电单位成本: {wind_cost} 元/kWh
+优化方法: {method_name}
+基础负荷单位收益: {params['basic_load_revenue']} 元/kWh
+灵活负荷单位收益: {params['flexible_load_revenue']} 元/kWh
+火电发电单位成本: {params['thermal_cost']} 元/kWh
+光伏发电单位成本: {params['pv_cost']} 元/kWh
+风机发电单位成本: {params['wind_cost']} 元/kWh
 
 优化结果:
 总收益: {total_revenue:,.2f} 元
-平均每小时收益: {total_revenue/8760:.2f} 元
+平均每小时收益: {total_revenue/total_hours:.2f} 元
 
 基础负荷:
   平均值: {avg_basic_load:.2f} kW
-  范围: {min(optimized_results['hourly_basic_load']):.2f} - {max(optimized_results['hourly_basic_load']):.2f} kW
+  范围: {optimized_results['hourly_basic_load'].min():.2f} - {optimized_results['hourly_basic_load'].max():.2f} kW
 
 灵活负荷:
   平均值: {avg_flexible_load:.2f} kW
-  范围: {min(optimized_results['hourly_flexible_load']):.2f} - {max(optimized_results['hourly_flexible_load']):.2f} kW
+  范围: {optimized_results['hourly_flexible_load'].min():.2f} - {optimized_results['hourly_flexible_load'].max():.2f} kW
 
 说明:
 - 优化目标为每小时收益最大化
@@ -4498,7 +3704,7 @@ class EnergyBalanceApp:
         """
         导出优化结果
         """
-        if not hasattr(self, 'optimized_results'):
+        if getattr(self, 'optimized_results', None) is None:
             messagebox.showwarning("警告", "优化结果为空，无法导出！")
             return
         
@@ -4513,11 +3719,12 @@ class EnergyBalanceApp:
         if save_path:
             try:
                 import pandas as pd
-                from datetime import datetime, timedelta
                 
                 # 创建时间戳列表
-                base_date = datetime(2025, 1, 1)
-                time_stamps = [(base_date + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M") for i in range(8760)]
+                time_stamps = list(self.get_calendar().timestamps)
+                # 负荷合计按时段长度折算为电量，平均收益按总小时数计算
+                step_hours = self.data_model.step_hours
+                total_hours = len(self.optimized_results['hourly_revenue']) * step_hours
                 
                 # 创建DataFrame
                 df = pd.DataFrame({
@@ -4535,11 +3742,11 @@ class EnergyBalanceApp:
                     summary_data = [
                         ['项目', '值'],
                         ['总收益(元)', f'{self.optimized_results["total_revenue"]:.2f}'],
-                        ['平均每小时收益(元)', f'{self.optimized_results["total_revenue"] / 8760:.2f}'],
-                        ['基础负荷平均值(kW)', f'{sum(self.optimized_results["hourly_basic_load"]) / 8760:.2f}'],
-                        ['灵活负荷平均值(kW)', f'{sum(self.optimized_results["hourly_flexible_load"]) / 8760:.2f}'],
-                        ['基础负荷总计(kWh)', f'{sum(self.optimized_results["hourly_basic_load"]):.2f}'],
-                        ['灵活负荷总计(kWh)', f'{sum(self.optimized_results["hourly_flexible_load"]):.2f}']
+                        ['平均每小时收益(元)', f'{self.optimized_results["total_revenue"] / total_hours:.2f}'],
+                        ['基础负荷平均值(kW)', f'{np.mean(self.optimized_results["hourly_basic_load"]):.2f}'],
+                        ['灵活负荷平均值(kW)', f'{np.mean(self.optimized_results["hourly_flexible_load"]):.2f}'],
+                        ['基础负荷总计(kWh)', f'{np.sum(self.optimized_results["hourly_basic_load"]) * step_hours:.2f}'],
+                        ['灵活负荷总计(kWh)', f'{np.sum(self.optimized_results["hourly_flexible_load"]) * step_hours:.2f}']
                     ]
                     
                     summary_df = pd.DataFrame(summary_data)
@@ -4549,13 +3756,14 @@ class EnergyBalanceApp:
             except ImportError:
                 # 如果pandas不可用，使用文本格式导出
                 txt_save_path = save_path.replace('.xlsx', '.txt')
+                total_hours = len(self.optimized_results['hourly_revenue']) * self.data_model.step_hours
                 with open(txt_save_path, 'w', encoding='utf-8') as f:
                     f.write("优化结果\n\n")
                     f.write(f"总收益: {self.optimized_results['total_revenue']:.2f} 元\n")
-                    f.write(f"平均每小时收益: {self.optimized_results['total_revenue']/8760:.2f} 元\n\n")
+                    f.write(f"平均每小时收益: {self.optimized_results['total_revenue']/total_hours:.2f} 元\n\n")
                     f.write("每小时优化结果 (前10小时示例):\n")
                     f.write("小时,基础负荷优化值(kW),灵活负荷优化值(kW),每小时收益(元)\n")
-                    for i in range(min(10, 8760)):
+                    for i in range(min(10, len(self.optimized_results['hourly_revenue']))):
                         f.write(f"{i},{self.optimized_results['hourly_basic_load'][i]:.2f},{self.optimized_results['hourly_flexible_load'][i]:.2f},{self.optimized_results['hourly_revenue'][i]:.2f}\n")
                 messagebox.showinfo("成功", f"优化结果已导出至:\n{txt_save_path} (由于缺少pandas库，以文本格式导出)")
             except Exception as e:
@@ -4567,7 +3775,7 @@ class EnergyBalanceApp:
         包括优化前后的基础负荷、灵活负荷以及下网负荷对比
         """
         # 检查是否有优化结果和平衡计算结果
-        if not hasattr(self, 'optimized_results') or not self.results:
+        if getattr(self, 'optimized_results', None) is None or not self.results:
             # 如果没有数据，显示提示信息
             self.optimization_ax.clear()
             self.optimization_ax.text(0.5, 0.5, '暂无优化结果\n请先进行年度平衡计算和优化计算', 
@@ -4597,52 +3805,51 @@ class EnergyBalanceApp:
             messagebox.showerror("错误", "开始日期不能晚于结束日期")
             return
         
-        if start_hour < 0 or end_hour >= 8760:
-            messagebox.showerror("错误", "日期超出范围，应在2025-01-01至2025-12-31之间")
+        calendar = self.get_calendar()
+        if start_hour < 0 or start_hour >= calendar.hours:
+            messagebox.showerror("错误", f"日期超出范围，应在{calendar.base_date:%Y-%m-%d}至{calendar.last_date:%Y-%m-%d}之间")
             return
+        # 结束日期超出数据范围时截取到最后一个小时
+        end_hour = min(end_hour, calendar.hours - 1)
         
         # 获取时间段内的数据
         hours = list(range(start_hour, end_hour + 1))
         
         # 获取平衡计算结果（优化前）
-        original_total_load = [self.results['hourly_corrected_electric_load'][i] for i in hours]
-        original_grid_load = [self.results['hourly_grid_load'][i] for i in hours]
+        window = slice(start_hour, end_hour + 1)
+        original_total_load = self.results['hourly_corrected_electric_load'][window]
+        original_grid_load = self.results['hourly_grid_load'][window]
         
         # 对于优化前，我们将原始负荷视为基础负荷（因为优化前没有明确的负荷分解）
-        original_basic_load = [self.results['hourly_corrected_electric_load'][i] for i in hours]
+        original_basic_load = self.results['hourly_corrected_electric_load'][window]
         # 优化前没有灵活负荷的概念，所以设为0
         original_flexible_load = [0.0 for i in hours]
         
         # 获取优化结果
-        optimized_basic_load = [self.optimized_results['hourly_basic_load'][i] for i in hours]
-        optimized_flexible_load = [self.optimized_results['hourly_flexible_load'][i] for i in hours]
+        optimized_basic_load = self.optimized_results['hourly_basic_load'][window]
+        optimized_flexible_load = self.optimized_results['hourly_flexible_load'][window]
         
         # 优化后的总负荷是基础负荷和灵活负荷之和
-        optimized_total_load = [optimized_basic_load[i] + optimized_flexible_load[i] for i in hours]
+        optimized_total_load = [optimized_basic_load[i] + optimized_flexible_load[i] for i in range(len(hours))]
         
         # 计算优化后的下网负荷（需要重新计算，这里简化处理）
         # 假设优化后的下网负荷可以通过优化后的负荷和发电量计算得出
         # 注意：这里需要实际的计算逻辑，我们暂时使用示例数据
         try:
             # 计算优化后的总负荷
-            optimized_total_load = [optimized_basic_load[i] + optimized_flexible_load[i] for i in hours]
+            optimized_total_load = [optimized_basic_load[i] + optimized_flexible_load[i] for i in range(len(hours))]
             
             # 使用平衡计算中的计算方法来估算优化后的下网负荷
             # 这里使用一个简化的逻辑，实际应用中需要更精确的计算
             optimized_grid_load = []
-            for i in hours:
+            for idx, i in enumerate(hours):
                 # 重新计算优化后的各种出力
                 chp_output = self.results['hourly_chp_output'][i]
                 pv_output = self.results['hourly_pv_output'][i]
                 wind_output = self.results['hourly_wind_output'][i]
                 
                 # 获取当前小时的修正后调峰机组参数
-                from datetime import datetime, timedelta
-                base_date = datetime(2024, 1, 1)
-                current_date = base_date + timedelta(hours=i)
-                current_month = current_date.month
-                
-                if 5 <= current_month <= 9:  # 夏季
+                if calendar.summer_mask[i]:  # 夏季
                     current_peak_power_min = self.data_model.peak_power_min_summer
                     current_peak_power_max = self.data_model.peak_power_max
                 else:  # 冬季
@@ -4650,7 +3857,7 @@ class EnergyBalanceApp:
                     current_peak_power_max = self.data_model.peak_power_max
                 
                 # 计算优化后的调峰机组出力
-                peak_pending = optimized_total_load[i] - chp_output - pv_output - wind_output
+                peak_pending = optimized_total_load[idx] - chp_output - pv_output - wind_output
                 peak_output = max(min(peak_pending, current_peak_power_max), current_peak_power_min)
                 thermal_output = chp_output + peak_output
                 
@@ -4658,7 +3865,7 @@ class EnergyBalanceApp:
                 generation = pv_output + wind_output + thermal_output
                 
                 # 计算优化后的下网负荷
-                optimized_grid_load_val = optimized_total_load[i] - generation
+                optimized_grid_load_val = optimized_total_load[idx] - generation
                 optimized_grid_load.append(optimized_grid_load_val)
                 
         except Exception as e:
@@ -4666,9 +3873,8 @@ class EnergyBalanceApp:
             # 如果计算出错，使用原始的下网负荷数据
             optimized_grid_load = [self.results['hourly_grid_load'][i] for i in hours]
         
-        # 将小时转换为日期格式（从2025-01-01开始）
-        from datetime import datetime, timedelta
-        dates = [datetime(2025, 1, 1) + timedelta(hours=h) for h in hours]
+        # 将小时转换为matplotlib日期数值
+        dates = calendar.date_nums[start_hour:end_hour + 1]
         
         # 绘制优化前后的对比图（不包括优化前灵活负荷）
         line_orig_basic, = self.optimization_ax.plot(dates, original_basic_load, label='修正后电力负荷(优化前)', linewidth=0.8, color='blue', linestyle='--')
@@ -4682,10 +3888,11 @@ class EnergyBalanceApp:
         self.optimization_ax.set_title('优化前后负荷对比趋势图')
         
         # 设置x轴日期格式
+        self.optimization_ax.xaxis_date()
         self.optimization_ax.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%m-%d'))
         
         # 根据时间跨度自动选择适当的日期定位器
-        date_span = (dates[-1] - dates[0]).days
+        date_span = (end_hour - start_hour) // (24 * calendar.steps_per_hour)
         if date_span <= 31:  # 一个月内，使用日定位器
             self.optimization_ax.xaxis.set_major_locator(plt.matplotlib.dates.DayLocator(interval=1))
         elif date_span <= 180:  # 6个月内，使用周定位器
@@ -5008,6 +4215,12 @@ class EnergyBalanceApp:
                 # 添加新条目
                 tree.insert('', tk.END, values=values)
                 
+            # 记录修改前的计划，用于确定需要重算的小时区间
+            schedules = (self.data_model.maintenance_schedules if schedule_type == "maintenance"
+                         else self.data_model.commissioning_schedules)
+            old_schedules = list(schedules)
+            before_hash = model_inputs_hash(self.data_model)
+                
             # 同步更新数据模型
             schedule_data = {
                 'name': name,
@@ -5077,6 +4290,7 @@ class EnergyBalanceApp:
                 else:
                     # 添加新数据
                     self.data_model.commissioning_schedules.append(schedule_data)
+            self.mark_schedule_changes(schedule_type, old_schedules, schedules, before_hash)
                 
             # 关闭对话框
             dialog.destroy()
@@ -5291,6 +4505,10 @@ class EnergyBalanceApp:
                 # 添加新条目
                 self.output_limit_tree.insert('', tk.END, values=values)
                 
+            # 记录修改前的计划，用于确定需要重算的小时区间
+            old_schedules = list(self.data_model.output_limit_schedules)
+            before_hash = model_inputs_hash(self.data_model)
+                
             # 同步更新数据模型
             schedule_data = {
                 'name': name,
@@ -5323,6 +4541,8 @@ class EnergyBalanceApp:
             else:
                 # 添加新数据
                 self.data_model.output_limit_schedules.append(schedule_data)
+            self.mark_schedule_changes('output_limit', old_schedules, self.data_model.output_limit_schedules,
+                                       before_hash)
                 
             # 关闭对话框
             dialog.destroy()
@@ -5333,14 +4553,26 @@ class EnergyBalanceApp:
         ttk.Button(button_frame, text="确定", command=confirm).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="取消", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
+    def mark_schedule_changes(self, schedule_type, old_schedules, new_schedules, before_hash):
+        """
+        记录计划条目修改影响的小时区间，下次年度平衡计算只重算该区间
+        """
+        hour_range = schedule_changes_range(old_schedules, new_schedules, schedule_type, self.get_calendar())
+        self.data_model.mark_dirty(hour_range, before_hash)
+
+    def get_calendar(self):
+        """
+        获取当前数据对应的时段与日期对照表（按数据模型的时间步长）
+        """
+        return CalendarIndex.get(self.calculator.base_year, len(self.data_model.electric_load_hourly),
+                                 self.data_model.time_step_minutes)
+    
     def date_to_hour(self, date):
         """
-        将日期转换为一年中对应的小时数
-        假设数据是从2025年1月1日0时开始的
+        将日期转换为一年中对应的时段索引（逐小时数据即小时数）
+        数据从基准年份1月1日0时开始
         """
-        start_of_year = datetime(2025, 1, 1)
-        delta = date - start_of_year
-        return int(delta.total_seconds() // 3600)
+        return self.get_calendar().hour_of(date)
     
     def on_legend_click_data(self, event):
         """
@@ -5424,24 +4656,17 @@ class EnergyBalanceApp:
         # 将x坐标转换为日期 - 使用matplotlib的日期转换机制
         try:
             import matplotlib.dates as mdates
-            from datetime import datetime, timedelta
-            
-            # 将matplotlib日期转换为datetime对象
-            hover_datetime = mdates.num2date(x)
-            # 只显示到整小时
-            date_str = hover_datetime.strftime('%m-%d %H:00')  # 只显示月-日 小时:00，不显示分钟
             
-            # 计算最接近的小时索引，基于相对于年初的小时数
-            # 假设数据从1月1日开始，计算相对于年初的小时数
-            # 获取hover_datetime是一年中的第几天和小时
-            day_of_year = hover_datetime.timetuple().tm_yday  # 一年中的第几天 (1-366)
-            hour_of_day = hover_datetime.hour  # 小时 (0-23)
-            
-            # 计算总小时数 (0-8759)
-            hour_idx = (day_of_year - 1) * 24 + hour_of_day
+            # 通过日期对照表将matplotlib日期数值转换为小时索引
+            calendar = self.get_calendar()
+            hour_idx = calendar.hour_at_date_num(x)
+            if 0 <= hour_idx < calendar.hours:
+                date_str = calendar.timestamps[hour_idx][5:]  # 只显示月-日 小时:00，不显示年份
+            else:
+                date_str = mdates.num2date(x).strftime('%m-%d %H:00')
             
             # 确保小时索引在有效范围内
-            if 0 <= hour_idx < 8760:
+            if 0 <= hour_idx < calendar.hours:
                 # 获取所有曲线在当前小时的数据（使用实际数据值，而非鼠标位置的y值）
                 values_info = []
                 
@@ -5522,23 +4747,17 @@ class EnergyBalanceApp:
         # 将x坐标转换为日期 - 使用matplotlib的日期转换机制
         try:
             import matplotlib.dates as mdates
-            from datetime import datetime, timedelta
-            
-            # 将matplotlib日期转换为datetime对象
-            hover_datetime = mdates.num2date(x)
-            # 只显示到整小时
-            date_str = hover_datetime.strftime('%m-%d %H:00')  # 只显示月-日 小时:00，不显示分钟
-            
-            # 计算最接近的小时索引，基于相对于年初的小时数
-            # 获取hover_datetime是一年中的第几天和小时
-            day_of_year = hover_datetime.timetuple().tm_yday  # 一年中的第几天 (1-366)
-            hour_of_day = hover_datetime.hour  # 小时 (0-23)
             
-            # 计算总小时数 (0-8759)
-            hour_idx = (day_of_year - 1) * 24 + hour_of_day
+            # 通过日期对照表将matplotlib日期数值转换为小时索引
+            calendar = self.get_calendar()
+            hour_idx = calendar.hour_at_date_num(x)
+            if 0 <= hour_idx < calendar.hours:
+                date_str = calendar.timestamps[hour_idx][5:]  # 只显示月-日 小时:00，不显示年份
+            else:
+                date_str = mdates.num2date(x).strftime('%m-%d %H:00')
             
             # 确保小时索引在有效范围内
-            if 0 <= hour_idx < 8760 and self.results:
+            if 0 <= hour_idx < calendar.hours and self.results:
                 # 获取所有曲线在当前小时的数据（使用实际数据值，而非鼠标位置的y值）
                 values_info = []
                 
@@ -5622,23 +4841,17 @@ class EnergyBalanceApp:
         # 将x坐标转换为日期 - 使用matplotlib的日期转换机制
         try:
             import matplotlib.dates as mdates
-            from datetime import datetime, timedelta
-            
-            # 将matplotlib日期转换为datetime对象
-            hover_datetime = mdates.num2date(x)
-            # 只显示到整小时
-            date_str = hover_datetime.strftime('%m-%d %H:00')  # 只显示月-日 小时:00，不显示分钟
             
-            # 计算最接近的小时索引，基于相对于年初的小时数
-            # 获取hover_datetime是一年中的第几天和小时
-            day_of_year = hover_datetime.timetuple().tm_yday  # 一年中的第几天 (1-366)
-            hour_of_day = hover_datetime.hour  # 小时 (0-23)
-            
-            # 计算总小时数 (0-8759)
-            hour_idx = (day_of_year - 1) * 24 + hour_of_day
+            # 通过日期对照表将matplotlib日期数值转换为小时索引
+            calendar = self.get_calendar()
+            hour_idx = calendar.hour_at_date_num(x)
+            if 0 <= hour_idx < calendar.hours:
+                date_str = calendar.timestamps[hour_idx][5:]  # 只显示月-日 小时:00，不显示年份
+            else:
+                date_str = mdates.num2date(x).strftime('%m-%d %H:00')
             
             # 确保小时索引在有效范围内
-            if 0 <= hour_idx < 8760:
+            if 0 <= hour_idx < calendar.hours:
                 # 获取所有曲线在当前小时的数据（使用实际数据值，而非鼠标位置的y值）
                 values_info = []
                 
@@ -5791,4 +5004,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包为可执行文件后，场景扫描的工作进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file